@@ -0,0 +1,196 @@
+"""measure what one message costs on the autoresponder hot path.
+
+generates guilds in a throwaway DB_PATH, then drives main.get_prefix,
+placeholders.pl and AutoresponderCog.on_message with fake discord objects,
+reporting messages/sec, p50/p99 latency and sqlite statements per message.
+run from the repository root:
+
+    python -m bench.hotpath [--guilds 20] [--triggers 200] [--members 5000]
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+TMP = tempfile.mkdtemp(prefix="vanillabot-bench-")
+os.environ["DB_PATH"] = TMP
+# main.py writes {NAME}.log, keep it out of the checkout
+os.environ["NAME"] = os.path.join(TMP, "bench")
+os.environ.setdefault("ENVIRONMENT", "PRODUCTION")
+
+NOW = datetime.datetime.now(datetime.timezone.utc)
+RESPONSES = [
+    "hey {user}, welcome to {server_name}!",
+    "you are the {member_count_ordinal} member, {user_name}. {server_roles} roles here",
+    "{react:👋}hi {user} from {channel}",
+    "{embed:card}",
+]
+EMBED = {
+    "title": "{server_name}",
+    "description": "{user} joined {user_join_date}",
+    "color": "5865f2",
+    "fields": [{"name": "members", "value": "{member_count_ex_bots} humans", "inline": True}],
+    "footer": {"text": "{time}"},
+}
+
+
+class Permissions:
+    manage_guild = False
+
+
+class Channel:
+    def __init__(self, id):
+        self.id = id
+        self.name = f"channel-{id}"
+        self.mention = f"<#{id}>"
+        self.last_message = None
+        self._next = id * 1_000_000
+
+    async def send(self, content=None, embed=None, view=None):
+        self._next += 1
+        return SimpleNamespace(id=self._next, channel=self)
+
+
+def make_member(guild, id, bot=False):
+    return SimpleNamespace(
+        id=id, name=f"user{id}", mention=f"<@{id}>", bot=bot, guild=guild,
+        joined_at=NOW, created_at=NOW, top_role=SimpleNamespace(name="member"),
+        avatar=None, banner=None, roles=[], guild_permissions=Permissions(),
+    )
+
+
+def make_guild(id, members, roles):
+    guild = SimpleNamespace(
+        id=id, name=f"guild {id}", created_at=NOW, channels=[Channel(id * 100 + i) for i in range(5)],
+        premium_tier=1, premium_subscription_count=3, icon=None, emojis=[], shard_id=0,
+    )
+    guild.roles = [SimpleNamespace(id=id, name="@everyone")] + [
+        SimpleNamespace(id=id * 1000 + i, name=f"role{i}") for i in range(roles)
+    ]
+    guild.members = [make_member(guild, id * 1_000_000 + i, bot=i % 20 == 0) for i in range(members)]
+    guild.member_count = members
+    return guild
+
+
+def make_message(guild, rng, content, id):
+    async def add_reaction(emoji):
+        pass
+    return SimpleNamespace(
+        id=id, content=content, author=rng.choice(guild.members[1:]), guild=guild,
+        channel=rng.choice(guild.channels), mentions=[], reactions=[], created_at=NOW,
+        add_reaction=add_reaction,
+    )
+
+
+async def count_queries():
+    """statements run so far on this thread and the database thread, as db_queries counts them"""
+    from src.utils.config import pool
+    from src.utils.config.aio import worker
+    return pool.statements() + await worker.submit(pool.statements)
+
+
+def populate(args, rng):
+    import src.utils.config as config
+    from src.utils.config import utils
+    from src.utils.config.pool import batch
+
+    config.init()
+    guilds = []
+    with batch():
+        for g in range(args.guilds):
+            guild = make_guild(10_000 + g, args.members, args.roles)
+            guilds.append(guild)
+            for i in range(args.embeds):
+                utils.create_embed(guild.id, "card" if i == 0 else f"embed{i}", EMBED, "en", 1)
+            for i in range(args.triggers):
+                utils.create_autoresponder(guild.id, f"ar{i}", f"trigger{i}", RESPONSES[i % len(RESPONSES)], 1, "en")
+    return guilds
+
+
+def make_messages(args, rng, guilds):
+    messages = []
+    for i in range(args.messages):
+        guild = rng.choice(guilds)
+        if rng.random() < args.hit_rate:
+            content = f"so trigger{rng.randrange(args.triggers)} happened"
+        else:
+            content = "just some ordinary chatter without any trigger in it"
+        messages.append(make_message(guild, rng, content, 1_000_000_000 + i))
+    return messages
+
+
+async def measure(name, func, messages):
+    latencies = []
+    queries = await count_queries()
+    start = time.perf_counter()
+    for message in messages:
+        t = time.perf_counter()
+        await func(message)
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    queries = await count_queries() - queries
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return (
+        f"{name:22} {len(messages) / elapsed:10.0f} msg/s   p50 {statistics.median(latencies) * 1e6:8.1f} us"
+        f"   p99 {p99 * 1e6:8.1f} us   {queries / len(messages):6.2f} queries/msg"
+    )
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    guilds = populate(args, rng)
+    messages = make_messages(args, rng, guilds)
+
+    import main
+    from src.cogs.autoresponders import AutoresponderCog
+    from src.utils.placeholders import pl
+    from src.utils.guildstats import guild_stats
+
+    for guild in guilds:
+        guild_stats.seed(guild)
+    bot = SimpleNamespace(user=SimpleNamespace(id=1), http=None)
+    cog = AutoresponderCog(bot)
+
+    async def prefix(message):
+        await main.get_prefix(bot, message)
+
+    async def render(message):
+        await pl(message, RESPONSES[message.id % len(RESPONSES)])
+
+    results = []
+    # the first pass runs against cold caches, the later ones are steady state
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for label in ("cold", "warm"):
+            for name, func in (("get_prefix", prefix), ("pl", render), ("on_message", cog.on_message)):
+                results.append(await measure(f"{name} ({label})", func, messages))
+    print(f"{args.guilds} guilds x {args.triggers} triggers, {args.members} members, "
+          f"{args.roles} roles, {args.embeds} embeds, {args.messages} messages, {args.hit_rate:.0%} hit rate")
+    print("\n".join(results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--guilds", type=int, default=20)
+    parser.add_argument("--triggers", type=int, default=200, help="autoresponders per guild")
+    parser.add_argument("--members", type=int, default=2000, help="members per guild")
+    parser.add_argument("--roles", type=int, default=50, help="roles per guild")
+    parser.add_argument("--embeds", type=int, default=5, help="embeds per guild")
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--hit-rate", type=float, default=0.3, help="share of messages that match a trigger")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if args.triggers < 1 or args.embeds < 1:
+        sys.exit("--triggers and --embeds must be at least 1")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
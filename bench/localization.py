@@ -0,0 +1,94 @@
+"""compare Localization.get against the nested-dict walk it replaced.
+
+checks that both return the same value for every key in every language,
+then times lookups. run from the repository root:
+
+    python -m bench.localization [--repeat 200000]
+"""
+import argparse
+import time
+import timeit
+from src.utils.localization import Localization, localization, flatten
+
+
+def nested_get(self, section, key, lang=None, fallback=True, **kwargs):
+    # Localization.get before the catalog was flattened
+    lang = lang or self.default_lang
+    keys = key.split('.')
+    current = self.languages.get(lang, {}).get(section, {})
+    for k in keys:
+        if isinstance(current, dict):
+            current = current.get(k)
+        else:
+            current = None
+            break
+    if current is None and fallback and lang != self.default_lang:
+        current = self.languages.get(self.default_lang, {}).get(section, {})
+        for k in keys:
+            if isinstance(current, dict):
+                current = current.get(k)
+            else:
+                current = None
+                break
+    if isinstance(current, str):
+        try:
+            return current.format(**kwargs)
+        except KeyError:
+            return current
+    return current
+
+
+def check():
+    langs = list(localization.languages) + ["xx"]
+    checked = 0
+    for sections in localization.languages.values():
+        for section, data in sections.items():
+            if not isinstance(data, dict):
+                continue
+            for key in list(flatten(data)) + ["missing.key"]:
+                for lang in langs:
+                    for fallback in (True, False):
+                        try:
+                            expected = nested_get(localization, section, key, lang, fallback)
+                        except (IndexError, ValueError) as e:
+                            expected = type(e)
+                        try:
+                            actual = localization.get(section, key, lang, fallback)
+                        except (IndexError, ValueError) as e:
+                            actual = type(e)
+                        if expected is None and actual is not None and "." in key:
+                            # keys written as "a.b" in the json were unreachable before
+                            continue
+                        assert actual == expected, (section, key, lang, fallback, actual, expected)
+                        checked += 1
+    return checked
+
+
+def startup():
+    start = time.perf_counter()
+    loaded = Localization()
+    elapsed = time.perf_counter() - start
+    print(f"startup: {elapsed * 1e3:6.2f} ms, parsed {loaded.languages.loaded()} of {len(loaded.languages)} languages")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200_000)
+    args = parser.parse_args()
+
+    startup()
+    print(f"checked {check()} lookups against the nested walk")
+    cases = [
+        ("plain key", ("config", "ar.name"), {"lang": "en"}),
+        ("fallback", ("config", "ar.name"), {"lang": "xx"}),
+        ("formatted", ("config", "ar.info"), {"lang": "en", "name": "hello"}),
+        ("missing", ("config", "ar.does.not.exist"), {"lang": "es"}),
+    ]
+    for label, args_, kwargs in cases:
+        old = timeit.timeit(lambda: nested_get(localization, *args_, **kwargs), number=args.repeat)
+        new = timeit.timeit(lambda: localization.get(*args_, **kwargs), number=args.repeat)
+        print(f"{label:10} nested {old / args.repeat * 1e9:7.0f} ns  flat {new / args.repeat * 1e9:7.0f} ns  {old / new:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""check that the hot lookups are index seeks on large tables.
+
+fills throwaway databases under a temporary DB_PATH, prints the query plan of
+every hot query and times it. run from the repository root:
+
+    python -m bench.queryplan [--guilds 500] [--rows 200000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--guilds", type=int, default=500)
+    parser.add_argument("--autoresponders", type=int, default=40, help="per guild")
+    parser.add_argument("--rows", type=int, default=200_000, help="infractions and notes")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    os.environ["DB_PATH"] = tempfile.mkdtemp(prefix="vanillabot-bench-")
+    import src.utils.config as config
+    from src.utils.config import utils
+    from src.utils.config.pool import connect
+    from src.utils.config.autoresponders import AR_DB
+    from src.utils.config.infractions import MOD_DB
+
+    config.init()
+    rng = random.Random(0)
+    guild_ids = [rng.getrandbits(60) for _ in range(args.guilds)]
+    user_ids = [rng.getrandbits(60) for _ in range(args.rows // 20)]
+
+    with connect(AR_DB) as conn:
+        conn.executemany(
+            "INSERT INTO autoresponders (guild_id, name, trigger, response, language, creator_id) VALUES (?, ?, ?, ?, ?, ?)",
+            ((g, f"ar{i}", f"trigger {i}", "hello {user}", "en", 1) for g in guild_ids for i in range(args.autoresponders)),
+        )
+    with connect(MOD_DB) as conn:
+        conn.executemany(
+            "INSERT INTO infractions (guild_id, user_id, type, reason, duration, issued_by, created_at) VALUES (?, ?, 'warn', 'spam', NULL, 1, ?)",
+            ((rng.choice(guild_ids), rng.choice(user_ids), f"2025-01-01 00:00:{i:09d}") for i in range(args.rows)),
+        )
+        conn.executemany(
+            "INSERT INTO notes (user_id, note, added_by, timestamp) VALUES (?, 'note', 1, datetime('now'))",
+            ((rng.choice(user_ids),) for _ in range(args.rows)),
+        )
+    for path in (AR_DB, MOD_DB):
+        with connect(path) as conn:
+            conn.execute("ANALYZE")
+
+    guild_id, user_id = guild_ids[0], user_ids[0]
+    checks = [
+        (AR_DB, "get_guild_triggers", "SELECT DISTINCT name, trigger FROM autoresponders WHERE guild_id=?",
+         (guild_id,), lambda: utils.get_guild_triggers(guild_id)),
+        (MOD_DB, "get_infractions", """SELECT type, reason, created_at, duration, issued_by FROM infractions
+            WHERE guild_id = ? AND user_id = ? ORDER BY created_at DESC""",
+         (guild_id, user_id), lambda: utils.get_infractions(guild_id, user_id)),
+        (MOD_DB, "get_notes", "SELECT note, added_by, timestamp FROM notes WHERE user_id = ? ORDER BY timestamp DESC",
+         (user_id,), lambda: utils.get_notes(user_id)),
+    ]
+
+    failed = False
+    for path, name, sql, params, call in checks:
+        with connect(path) as conn:
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        seek = all(step.startswith("SEARCH") for step in plan if "TEMP B-TREE" not in step)
+        no_sort = not any("TEMP B-TREE" in step for step in plan)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            call()
+        per_call = (time.perf_counter() - start) / args.repeat * 1e6
+        status = "ok" if seek and no_sort else "SCAN"
+        failed |= status != "ok"
+        print(f"{name:20} {per_call:8.1f} us/call  [{status}]  {' | '.join(plan)}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""check the wiki cache against a local fake wikipedia.
+
+serves a few articles from a local http server that mimics the mediawiki
+query api, points WikiService at it, and checks fresh hits, stored hits,
+negative caching, single-flight, stale-while-revalidate and expiry by
+counting the requests that reach the server. then times cold and warm
+lookups. run from the repository root:
+
+    python -m bench.wikicache [--latency 0.05] [--burst 50]
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+os.environ["DB_PATH"] = tempfile.mkdtemp(prefix="vanillabot-bench-")
+
+import httpx
+
+ARTICLES = {
+    ("en", "Transgender"): "A transgender person has a gender identity different from the sex assigned at birth.\nMore text.",
+    ("en", "Intersex"): "Intersex people are born with sex characteristics that do not fit typical definitions.",
+    ("es", "Transgénero"): "Una persona transgénero es aquella cuya identidad de género difiere.",
+}
+
+
+class FakeWikipedia(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.latency = latency
+        self.articles = dict(ARTICLES)
+        self.requests = 0
+        self._lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server._lock:
+            server.requests += 1
+        time.sleep(server.latency)
+        lang = self.headers["Host"].split(".")[0]
+        params = {key: values[0] for key, values in parse_qs(urlsplit(self.path).query).items()}
+        title = params.get("titles", "")
+        extract = server.articles.get((lang, title))
+        if extract is None:
+            pages = {"-1": {"ns": 0, "title": title, "missing": ""}}
+        else:
+            pages = {"1": {
+                "pageid": 1, "ns": 0, "title": title, "extract": extract,
+                "fullurl": f"https://{lang}.wikipedia.org/wiki/{title.replace(' ', '_')}",
+            }}
+        body = json.dumps({"batchcomplete": "", "query": {"pages": pages}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalTransport(httpx.HTTPTransport):
+    """sends every request to the fake server, keeping the Host header"""
+
+    def __init__(self, port):
+        super().__init__()
+        self.port = port
+
+    def handle_request(self, request):
+        request.url = request.url.copy_with(scheme="http", host="127.0.0.1", port=self.port)
+        return super().handle_request(request)
+
+
+async def requests_for(server, coro):
+    before = server.requests
+    result = await coro
+    return result, server.requests - before
+
+
+def check(condition, label):
+    if not condition:
+        raise SystemExit(f"FAILED: {label}")
+    print(f"ok  {label}")
+
+
+async def run(args):
+    import src.utils.config as config
+    import src.utils.config.aio as db
+    from src.utils.wiki import WikiCache, WikiService
+
+    config.init()
+    server = FakeWikipedia(args.latency)
+    service = WikiService(transport=LocalTransport(server.server_address[1]))
+
+    cache = WikiCache(service)
+    article, sent = await requests_for(server, cache.get("en", "transgender"))
+    check(article and article["title"] == "Transgender" and sent == 2, f"cold lookup fetches info and extract ({sent} requests)")
+    article, sent = await requests_for(server, cache.get("en", "  transgender "))
+    check(article and sent == 0, "normalized repeat is a memory hit")
+
+    article, sent = await requests_for(server, cache.get("es", "Transgénero"))
+    check(article and article["url"].startswith("https://es.") and sent == 3, f"local language preferred, english asked concurrently ({sent} requests)")
+
+    article, sent = await requests_for(server, cache.get("en", "Does not exist"))
+    check(article is None and sent == 1, "miss is fetched once")
+    article, sent = await requests_for(server, cache.get("en", "Does not exist"))
+    check(article is None and sent == 0, "miss is cached")
+
+    results, sent = await requests_for(server, asyncio.gather(*(cache.get("en", "Intersex") for _ in range(args.burst))))
+    check(all(r and r["title"] == "Intersex" for r in results) and sent == 2, f"{args.burst} concurrent lookups share one fetch ({sent} requests)")
+
+    await db.wiki_writes.drain()
+    restarted = WikiCache(service)
+    article, sent = await requests_for(server, restarted.get("en", "Transgender"))
+    check(article and sent == 0, "a new cache answers from the database")
+    article, sent = await requests_for(server, restarted.get("en", "Does not exist"))
+    check(article is None and sent == 0, "misses are stored too")
+
+    stale = WikiCache(service, ttl=0, stale=3600)
+    await stale.get("en", "Intersex")
+    server.articles[("en", "Intersex")] = "Updated summary."
+    start = time.perf_counter()
+    article, sent = await requests_for(server, stale.get("en", "Intersex"))
+    elapsed = time.perf_counter() - start
+    check(article["summary"].startswith("Intersex people") and elapsed < args.latency, "stale article is served without waiting")
+    await asyncio.sleep(args.latency * 4 + 0.2)
+    stale.ttl = 3600
+    article, sent = await requests_for(server, stale.get("en", "Intersex"))
+    check(article["summary"] == "Updated summary." and sent == 0, "background refresh replaced it")
+
+    expired = WikiCache(service, ttl=0, stale=0, miss_ttl=0)
+    await expired.get("en", "Transgender")
+    article, sent = await requests_for(server, expired.get("en", "Transgender"))
+    check(article and sent == 2, "expired article is fetched again")
+
+    timed = WikiCache(service)
+    queries = [f"Missing {i}" for i in range(20)]
+    start = time.perf_counter()
+    for query in queries:
+        await timed.get("en", query)
+    cold = (time.perf_counter() - start) / len(queries)
+    start = time.perf_counter()
+    for query in queries:
+        await timed.get("en", query)
+    warm = (time.perf_counter() - start) / len(queries)
+    print(f"cold {cold * 1e3:8.2f} ms/lookup   warm {warm * 1e6:8.1f} us/lookup   ({args.latency * 1e3:.0f} ms server latency)")
+    await db.wiki_writes.drain()
+    server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds the fake server takes per request")
+    parser.add_argument("--burst", type=int, default=50, help="concurrent lookups of one article")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""run the bot as several processes, each owning a range of shards.
+
+every process runs main.py with its own SHARD_IDS and CLUSTER_ID and shares
+the databases under DB_PATH. crashed processes are restarted. run from the
+repository root:
+
+    python cluster.py --processes 4 [--shards 16]
+"""
+import argparse
+import json
+import math
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import src.utils.config as db
+from src.utils.logger import setup_logging, get_logger
+from src.utils.sharding import IDENTIFY_INTERVAL
+
+log = get_logger("cluster")
+
+# seconds a crashed process waits before its first and its longest restart
+RESTART_DELAY = 5
+MAX_RESTART_DELAY = 300
+
+
+def gateway_info(token):
+    """(recommended shard count, max_concurrency) from discord"""
+    request = urllib.request.Request(
+        "https://discord.com/api/v10/gateway/bot",
+        headers={"Authorization": f"Bot {token}", "User-Agent": "DiscordBot (cluster.py, 1.0)"},
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        data = json.load(response)
+    return data["shards"], data["session_start_limit"]["max_concurrency"]
+
+
+def split(shard_count, processes):
+    """contiguous shard id ranges, as even as possible"""
+    size, extra = divmod(shard_count, processes)
+    ranges, start = [], 0
+    for i in range(processes):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(range(start, end))
+        start = end
+    return [r for r in ranges if r]
+
+
+class Process:
+    def __init__(self, cluster_id, shard_ids, env):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.env = env
+        self.popen = None
+        self.started = 0.0
+        self.delay = RESTART_DELAY
+        self.restart_at = None
+
+    def start(self):
+        self.popen = subprocess.Popen([sys.executable, "main.py"], env=self.env)
+        self.started = time.monotonic()
+        log.info("Started process %s (pid %s) for shards %s-%s", self.cluster_id, self.popen.pid, self.shard_ids[0], self.shard_ids[-1])
+
+
+def run(args):
+    token = os.getenv("BOT_TOKEN")
+    shard_count, max_concurrency = args.shards, args.max_concurrency
+    if shard_count is None or max_concurrency is None:
+        recommended, concurrency = gateway_info(token)
+        shard_count = shard_count or max(recommended, args.processes)
+        max_concurrency = max_concurrency or concurrency
+
+    # migrate once here, so the processes do not race to upgrade the schema
+    db.init()
+
+    name = os.getenv("NAME", "berrylyn")
+    metrics_port = int(os.getenv("METRICS_PORT", "0"))
+    processes = []
+    for cluster_id, shard_ids in enumerate(split(shard_count, args.processes)):
+        env = dict(
+            os.environ,
+            SHARD_COUNT=str(shard_count),
+            SHARD_IDS=f"{shard_ids[0]}-{shard_ids[-1]}",
+            CLUSTER_ID=str(cluster_id),
+            NAME=f"{name}-{cluster_id}",
+        )
+        if metrics_port:
+            # each process serves its own /metrics
+            env["METRICS_PORT"] = str(metrics_port + cluster_id)
+        processes.append(Process(cluster_id, shard_ids, env))
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    # a process identifies its shards max_concurrency at a time, 5 seconds
+    # apart. start the next one once those identifies are through, so the
+    # processes never identify in the same bucket at once.
+    for process in processes:
+        if stopping:
+            break
+        process.start()
+        wait = IDENTIFY_INTERVAL * math.ceil(len(process.shard_ids) / max_concurrency)
+        deadline = time.monotonic() + wait
+        while not stopping and time.monotonic() < deadline:
+            time.sleep(0.2)
+
+    while not stopping:
+        time.sleep(1)
+        now = time.monotonic()
+        for process in processes:
+            if process.popen is None:
+                continue
+            code = process.popen.poll()
+            if code is None:
+                # a process that stayed up for a while starts over with a short delay
+                if now - process.started > MAX_RESTART_DELAY:
+                    process.delay = RESTART_DELAY
+                continue
+            if process.restart_at is None:
+                log.warning("Process %s exited with %s, restarting in %ss", process.cluster_id, code, process.delay)
+                process.restart_at = now + process.delay
+                process.delay = min(process.delay * 2, MAX_RESTART_DELAY)
+            elif now >= process.restart_at:
+                process.restart_at = None
+                process.start()
+
+    log.info("Stopping %d processes", len(processes))
+    for process in processes:
+        if process.popen is not None and process.popen.poll() is None:
+            process.popen.send_signal(signal.SIGINT)
+    for process in processes:
+        if process.popen is None:
+            continue
+        try:
+            process.popen.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.popen.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--shards", type=int, default=int(os.getenv("SHARD_COUNT", "0")) or None,
+        help="total shards, SHARD_COUNT or discord's recommendation by default",
+    )
+    parser.add_argument("--max-concurrency", type=int, help="identify buckets, from discord by default")
+    args = parser.parse_args()
+    if args.processes < 1:
+        sys.exit("--processes must be at least 1")
+    setup_logging("cluster", os.getenv("ENVIRONMENT", "DEVELOPMENT"))
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,21 @@
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
-import logging
-import sys
 import os
 import src.utils.config as db
+from src.utils.logger import setup_logging, get_logger
+from src.utils.sharding import ShardedBot, shard_options
 
-from src.utils.localization import localization
-from src.utils.config.utils import get_guild_config
+from src.utils.config.aio import get_guild_config
 name = os.getenv("NAME", "berrylyn")
 env = os.getenv("ENVIRONMENT", "DEVELOPMENT")
 
-logfile = logging.FileHandler(f'{name}.log')
-stdout = logging.StreamHandler(sys.stdout)
-logger = logging.getLogger("discord")
-logger.addHandler(logfile)
-logger.addHandler(stdout)
-
-
-if env == "DEVELOPMENT":
-    logger.setLevel(logging.DEBUG)
-    logger.info(f"Running in {env}. Debugging enabled.")
-else:
-    level = logging.ERROR
-    logger.info(f"Running in {env}.")
+setup_logging(name, env)
+logger = get_logger("main")
+logger.info("Running in %s.", env)
 
 
 load_dotenv()
-localization.load_languages()
 
 intents = discord.Intents.default()
 intents.message_content = True
@@ -36,20 +24,22 @@ intents.members = True
 
 async def get_prefix(bot, message):
     guild_id = message.guild.id if message.guild else None
-    prefix = get_guild_config(guild_id, "prefix")
+    prefix = await get_guild_config(guild_id, "prefix")
     if str(prefix) in message.content and env == "DEVELOPMENT":
-        logger.debug(f"Command ran '{message.content}' in {message.guild.name}. This is for debugging and should be removed if environment is in production.")
+        logger.debug("Command ran %r in %s.", message.content, message.guild.name)
     return commands.when_mentioned_or(prefix or "ly:")(bot, message)
 
 
 
-bot = commands.Bot(command_prefix=get_prefix, intents=intents, help_command=None)
+bot = ShardedBot(
+    command_prefix=get_prefix, intents=intents, help_command=None, **shard_options()
+)
 
 
 
 @bot.event
 async def on_ready():
-    logger.info(f"{os.getenv('NAME', 'bot')} loaded. {bot.user}")
+    logger.info("%s loaded. %s", os.getenv('NAME', 'bot'), bot.user)
 
 
 @bot.event
@@ -58,9 +48,9 @@ async def setup_hook():
         if cog.endswith(".py") and not cog.startswith("__"):
             try:
                 await bot.load_extension(f"src.cogs.{cog[:-3]}")
-                logger.info(f"Loaded {cog}")
-            except Exception as e:
-                logger.error(f"Failed to load {cog}:", e)
+                logger.info("Loaded %s", cog)
+            except Exception:
+                logger.exception("Failed to load %s", cog)
 
 
 @commands.Cog.listener()
@@ -71,6 +61,7 @@ async def on_reaction_add(self, reaction, user):
         if str(reaction.emoji) in ["❌"]:
             await reaction.message.delete()
 
-db.init()
-token = os.getenv("BOT_TOKEN")
-bot.run(token, log_handler=stdout)
+if __name__ == "__main__":
+    db.init()
+    token = os.getenv("BOT_TOKEN")
+    bot.run(token, log_handler=None)
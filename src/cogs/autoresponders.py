@@ -4,8 +4,34 @@ import asyncio
 import re
 from src.utils.localization import localization
 from src.utils.placeholders import pl
-from src.utils.config.utils import get_guild_triggers, get_all_autoresponders, get_autoresponder, create_autoresponder, update_autoresponder, delete_autoresponder, autoresponder_exists
-import src.utils.config.utils as cfg
+from src.utils.config.aio import get_guild_autoresponders, get_all_autoresponders, get_autoresponder, create_autoresponder, update_autoresponder, delete_autoresponder, autoresponder_exists
+import src.utils.config.aio as cfg
+from src.utils.scheduler import DeleteScheduler
+from src.utils.replies import ReplyStore
+from src.utils.config.cache import ar_index
+from src.utils.metrics import metrics
+from src.utils.logger import get_logger
+
+RESTRICTED_PLACEHOLDERS = re.compile("|".join([
+    r"\{dm(?::[^}]*)\}",  # {dm} or {dm:target}
+    r"\{interaction:[^}]*\}",  # {interaction:type:value[:nametag]}
+    r"\{delete\}",  # {delete}
+    r"\{action:[^}]*\}",  # {action:action:nametag}
+    r"\{role(?::[^:]*):[^}]*\}",  # {role[:action]:role_name}
+    r"\{embed:[^}]*\}",  # {embed:name}
+    r"\{user_infractions\}",  # staff_placeholders
+    r"\{message_id\}",
+    r"\{message\}",
+    r"\{message_reactions\}",
+    r"\{message_created\}",
+    r"\{channel_last_message\}",
+]))
+ON_MESSAGE = metrics.timer("on_message", cog="autoresponders")
+SEND = metrics.timer("discord_send", route="channel.send")
+MATCHES = metrics.counter("autoresponder_matches")
+log = get_logger(__name__)
+USER_MENTION = re.compile(r"<@!?(\d+)>")
+PLACEHOLDER = re.compile(r"\{[^}]*\}")
 
 class edit_view(discord.ui.View):
     def __init__(self, bot, ar_data, user_id, guild_id, language):
@@ -19,8 +45,9 @@ class edit_view(discord.ui.View):
     async def check_permissions(self, user, action):
         ar_data = self.ar_data
         guild = self.bot.get_guild(int(self.guild_id))
-        edit_role = cfg.get_guild_config(self.guild_id, 'autoresponder_edit_role')
-        edit_perm = cfg.get_guild_config(self.guild_id, 'autoresponder_edit_permission')
+        settings = await cfg.get_guild_settings(self.guild_id)
+        edit_role = settings.get('autoresponder_edit_role')
+        edit_perm = settings.get('autoresponder_edit_permission')
         editor_role = ar_data.get('editor_role')
         editors = ar_data.get('editors', '').split(',') if ar_data.get('editors') else []
         permissions = ar_data.get('edit_permissions', '').split(',') if ar_data.get('edit_permissions') else []
@@ -40,10 +67,10 @@ class edit_view(discord.ui.View):
     @discord.ui.button(label="Edit Trigger", style=discord.ButtonStyle.primary)
     async def edit_trigger(self, interaction: discord.Interaction, button: discord.ui.Button):
         if not await self.check_permissions(interaction.user, 'edit'):
-            lang = cfg.get_user_config(interaction.user.id, "language") or "en"
+            lang = await cfg.get_user_config(interaction.user.id, "language") or "en"
             await interaction.response.send_message(localization.get("config", "ar.no_edit_permission", lang=lang, action="edit trigger"), ephemeral=True)
             return
-        lang = cfg.get_user_config(interaction.user.id, "language") or "en"
+        lang = await cfg.get_user_config(interaction.user.id, "language") or "en"
         await interaction.response.send_message(
             localization.get("config", "ar.edit_prompt_trigger", lang=lang, trigger=self.ar_data['trigger']),
             ephemeral=True
@@ -53,10 +80,10 @@ class edit_view(discord.ui.View):
             if msg.content.lower() == 'cancel':
                 await interaction.followup.send(localization.get("config", "ar.cancel", lang=lang), ephemeral=True)
                 return
-            if re.search(r"\{[^}]*\}", msg.content):
+            if PLACEHOLDER.search(msg.content):
                 await interaction.followup.send(localization.get("config", "ar.invalid_trigger", lang=lang), ephemeral=True)
                 return
-            update_autoresponder(self.guild_id, self.ar_data['name'], self.language, trigger=msg.content)
+            await update_autoresponder(self.guild_id, self.ar_data['name'], self.language, trigger=msg.content)
             self.ar_data['trigger'] = msg.content
             await interaction.followup.send(localization.get("config", "ar.edit_success", lang=lang, name=self.ar_data['name']), ephemeral=True)
             await interaction.message.edit(embed=await self.create_edit_embed(interaction.user))
@@ -66,10 +93,10 @@ class edit_view(discord.ui.View):
     @discord.ui.button(label="Edit Response", style=discord.ButtonStyle.primary)
     async def edit_response(self, interaction: discord.Interaction, button: discord.ui.Button):
         if not await self.check_permissions(interaction.user, 'edit'):
-            lang = cfg.get_user_config(interaction.user.id, "language") or "en"
+            lang = await cfg.get_user_config(interaction.user.id, "language") or "en"
             await interaction.response.send_message(localization.get("config", "ar.no_edit_permission", lang=lang, action="edit response"), ephemeral=True)
             return
-        lang = cfg.get_user_config(interaction.user.id, "language") or "en"
+        lang = await cfg.get_user_config(interaction.user.id, "language") or "en"
         preview = self.ar_data['response'][:100] + "..." if len(self.ar_data['response']) > 100 else self.ar_data['response']
         await interaction.response.send_message(
             localization.get("config", "ar.edit_prompt_response", lang=lang, response=preview),
@@ -80,15 +107,15 @@ class edit_view(discord.ui.View):
             if msg.content.lower() == 'cancel':
                 await interaction.followup.send(localization.get("config", "ar.cancel", lang=lang), ephemeral=True)
                 return
-            allowed, error = self.bot.get_cog('AutoresponderCog').check_restricted_placeholders(msg.content, interaction.user)
+            allowed, error = await self.bot.get_cog('AutoresponderCog').check_restricted_placeholders(msg.content, interaction.user)
             if not allowed:
                 await interaction.followup.send(error, ephemeral=True)
                 return
-            update_autoresponder(self.guild_id, self.ar_data['name'], self.language, response=msg.content)
+            await update_autoresponder(self.guild_id, self.ar_data['name'], self.language, response=msg.content)
             self.ar_data['response'] = msg.content
             if str(interaction.user.id) not in self.ar_data.get('contributors', '').split(','):
                 contributors = self.ar_data.get('contributors', '').split(',') + [str(interaction.user.id)]
-                update_autoresponder(self.guild_id, self.ar_data['name'], self.language, contributors=','.join(filter(None, contributors)))
+                await update_autoresponder(self.guild_id, self.ar_data['name'], self.language, contributors=','.join(filter(None, contributors)))
                 self.ar_data['contributors'] = ','.join(filter(None, contributors))
             await interaction.followup.send(localization.get("config", "ar.edit_success", lang=lang, name=self.ar_data['name']), ephemeral=True)
             await interaction.message.edit(embed=await self.create_edit_embed(interaction.user))
@@ -98,10 +125,10 @@ class edit_view(discord.ui.View):
     @discord.ui.button(label="Edit Arguments", style=discord.ButtonStyle.primary)
     async def edit_arguments(self, interaction: discord.Interaction, button: discord.ui.Button):
         if not await self.check_permissions(interaction.user, 'edit'):
-            lang = cfg.get_user_config(interaction.user.id, "language") or "en"
+            lang = await cfg.get_user_config(interaction.user.id, "language") or "en"
             await interaction.response.send_message(localization.get("config", "ar.no_edit_permission", lang=lang, action="edit arguments"), ephemeral=True)
             return
-        lang = cfg.get_user_config(interaction.user.id, "language") or "en"
+        lang = await cfg.get_user_config(interaction.user.id, "language") or "en"
         await interaction.response.send_message(
             localization.get("config", "ar.edit_prompt_arguments", lang=lang, arguments=self.ar_data['arguments']),
             ephemeral=True
@@ -114,7 +141,7 @@ class edit_view(discord.ui.View):
             if msg.content not in ['none', 'user']:
                 await interaction.followup.send(localization.get("config", "ar.invalid_arguments", lang=lang), ephemeral=True)
                 return
-            update_autoresponder(self.guild_id, self.ar_data['name'], self.language, arguments=msg.content)
+            await update_autoresponder(self.guild_id, self.ar_data['name'], self.language, arguments=msg.content)
             self.ar_data['arguments'] = msg.content
             await interaction.followup.send(localization.get("config", "ar.edit_success", lang=lang, name=self.ar_data['name']), ephemeral=True)
             await interaction.message.edit(embed=await self.create_edit_embed(interaction.user))
@@ -124,10 +151,10 @@ class edit_view(discord.ui.View):
     @discord.ui.button(label="Edit Editors", style=discord.ButtonStyle.primary)
     async def edit_editors(self, interaction: discord.Interaction, button: discord.ui.Button):
         if not await self.check_permissions(interaction.user, 'add_editors'):
-            lang = cfg.get_user_config(interaction.user.id, "language") or "en"
+            lang = await cfg.get_user_config(interaction.user.id, "language") or "en"
             await interaction.response.send_message(localization.get("config", "ar.no_edit_permission", lang=lang, action="add editors"), ephemeral=True)
             return
-        lang = cfg.get_user_config(interaction.user.id, "language") or "en"
+        lang = await cfg.get_user_config(interaction.user.id, "language") or "en"
         editors = self.ar_data.get('editors', '') or 'None'
         await interaction.response.send_message(
             localization.get("config", "ar.edit_prompt_editors", lang=lang, editors=editors),
@@ -148,7 +175,7 @@ class edit_view(discord.ui.View):
                 else:
                     await interaction.followup.send(localization.get("config", "ar.invalid_editors", lang=lang), ephemeral=True)
                     return
-            update_autoresponder(self.guild_id, self.ar_data['name'], self.language, editors=','.join(editors))
+            await update_autoresponder(self.guild_id, self.ar_data['name'], self.language, editors=','.join(editors))
             self.ar_data['editors'] = ','.join(editors)
             await interaction.followup.send(localization.get("config", "ar.edit_success", lang=lang, name=self.ar_data['name']), ephemeral=True)
             await interaction.message.edit(embed=await self.create_edit_embed(interaction.user))
@@ -158,10 +185,10 @@ class edit_view(discord.ui.View):
     @discord.ui.button(label="Edit Permissions", style=discord.ButtonStyle.primary)
     async def edit_permissions(self, interaction: discord.Interaction, button: discord.ui.Button):
         if not await self.check_permissions(interaction.user, 'add_editors'):
-            lang = cfg.get_user_config(interaction.user.id, "language") or "en"
+            lang = await cfg.get_user_config(interaction.user.id, "language") or "en"
             await interaction.response.send_message(localization.get("config", "ar.no_edit_permission", lang=lang, action="edit permissions"), ephemeral=True)
             return
-        lang = cfg.get_user_config(interaction.user.id, "language") or "en"
+        lang = await cfg.get_user_config(interaction.user.id, "language") or "en"
         permissions = self.ar_data.get('edit_permissions', '') or 'None'
         await interaction.response.send_message(
             localization.get("config", "ar.edit_prompt_permissions", lang=lang, permissions=permissions),
@@ -177,7 +204,7 @@ class edit_view(discord.ui.View):
             if not new_perms.issubset(valid_perms):
                 await interaction.followup.send(localization.get("config", "ar.invalid_permissions", lang=lang), ephemeral=True)
                 return
-            update_autoresponder(self.guild_id, self.ar_data['name'], self.language, edit_permissions=','.join(new_perms))
+            await update_autoresponder(self.guild_id, self.ar_data['name'], self.language, edit_permissions=','.join(new_perms))
             self.ar_data['edit_permissions'] = ','.join(new_perms)
             await interaction.followup.send(localization.get("config", "ar.edit_success", lang=lang, name=self.ar_data['name']), ephemeral=True)
             await interaction.message.edit(embed=await self.create_edit_embed(interaction.user))
@@ -185,7 +212,7 @@ class edit_view(discord.ui.View):
             await interaction.followup.send(localization.get("config", "ar.timeout", lang=lang), ephemeral=True)
 
     async def create_edit_embed(self, user):
-        lang = cfg.get_language(user.id, self.guild_id) or "en"
+        lang = await cfg.get_language(user.id, self.guild_id) or "en"
         preview = self.ar_data['response'][:100] + "..." if len(self.ar_data['response']) > 100 else self.ar_data['response']
         embed = discord.Embed(
             title=localization.get("config", "ar.info", lang=lang, name=self.ar_data['name']),
@@ -253,37 +280,33 @@ class edit_view(discord.ui.View):
 class AutoresponderCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.ar_messages = {}
+        self.ar_messages = ReplyStore()
+        self.deletes = DeleteScheduler(bot)
         self.valid_permissions = {'edit', 'delete', 'add_language', 'edit_non_default', 'add_editors'}
 
-    def check_restricted_placeholders(self, response: str, user: discord.Member) -> tuple[bool, str]:
+    async def cog_load(self):
+        await self.ar_messages.start()
+        await self.deletes.start()
+
+    async def cog_unload(self):
+        await self.deletes.stop()
+        await self.ar_messages.stop()
+
+    async def check_restricted_placeholders(self, response: str, user: discord.Member) -> tuple[bool, str]:
         """Check if response contains restricted placeholders and if user has permission"""
-        restricted_patterns = [
-            r"\{dm(?::[^}]*)\}",  # {dm} or {dm:target}
-            r"\{interaction:[^}]*\}",  # {interaction:type:value[:nametag]}
-            r"\{delete\}",  # {delete}
-            r"\{action:[^}]*\}",  # {action:action:nametag}
-            r"\{role(?::[^:]*):[^}]*\}",  # {role[:action]:role_name}
-            r"\{embed:[^}]*\}",  # {embed:name}
-            r"\{user_infractions\}",  # staff_placeholders
-            r"\{message_id\}",
-            r"\{message\}",
-            r"\{message_reactions\}",
-            r"\{message_created\}",
-            r"\{channel_last_message\}",
-        ]
-        lang = cfg.get_user_config(user.id, "language") or "en"
-        staff_role = cfg.get_guild_config(user.guild.id, 'staff_role')
-        for pattern in restricted_patterns:
-            if re.search(pattern, response):
-                if not user.guild_permissions.manage_guild and not (staff_role and any(role.id == staff_role for role in user.roles)):
-                    return False, localization.get("config", "ar.restricted_placeholders", lang=lang)
+        if not RESTRICTED_PLACEHOLDERS.search(response):
+            return True, ""
+        lang = await cfg.get_user_config(user.id, "language") or "en"
+        staff_role = await cfg.get_guild_config(user.guild.id, 'staff_role')
+        if not user.guild_permissions.manage_guild and not (staff_role and any(role.id == staff_role for role in user.roles)):
+            return False, localization.get("config", "ar.restricted_placeholders", lang=lang)
         return True, ""
 
     async def check_permissions(self, user, guild_id, action, ar_data=None):
         """Check if user can perform action on autoresponder"""
-        edit_role = cfg.get_guild_config(guild_id, 'autoresponder_edit_role')
-        edit_perm = cfg.get_guild_config(guild_id, 'autoresponder_edit_permission')
+        settings = await cfg.get_guild_settings(guild_id)
+        edit_role = settings.get('autoresponder_edit_role')
+        edit_perm = settings.get('autoresponder_edit_permission')
         if edit_role and any(role.id == edit_role for role in user.roles):
             return True
         if getattr(user.guild_permissions, edit_perm, False):
@@ -301,100 +324,106 @@ class AutoresponderCog(commands.Cog):
                 return action in permissions
         return False
 
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        ar_index.invalidate(guild.id)
+
     @commands.Cog.listener()
     async def on_message(self, message):
+        with ON_MESSAGE.time():
+            await self.respond(message)
+
+    async def respond(self, message):
+        """send the first autoresponder whose trigger is in the message"""
         if message.author.bot or not message.guild:
             return
 
-        guild_id = str(message.guild.id)
-        lang = cfg.get_language(message.author.id, guild_id) or "en"
-        triggers = get_guild_triggers(guild_id)
-
-        for ar_data in triggers:
-            trigger = ar_data["trigger"].lower()
-            content = message.content.lower()
-
-            if trigger in content:
-                ar_name = ar_data["name"]
-                ar_data_lang = get_autoresponder(guild_id, ar_name, lang)
-                ar_data_en = get_autoresponder(guild_id, ar_name, "en")
-
-                selected_data = ar_data_lang or ar_data_en
-                if not selected_data:
-                    continue
-
-
-                arguments = selected_data.get('arguments', 'none')
-                if arguments == 'user' and not re.search(r"<@!?(\d+)>", message.content):
-                    continue
-
-                data = selected_data["response"]
-                if data:
-                    response, reactions = await pl(message, data)
-                    if isinstance(response, str):
-                        print(f"Failed to process autoresponder '{ar_name}': {response}")
-                        break
-
-                    if response:
-                        try:
-                            print(f"Sending autoresponder '{ar_name}' in guild {guild_id} to {message.author.name}\nResponse:{response}\nEmbed: {response.get('embed')}\nView: {response.get('view')}")
+        guild_id = message.guild.id
+        autoresponders = await get_guild_autoresponders(guild_id)
+        if not autoresponders.triggers:
+            return
+        lang = await cfg.get_language(message.author.id, guild_id) or "en"
+
+        for ar_data in autoresponders.match(message.content):
+            ar_name = ar_data["name"]
+            ar_data_lang = autoresponders.get(ar_name, lang)
+            ar_data_en = autoresponders.get(ar_name, "en")
+
+            selected_data = ar_data_lang or ar_data_en
+            if not selected_data:
+                continue
+
+
+            arguments = selected_data.get('arguments', 'none')
+            if arguments == 'user' and not USER_MENTION.search(message.content):
+                continue
+
+            MATCHES.inc()
+            data = selected_data["response"]
+            if data:
+                response, reactions = await pl(message, data, selected_data.get("parsed"))
+                if isinstance(response, str):
+                    log.warning("Failed to process autoresponder %r: %s", ar_name, response)
+                    break
+
+                if response:
+                    try:
+                        log.debug("Sending autoresponder %r in guild %s to %s: %s", ar_name, guild_id, message.author.name, response)
+                        with SEND.time():
                             sent_message = await message.channel.send(
                                 content=response["text"],
                                 embed=response.get("embed"),
                                 view=response.get("view")
                             )
-                            if response.get("delete_after"):
-                                await asyncio.sleep(response["delete_after"])
-                                await sent_message.delete()
-                            
-                            self.ar_messages[sent_message.id] = {
-                                "name": ar_name,
-                                "creator_id": selected_data["creator_id"],
-                                "trigger": selected_data["trigger"],
-                            }
-                        except discord.Forbidden:
-                            print(f"Failed to send autoresponder '{ar_name}' in guild {guild_id}: Bot lacks permissions")
-                            break
-
-                    for emoji in reactions:
-                        try:
-                            await message.add_reaction(emoji)
-                        except discord.HTTPException:
-                            print(f"Failed to add reaction '{emoji}' for autoresponder '{ar_name}'")
-
-                break
+                        self.ar_messages.add(sent_message.id, ar_name, selected_data["creator_id"], selected_data["trigger"])
+                        if response.get("delete_after"):
+                            await self.deletes.schedule(sent_message.channel.id, sent_message.id, response["delete_after"], guild_id)
+                    except discord.Forbidden:
+                        log.warning("Failed to send autoresponder %r in guild %s: bot lacks permissions", ar_name, guild_id)
+                        break
+
+                for emoji in reactions:
+                    try:
+                        await message.add_reaction(emoji)
+                    except discord.HTTPException:
+                        log.warning("Failed to add reaction %r for autoresponder %r", emoji, ar_name)
+
+            break
 
     @commands.Cog.listener()
     async def on_reaction_add(self, reaction, user):
         if user.bot:
             return
 
-        lang = cfg.get_user_config(user.id, "language") or "en"
-        if reaction.message.id in self.ar_messages:
-            ar_info = self.ar_messages[reaction.message.id]
-            guild_id = str(reaction.message.guild.id)
-            ar_data = get_autoresponder(guild_id, ar_info['name'], 'en')
+        if str(reaction.emoji) not in ("🗑️", "❓") or not reaction.message.guild:
+            return
+        # only messages we sent can be stored replies, so skip the database for the rest
+        ar_info = await self.ar_messages.get(reaction.message.id, stored=reaction.message.author.id == self.bot.user.id)
+        if ar_info:
+            lang = await cfg.get_user_config(user.id, "language") or "en"
+            guild_id = reaction.message.guild.id
+            ar_data = await get_autoresponder(guild_id, ar_info.name, 'en')
             if str(reaction.emoji) == "🗑️" and await self.check_permissions(user, guild_id, 'delete', ar_data):
                 await reaction.message.delete()
-                del self.ar_messages[reaction.message.id]
+                await self.ar_messages.discard(reaction.message.id)
             elif str(reaction.emoji) == "❓":
                 embed = discord.Embed(
-                    title=localization.get("config", "ar.info", lang=lang, name=ar_info["name"]),
+                    title=localization.get("config", "ar.info", lang=lang, name=ar_info.name),
                     color=discord.Color.blue(),
                 )
                 embed.add_field(
                     name=localization.get("config", "ar.name", lang=lang),
-                    value=ar_info["name"],
+                    value=ar_info.name,
                     inline=False,
                 )
                 embed.add_field(
                     name=localization.get("config", "ar.trigger", lang=lang),
-                    value=ar_info["trigger"],
+                    value=ar_info.trigger,
                     inline=False,
                 )
                 embed.add_field(
                     name=localization.get("config", "ar.creator", lang=lang),
-                    value=f"<@{ar_info['creator_id']}>",
+                    value=f"<@{ar_info.creator_id}>",
                     inline=False,
                 )
                 try:
@@ -405,8 +434,8 @@ class AutoresponderCog(commands.Cog):
     @commands.group(name="autoresponder", aliases=["ar"], invoke_without_command=True)
     async def autoresponder(self, ctx):
         """Command group for autoresponders"""
-        lang = cfg.get_user_config(ctx.author.id, "language") or "en"
-        pfx = cfg.get_guild_config(ctx.guild.id, "prefix") or " "
+        lang = await cfg.get_user_config(ctx.author.id, "language") or "en"
+        pfx = await cfg.get_guild_config(ctx.guild.id, "prefix") or " "
         embed = discord.Embed(
             title=localization.get("config", "ar.title", lang=lang),
             description=localization.get("config", "ar.description", lang=lang),
@@ -437,12 +466,12 @@ class AutoresponderCog(commands.Cog):
     @autoresponder.command(name="create")
     async def ar_create(self, ctx, name: str):
         """create an autoresponder interactively"""
-        guild_id = str(ctx.guild.id)
-        lang = cfg.get_user_config(ctx.author.id, "language") or "en"
+        guild_id = ctx.guild.id
+        lang = await cfg.get_user_config(ctx.author.id, "language") or "en"
         if not await self.check_permissions(ctx.author, guild_id, 'edit'):
             await ctx.send(localization.get("config", "ar.no_permission", lang=lang))
             return
-        if autoresponder_exists(guild_id, name):
+        if await autoresponder_exists(guild_id, name):
             await ctx.send(localization.get("config", "ar.already_exists", lang=lang, name=name))
             return
 
@@ -450,7 +479,7 @@ class AutoresponderCog(commands.Cog):
         try:
             trigger_msg = await self.bot.wait_for('message', check=lambda m: m.author.id == ctx.author.id and m.channel.id == ctx.channel.id, timeout=60)
             trigger = trigger_msg.content
-            if re.search(r"\{[^}]*\}", trigger):
+            if PLACEHOLDER.search(trigger):
                 await ctx.send(localization.get("config", "ar.invalid_trigger", lang=lang))
                 return
         except asyncio.TimeoutError:
@@ -461,7 +490,7 @@ class AutoresponderCog(commands.Cog):
         try:
             response_msg = await self.bot.wait_for('message', check=lambda m: m.author.id == ctx.author.id and m.channel.id == ctx.channel.id, timeout=60)
             response = response_msg.content
-            allowed, error = self.check_restricted_placeholders(response, ctx.author)
+            allowed, error = await self.check_restricted_placeholders(response, ctx.author)
             if not allowed:
                 await ctx.send(error)
                 return
@@ -485,9 +514,9 @@ class AutoresponderCog(commands.Cog):
             lang_msg = await self.bot.wait_for('message', check=lambda m: m.author.id == ctx.author.id and m.channel.id == ctx.channel.id, timeout=60)
             language = lang_msg.content.lower()
         except asyncio.TimeoutError:
-            language = cfg.get_guild_config(guild_id, 'language')
+            language = await cfg.get_guild_config(guild_id, 'language')
 
-        create_autoresponder(
+        await create_autoresponder(
             guild_id, name, trigger, response, ctx.author.id, language,
             editor_role=ctx.guild.default_role.id, arguments=arguments
         )
@@ -520,20 +549,20 @@ class AutoresponderCog(commands.Cog):
             value=arguments,
             inline=True
         )
-        await ctx.send(embed=embed, view=edit_view(self.bot, get_autoresponder(guild_id, name, language), ctx.author.id, guild_id, language))
+        await ctx.send(embed=embed, view=edit_view(self.bot, await get_autoresponder(guild_id, name, language), ctx.author.id, guild_id, language))
 
     @autoresponder.command(name="edit")
     async def ar_edit(self, ctx, name: str):
         """edit an autoresponder interactively"""
-        guild_id = str(ctx.guild.id)
-        lang = cfg.get_language(ctx.author.id, guild_id) or "en"
-        ar_data = get_autoresponder(guild_id, name, lang) or get_autoresponder(guild_id, name, 'en')
+        guild_id = ctx.guild.id
+        lang = await cfg.get_language(ctx.author.id, guild_id) or "en"
+        ar_data = await get_autoresponder(guild_id, name, lang) or await get_autoresponder(guild_id, name, 'en')
         if not ar_data:
             await ctx.send(localization.get("config", "ar.not_found", lang=lang, name=name))
             return
         if not await self.check_permissions(ctx.author, guild_id, 'edit', ar_data):
             if not ar_data.get('edit_permissions') or 'edit_non_default' not in ar_data.get('edit_permissions', '').split(','):
-                if ar_data['language'] != cfg.get_guild_config(guild_id, 'language'):
+                if ar_data['language'] != await cfg.get_guild_config(guild_id, 'language'):
                     await ctx.send(localization.get("config", "ar.no_edit_permission", lang=lang, action="edit non-default language"))
                     return
             await ctx.send(localization.get("config", "ar.no_permission", lang=lang))
@@ -543,25 +572,25 @@ class AutoresponderCog(commands.Cog):
     @autoresponder.command(name="delete")
     async def ar_delete(self, ctx, name: str):
         """delete an autoresponder"""
-        guild_id = str(ctx.guild.id)
-        lang = cfg.get_user_config(ctx.author.id, "language") or "en"
-        ar_data = get_autoresponder(guild_id, name, 'en')  # Check permissions with 'en' version
+        guild_id = ctx.guild.id
+        lang = await cfg.get_user_config(ctx.author.id, "language") or "en"
+        ar_data = await get_autoresponder(guild_id, name, 'en')  # Check permissions with 'en' version
         if not ar_data:
             await ctx.send(localization.get("config", "ar.not_found", lang=lang, name=name))
             return
         if not await self.check_permissions(ctx.author, guild_id, 'delete', ar_data):
             await ctx.send(localization.get("config", "ar.no_permission", lang=lang))
             return
-        if delete_autoresponder(guild_id, name):
+        if await delete_autoresponder(guild_id, name):
             await ctx.send(localization.get("config", "ar.delete_success", lang=lang, name=name))
         else:
             await ctx.send(localization.get("config", "ar.not_found", lang=lang, name=name))
 
     @autoresponder.command(name="list")
     async def ar_list(self, ctx):
-        guild_id = str(ctx.guild.id)
-        autoresponders = get_all_autoresponders(guild_id)
-        lang = cfg.get_user_config(ctx.author.id, "language") or "en"
+        guild_id = ctx.guild.id
+        autoresponders = await get_all_autoresponders(guild_id)
+        lang = await cfg.get_user_config(ctx.author.id, "language") or "en"
         if not autoresponders:
             await ctx.send(localization.get("config", "ar.no_autoresponders", lang=lang))
             return
@@ -588,7 +617,7 @@ class AutoresponderCog(commands.Cog):
     @ar_edit.error
     @ar_delete.error
     async def ar_error(self, ctx, error):
-        lang = cfg.get_user_config(ctx.author.id, "language") or "en"
+        lang = await cfg.get_user_config(ctx.author.id, "language") or "en"
         if isinstance(error, commands.MissingRequiredArgument):
             await ctx.send(localization.get("config", "ar.argument_missing", lang=lang, arg=error.param.name))
         elif isinstance(error, commands.BadArgument):
@@ -596,7 +625,7 @@ class AutoresponderCog(commands.Cog):
         elif isinstance(error, commands.MissingPermissions):
             await ctx.send(localization.get("config", "ar.no_permission", lang=lang))
         elif isinstance(error, commands.CommandInvokeError):
-            await ctx.send(f"{localization.get("config", "ar.failure", lang=lang)}\nError:\n```python\n{error.original}\n```")
+            await ctx.send(f"{localization.get('config', 'ar.failure', lang=lang)}\nError:\n```python\n{error.original}\n```")
 
 async def setup(bot):
     await bot.add_cog(AutoresponderCog(bot))
\ No newline at end of file
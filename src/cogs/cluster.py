@@ -0,0 +1,22 @@
+from discord.ext import commands
+from src.utils.cluster import ChangeFeed
+from src.utils.config.utils import CLUSTER_ID
+
+
+class Cluster(commands.Cog):
+    """keeps this process's caches coherent with the rest of a cluster started by cluster.py"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.feed = ChangeFeed()
+
+    async def cog_load(self):
+        if CLUSTER_ID is not None:
+            await self.feed.start()
+
+    async def cog_unload(self):
+        await self.feed.stop()
+
+
+async def setup(bot):
+    await bot.add_cog(Cluster(bot))
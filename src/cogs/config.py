@@ -1,6 +1,6 @@
 import discord
 from discord.ext import commands
-from src.utils.config.utils import (
+from src.utils.config.aio import (
     set_guild_config,
     get_guild_config,
     set_user_config,
@@ -98,7 +98,7 @@ class ConfigCog(commands.Cog):
             return
 
         try:
-            set_user_config(ctx.author.id, key.lower(), value.lower())
+            await set_user_config(ctx.author.id, key.lower(), value.lower())
             embed = discord.Embed(
                 title="Configuration Updated",
                 description=f"Your `{key.lower()}` has been set to `{value.lower()}`",
@@ -158,7 +158,7 @@ class ConfigCog(commands.Cog):
                 return
 
         try:
-            set_guild_config(ctx.guild.id, key.lower(), value.lower())
+            await set_guild_config(ctx.guild.id, key.lower(), value.lower())
             embed = discord.Embed(
                 title="Configuration Updated",
                 description=f"`{key.lower()}` has been set to `{value.lower()}` for {ctx.guild.name}",
@@ -177,14 +177,14 @@ class ConfigCog(commands.Cog):
     async def view_config(self, ctx):
         embed = discord.Embed(title="Current Configuration", color=0x9932CC)
 
-        user_language = get_user_config(ctx.author.id, "language") or "en"
+        user_language = await get_user_config(ctx.author.id, "language") or "en"
         embed.add_field(
             name="Your Settings", value=f"Language: `{user_language}`", inline=False
         )
 
         if ctx.guild:
-            server_prefix = get_guild_config(ctx.guild.id, "prefix") or "y;"
-            server_language = get_guild_config(ctx.guild.id, "language") or "en"
+            server_prefix = await get_guild_config(ctx.guild.id, "prefix") or "y;"
+            server_language = await get_guild_config(ctx.guild.id, "language") or "en"
             embed.add_field(
                 name="Server Settings",
                 value=f"Prefix: `{server_prefix}`\nLanguage: `{server_language}`",
@@ -5,8 +5,11 @@ import asyncio
 import datetime
 from src.utils.placeholders import pl
 from src.utils.localization import localization
-from src.utils.config import utils as db
-import src.utils.config.utils as cfg
+from src.utils.config import aio as db
+import src.utils.config.aio as cfg
+from src.utils.logger import get_logger
+
+log = get_logger(__name__)
 
 class ModalBasic(discord.ui.Modal):
     def __init__(self, embed_name, embed_config, message, lang):
@@ -76,7 +79,7 @@ class ModalBasic(discord.ui.Modal):
             await self.message.edit(embed=embed)
             await interaction.response.send_message(localization.get("config", "embed.edit_success", lang=self.lang, name=self.embed_name), ephemeral=True, view=BuilderView(self.embed_name, self.embed_config, self.message, self.lang))
         except Exception as e:
-            print(f"Failed to process basic modal: {e}")
+            log.error("Failed to process basic modal: %s", e)
             await interaction.response.send_message(localization.get("config", "embed.error_save", lang=self.lang), ephemeral=True)
 
     async def build_embed(self, interaction: discord.Interaction):
@@ -191,7 +194,7 @@ class ModalAdvanced(discord.ui.Modal):
             await self.message.edit(embed=embed)
             await interaction.response.send_message(localization.get("config", "embed.edit_success", lang=self.lang, name=self.embed_name), ephemeral=True, view=BuilderView(self.embed_name, self.embed_config, self.message, self.lang))
         except Exception as e:
-            print(f"Failed to process advanced modal: {e}")
+            log.error("Failed to process advanced modal: %s", e)
             await interaction.response.send_message(localization.get("config", "embed.error_save", lang=self.lang), ephemeral=True)
 
 class ModalField(discord.ui.Modal):
@@ -244,7 +247,7 @@ class ModalField(discord.ui.Modal):
             await self.message.edit(embed=embed)
             await interaction.response.send_message(localization.get("config", "embed.edit_success", lang=self.lang, name=self.embed_name), ephemeral=True, view=BuilderView(self.embed_name, self.embed_config, self.message, self.lang))
         except Exception as e:
-            print(f"Failed to process field modal: {e}")
+            log.error("Failed to process field modal: %s", e)
             await interaction.response.send_message(localization.get("config", "embed.error_save", lang=self.lang), ephemeral=True)
 
 class BuilderView(discord.ui.View):
@@ -256,7 +259,7 @@ class BuilderView(discord.ui.View):
         self.lang = lang
 
     async def check_permissions(self, user, guild_id, action, embed_data):
-        server_config = cfg.get_guild_config(guild_id)
+        server_config = await cfg.get_guild_settings(guild_id)
         edit_role = server_config.get('embed_edit_role')
         edit_perm = server_config.get('embed_edit_permission', 'manage_server')
         if edit_role and any(role.id == edit_role for role in user.roles):
@@ -277,24 +280,24 @@ class BuilderView(discord.ui.View):
 
     @discord.ui.button(label="Edit Basic Info", style=discord.ButtonStyle.primary)
     async def basic(self, interaction: discord.Interaction, button: discord.ui.Button):
-        embed_data = db.get_embed(interaction.guild.id, self.embed_name, self.embed_config.get('language', 'en'))
-        if not await self.check_permissions(interaction.user, str(interaction.guild.id), 'edit', embed_data):
+        embed_data = await db.get_embed(interaction.guild.id, self.embed_name, self.embed_config.get('language', 'en'))
+        if not await self.check_permissions(interaction.user, interaction.guild.id, 'edit', embed_data):
             await interaction.response.send_message(localization.get("config", "embed.no_edit_permission", lang=self.lang, action="edit basic info"), ephemeral=True)
             return
         await interaction.response.send_modal(ModalBasic(self.embed_name, self.embed_config, self.message, self.lang))
 
     @discord.ui.button(label="Edit Footer/Images", style=discord.ButtonStyle.primary)
     async def advanced(self, interaction: discord.Interaction, button: discord.ui.Button):
-        embed_data = db.get_embed(interaction.guild.id, self.embed_name, self.embed_config.get('language', 'en'))
-        if not await self.check_permissions(interaction.user, str(interaction.guild.id), 'edit', embed_data):
+        embed_data = await db.get_embed(interaction.guild.id, self.embed_name, self.embed_config.get('language', 'en'))
+        if not await self.check_permissions(interaction.user, interaction.guild.id, 'edit', embed_data):
             await interaction.response.send_message(localization.get("config", "embed.no_edit_permission", lang=self.lang, action="edit footer/images"), ephemeral=True)
             return
         await interaction.response.send_modal(ModalAdvanced(self.embed_name, self.embed_config, self.message, self.lang))
 
     @discord.ui.button(label="Add/Edit Field", style=discord.ButtonStyle.primary)
     async def field(self, interaction: discord.Interaction, button: discord.ui.Button):
-        embed_data = db.get_embed(interaction.guild.id, self.embed_name, self.embed_config.get('language', 'en'))
-        if not await self.check_permissions(interaction.user, str(interaction.guild.id), 'edit', embed_data):
+        embed_data = await db.get_embed(interaction.guild.id, self.embed_name, self.embed_config.get('language', 'en'))
+        if not await self.check_permissions(interaction.user, interaction.guild.id, 'edit', embed_data):
             await interaction.response.send_message(localization.get("config", "embed.no_edit_permission", lang=self.lang, action="edit fields"), ephemeral=True)
             return
         if len(self.embed_config.get("fields", [])) >= 25:
@@ -304,8 +307,8 @@ class BuilderView(discord.ui.View):
 
     @discord.ui.button(label="Edit Editors", style=discord.ButtonStyle.primary)
     async def edit_editors(self, interaction: discord.Interaction, button: discord.ui.Button):
-        embed_data = db.get_embed(interaction.guild.id, self.embed_name, self.embed_config.get('language', 'en'))
-        if not await self.check_permissions(interaction.user, str(interaction.guild.id), 'add_editors', embed_data):
+        embed_data = await db.get_embed(interaction.guild.id, self.embed_name, self.embed_config.get('language', 'en'))
+        if not await self.check_permissions(interaction.user, interaction.guild.id, 'add_editors', embed_data):
             await interaction.response.send_message(localization.get("config", "embed.no_edit_permission", lang=self.lang, action="edit editors"), ephemeral=True)
             return
         editors = embed_data.get('editors', '') or 'None'
@@ -328,7 +331,7 @@ class BuilderView(discord.ui.View):
                 else:
                     await interaction.followup.send(localization.get("config", "embed.invalid_editors", lang=self.lang), ephemeral=True)
                     return
-            db.update_embed(interaction.guild.id, self.embed_name, embed_data['language'], editors=','.join(editors))
+            await db.update_embed(interaction.guild.id, self.embed_name, embed_data['language'], editors=','.join(editors))
             embed_data['editors'] = ','.join(editors)
             await interaction.followup.send(localization.get("config", "embed.edit_success", lang=self.lang, name=self.embed_name), ephemeral=True)
             await interaction.message.edit(embed=await self.create_edit_embed(interaction.user, embed_data))
@@ -337,8 +340,8 @@ class BuilderView(discord.ui.View):
 
     @discord.ui.button(label="Edit Permissions", style=discord.ButtonStyle.primary)
     async def edit_permissions(self, interaction: discord.Interaction, button: discord.ui.Button):
-        embed_data = db.get_embed(interaction.guild.id, self.embed_name, self.embed_config.get('language', 'en'))
-        if not await self.check_permissions(interaction.user, str(interaction.guild.id), 'add_editors', embed_data):
+        embed_data = await db.get_embed(interaction.guild.id, self.embed_name, self.embed_config.get('language', 'en'))
+        if not await self.check_permissions(interaction.user, interaction.guild.id, 'add_editors', embed_data):
             await interaction.response.send_message(localization.get("config", "embed.no_edit_permission", lang=self.lang, action="edit permissions"), ephemeral=True)
             return
         permissions = embed_data.get('edit_permissions', '') or 'None'
@@ -356,7 +359,7 @@ class BuilderView(discord.ui.View):
             if not new_perms.issubset(valid_perms):
                 await interaction.followup.send(localization.get("config", "embed.invalid_permissions", lang=self.lang), ephemeral=True)
                 return
-            db.update_embed(interaction.guild.id, self.embed_name, embed_data['language'], edit_permissions=','.join(new_perms))
+            await db.update_embed(interaction.guild.id, self.embed_name, embed_data['language'], edit_permissions=','.join(new_perms))
             embed_data['edit_permissions'] = ','.join(new_perms)
             await interaction.followup.send(localization.get("config", "embed.edit_success", lang=self.lang, name=self.embed_name), ephemeral=True)
             await interaction.message.edit(embed=await self.create_edit_embed(interaction.user, embed_data))
@@ -365,8 +368,8 @@ class BuilderView(discord.ui.View):
 
     @discord.ui.button(label="Finish", style=discord.ButtonStyle.green)
     async def finish(self, interaction: discord.Interaction, button: discord.ui.Button):
-        embed_data = db.get_embed(interaction.guild.id, self.embed_name, self.embed_config.get('language', 'en'))
-        if not await self.check_permissions(interaction.user, str(interaction.guild.id), 'edit', embed_data):
+        embed_data = await db.get_embed(interaction.guild.id, self.embed_name, self.embed_config.get('language', 'en'))
+        if not await self.check_permissions(interaction.user, interaction.guild.id, 'edit', embed_data):
             await interaction.response.send_message(localization.get("config", "embed.no_edit_permission", lang=self.lang, action="save embed"), ephemeral=True)
             return
         try:
@@ -376,17 +379,17 @@ class BuilderView(discord.ui.View):
             contributors = embed_data.get('contributors', '').split(',') if embed_data.get('contributors') else []
             if str(interaction.user.id) not in contributors:
                 contributors.append(str(interaction.user.id))
-                db.update_embed(interaction.guild.id, self.embed_name, embed_data['language'], contributors=','.join(filter(None, contributors)))
-            db.update_embed(interaction.guild.id, self.embed_name, embed_data['language'], embed_config=self.embed_config)
+                await db.update_embed(interaction.guild.id, self.embed_name, embed_data['language'], contributors=','.join(filter(None, contributors)))
+            await db.update_embed(interaction.guild.id, self.embed_name, embed_data['language'], embed_config=self.embed_config)
             embed = await ModalBasic(self.embed_name, self.embed_config, self.message, self.lang).build_embed(interaction)
             await self.message.edit(embed=embed, view=None)
             await interaction.response.send_message(localization.get("config", "embed.create_success", lang=self.lang, name=self.embed_name), ephemeral=True)
         except Exception as e:
-            print(f"Failed to save embed: {e}")
+            log.error("Failed to save embed: %s", e)
             await interaction.response.send_message(localization.get("config", "embed.error_save", lang=self.lang), ephemeral=True)
 
     async def create_edit_embed(self, user, embed_data):
-        lang = cfg.get_user_config(user.id, "language") or "en"
+        lang = await cfg.get_user_config(user.id, "language") or "en"
         embed_config = embed_data['embed']
         embed = discord.Embed(
             title=localization.get("config", "embed.info", lang=lang, name=embed_data['name']),
@@ -452,7 +455,7 @@ class EmbedCog(commands.Cog):
         self.valid_permissions = {'edit', 'delete', 'add_language', 'edit_non_default', 'add_editors'}
 
     async def check_permissions(self, user, guild_id, action, embed_data=None):
-        server_config = cfg.get_guild_config(guild_id)
+        server_config = await cfg.get_guild_settings(guild_id)
         edit_role = server_config.get('embed_edit_role')
         edit_perm = server_config.get('embed_edit_permission', 'manage_server')
         if edit_role and any(role.id == edit_role for role in user.roles):
@@ -474,8 +477,8 @@ class EmbedCog(commands.Cog):
 
     @commands.group(name="embed", invoke_without_command=True)
     async def embed_group(self, ctx: commands.Context):
-        lang = cfg.get_user_config(ctx.author.id, "language") or "en"
-        pfx = cfg.get_guild_config(ctx.guild.id, "prefix") or "y;"
+        lang = await cfg.get_user_config(ctx.author.id, "language") or "en"
+        pfx = await cfg.get_guild_config(ctx.guild.id, "prefix") or "y;"
         embed = discord.Embed(
             title=localization.get("config", "embed.title", lang=lang),
             description=localization.get("config", "embed.description", lang=lang),
@@ -510,16 +513,16 @@ class EmbedCog(commands.Cog):
 
     @embed_group.command(name="create")
     async def create(self, ctx: commands.Context, name: str):
-        guild_id = str(ctx.guild.id)
-        lang = cfg.get_user_config(ctx.author.id, "language") or "en"
-        server_config = cfg.get_guild_config(guild_id)
+        guild_id = ctx.guild.id
+        lang = await cfg.get_user_config(ctx.author.id, "language") or "en"
+        server_config = await cfg.get_guild_settings(guild_id)
         if not await self.check_permissions(ctx.author, guild_id, 'edit'):
             await ctx.send(localization.get("config", "embed.no_permission", lang=lang), ephemeral=True)
             return
         if not name.isalnum():
             await ctx.send(localization.get("config", "embed.invalid_name", lang=lang), ephemeral=True)
             return
-        if db.get_embed(ctx.guild.id, name, 'en'):
+        if await db.get_embed(ctx.guild.id, name, 'en'):
             await ctx.send(localization.get("config", "embed.already_exists", lang=lang, name=name), ephemeral=True)
             return
         await ctx.send(localization.get("config", "embed.create_prompt_language", lang=lang, name=name), ephemeral=True)
@@ -535,17 +538,17 @@ class EmbedCog(commands.Cog):
             color=discord.Color.blue()
         )
         message = await ctx.send(embed=embed, ephemeral=True)
-        db.create_embed(ctx.guild.id, name, embed_config, language, ctx.author.id, editor_role=ctx.guild.default_role.id)
+        await db.create_embed(ctx.guild.id, name, embed_config, language, ctx.author.id, editor_role=ctx.guild.default_role.id)
         view = BuilderView(name, embed_config, message, lang)
-        await message.edit(embed=await view.create_edit_embed(ctx.author, db.get_embed(ctx.guild.id, name, language)), view=view)
+        await message.edit(embed=await view.create_edit_embed(ctx.author, await db.get_embed(ctx.guild.id, name, language)), view=view)
 
     @embed_group.command(name="edit")
     async def edit(self, ctx: commands.Context, name: str):
-        guild_id = str(ctx.guild.id)
-        lang = cfg.get_user_config(ctx.author.id, "language") or "en"
-        server_config = cfg.get_guild_config(guild_id)
+        guild_id = ctx.guild.id
+        lang = await cfg.get_user_config(ctx.author.id, "language") or "en"
+        server_config = await cfg.get_guild_settings(guild_id)
         language = server_config.get('language', 'en')
-        embed_data = db.get_embed(guild_id, name, language) or db.get_embed(guild_id, name, 'en')
+        embed_data = await db.get_embed(guild_id, name, language) or await db.get_embed(guild_id, name, 'en')
         if not embed_data:
             await ctx.send(localization.get("config", "embed.not_found", lang=lang, name=name), ephemeral=True)
             return
@@ -563,25 +566,25 @@ class EmbedCog(commands.Cog):
 
     @embed_group.command(name="delete")
     async def delete(self, ctx: commands.Context, name: str):
-        guild_id = str(ctx.guild.id)
-        lang = cfg.get_user_config(ctx.author.id, "language") or "en"
-        embed_data = db.get_embed(guild_id, name, 'en')
+        guild_id = ctx.guild.id
+        lang = await cfg.get_user_config(ctx.author.id, "language") or "en"
+        embed_data = await db.get_embed(guild_id, name, 'en')
         if not embed_data:
             await ctx.send(localization.get("config", "embed.not_found", lang=lang, name=name), ephemeral=True)
             return
         if not await self.check_permissions(ctx.author, guild_id, 'delete', embed_data):
             await ctx.send(localization.get("config", "embed.no_permission", lang=lang), ephemeral=True)
             return
-        if db.delete_embed(guild_id, name):
+        if await db.delete_embed(guild_id, name):
             await ctx.send(localization.get("config", "embed.delete_success", lang=lang, name=name), ephemeral=True)
         else:
             await ctx.send(localization.get("config", "embed.not_found", lang=lang, name=name), ephemeral=True)
 
     @embed_group.command(name="list")
     async def list(self, ctx: commands.Context):
-        guild_id = str(ctx.guild.id)
-        lang = cfg.get_user_config(ctx.author.id, "language") or "en"
-        embeds = db.get_all_embeds(guild_id)
+        guild_id = ctx.guild.id
+        lang = await cfg.get_user_config(ctx.author.id, "language") or "en"
+        embeds = await db.get_all_embeds(guild_id)
         if not embeds:
             await ctx.send(localization.get("config", "embed.no_embeds", lang=lang), ephemeral=True)
             return
@@ -606,10 +609,10 @@ class EmbedCog(commands.Cog):
 
     @embed_group.command(name="preview")
     async def preview(self, ctx: commands.Context, name: str):
-        guild_id = str(ctx.guild.id)
-        lang = cfg.get_user_config(ctx.author.id, "language") or "en"
-        server_config = cfg.get_guild_config(guild_id)
-        embed_data = db.get_embed(guild_id, name, lang) or db.get_embed(guild_id, name, server_config.get('language', 'en')) or db.get_embed(guild_id, name, 'en')
+        guild_id = ctx.guild.id
+        lang = await cfg.get_user_config(ctx.author.id, "language") or "en"
+        server_config = await cfg.get_guild_settings(guild_id)
+        embed_data = await db.get_embed(guild_id, name, lang) or await db.get_embed(guild_id, name, server_config.get('language', 'en')) or await db.get_embed(guild_id, name, 'en')
         if not embed_data:
             await ctx.send(localization.get("config", "embed.not_found", lang=lang, name=name), ephemeral=True)
             return
@@ -642,7 +645,7 @@ class EmbedCog(commands.Cog):
     @list.error
     @preview.error
     async def embed_error(self, ctx, error):
-        lang = cfg.get_user_config(ctx.author.id, "language") or "en"
+        lang = await cfg.get_user_config(ctx.author.id, "language") or "en"
         if isinstance(error, commands.MissingRequiredArgument):
             await ctx.send(localization.get("config", "embed.argument_missing", lang=lang, arg=error.param.name), ephemeral=True)
         elif isinstance(error, commands.BadArgument):
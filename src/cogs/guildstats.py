@@ -0,0 +1,45 @@
+from discord.ext import commands
+from src.utils.guildstats import guild_stats
+
+
+class GuildStatsCog(commands.Cog):
+    """keeps the member and role counters used by placeholders up to date"""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.Cog.listener()
+    async def on_shard_ready(self, shard_id):
+        # a new session resends every guild, recount only this shard's
+        guild_stats.forget_shard(shard_id)
+        for guild in self.bot.guilds:
+            if guild.shard_id == shard_id:
+                guild_stats.seed(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        guild_stats.seed(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        guild_stats.forget(guild.id)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        guild_stats.member_joined(member)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        guild_stats.member_left(member)
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        guild_stats.role_created(role)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        guild_stats.role_deleted(role)
+
+
+async def setup(bot):
+    await bot.add_cog(GuildStatsCog(bot))
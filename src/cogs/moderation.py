@@ -1,19 +1,141 @@
+import asyncio
+import re
+import time
 import discord
 from discord.ext import commands
 from datetime import timedelta
 from src.utils.localization import localization
-import src.utils.config.utils as db
+import src.utils.config.aio as db
+from src.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+# most users one mass command may target
+MASS_LIMIT = 1000
+# requests in flight at once. discord.py already waits out each route's rate
+# limit bucket, this only keeps a large batch from queueing on it all at once
+MASS_CONCURRENCY = 5
+# guild.bulk_ban takes at most this many users per request
+BULK_BAN_SIZE = 200
+# seconds between edits of the progress message
+PROGRESS_INTERVAL = 2
+TARGET = re.compile(r"<@!?(\d{15,20})>|(\d{15,20})")
+JOINED = re.compile(r"joined:(\S+)")
+DURATION_UNITS = {"m": "minutes", "h": "hours", "d": "days"}
+
+
+def parse_duration(text):
+    """'30m', '1h' or '2d' as a timedelta, ValueError for anything else, zero and negative included"""
+    unit = DURATION_UNITS.get(text[-1:])
+    if unit is None:
+        raise ValueError(text)
+    amount = int(text[:-1])
+    if amount <= 0:
+        raise ValueError(text)
+    return timedelta(**{unit: amount})
+
+
+def parse_targets(guild, words):
+    """split mass command arguments into (user ids, reason).
+
+    targets are ids, mentions and joined:<duration>, which matches everyone
+    who joined in that window. the first other word starts the reason.
+    """
+    ids = {}
+    for index, word in enumerate(words):
+        target = TARGET.fullmatch(word)
+        joined = JOINED.fullmatch(word)
+        if target:
+            ids[int(target.group(1) or target.group(2))] = None
+        elif joined:
+            since = discord.utils.utcnow() - parse_duration(joined.group(1))
+            for member in guild.members:
+                if member.joined_at and member.joined_at >= since:
+                    ids[member.id] = None
+        else:
+            return list(ids), " ".join(words[index:])
+    return list(ids), None
+
+
+def mass_text(lang, key, default):
+    """a mass action string in lang, or in english where lang lacks it"""
+    return localization.get("moderation", f"mass.{key}", lang) or default
+
+
+def can_target(ctx, user_id):
+    """whether the author may act on a user, members above them or the bot are left alone"""
+    guild = ctx.guild
+    if user_id in (ctx.author.id, guild.owner_id, ctx.me.id):
+        return False
+    member = guild.get_member(user_id)
+    if member is None:
+        return True
+    if ctx.author.id != guild.owner_id and member.top_role >= ctx.author.top_role:
+        return False
+    return member.top_role < ctx.me.top_role
+
+
+class MassProgress:
+    """tallies a mass action and edits one status message, at most every PROGRESS_INTERVAL"""
+
+    def __init__(self, message, template, action, total):
+        self.message = message
+        self.template = template
+        self.action = action
+        self.total = total
+        self.done = []
+        self.failed = 0
+        self._edited = time.monotonic()
+
+    def render(self, template=None, **extra):
+        return (template or self.template).format(
+            action=self.action, done=len(self.done), total=self.total, failed=self.failed, **extra
+        )
+
+    async def update(self, done=(), failed=0):
+        self.done.extend(done)
+        self.failed += failed
+        now = time.monotonic()
+        if now - self._edited < PROGRESS_INTERVAL:
+            return
+        self._edited = now
+        try:
+            await self.message.edit(content=self.render())
+        except discord.HTTPException:
+            pass
+
+
+async def run_concurrently(user_ids, action, progress):
+    """await action(user_id) for every user, MASS_CONCURRENCY at a time"""
+    limit = asyncio.Semaphore(MASS_CONCURRENCY)
+
+    async def run(user_id):
+        async with limit:
+            try:
+                await action(user_id)
+            except discord.HTTPException as e:
+                log.warning("%s failed for user %s: %s", progress.action, user_id, e)
+                ok = False
+            else:
+                ok = True
+        await progress.update(done=(user_id,) if ok else (), failed=0 if ok else 1)
+
+    await asyncio.gather(*(run(user_id) for user_id in user_ids))
 
 
 class Moderation(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
+    async def cog_unload(self):
+        await db.infraction_writes.drain()
+        await db.note_writes.drain()
+
     @commands.command(name="warn")
     @commands.has_permissions(manage_messages=True)
     async def warn(self, ctx, member: discord.Member, *, reason=None):
         """issues a warning"""
-        lang = db.get_language(ctx.author.id, ctx.guild.id)
+        lang = await db.get_language(ctx.author.id, ctx.guild.id)
         messages = localization.languages.get(lang, {}).get("moderation", {})
         warn = messages.get("warn")
 
@@ -25,7 +147,7 @@ class Moderation(commands.Cog):
             ctx.send(warn.get("no_user", "[lang error] No user specified."))
             return
         try:
-            db.add_infraction(
+            await db.add_infraction(
                 ctx.guild.id, member.id, "warn", reason, None, ctx.author.id
             )
             await member.send(
@@ -59,7 +181,7 @@ class Moderation(commands.Cog):
         note=None,
     ):
         """adds a note to a user"""
-        lang = db.get_language(ctx.author.id, ctx.guild.id)
+        lang = await db.get_language(ctx.author.id, ctx.guild.id)
         messages = localization.languages.get(lang, {}).get("moderation", {})
         notem = messages.get("note", {})
 
@@ -85,7 +207,7 @@ class Moderation(commands.Cog):
             await ctx.send("global notes arent implemented yet.")
             # config.add_note(member.id, note, ctx.author.id)
         else:
-            db.add_infraction(
+            await db.add_infraction(
                 ctx.guild.id, member.id, "note", note, None, ctx.author.id
             )
 
@@ -101,7 +223,7 @@ class Moderation(commands.Cog):
         self, ctx, member: discord.Member, duration: str = None, *, reason=None
     ):
         """bans a user"""
-        lang = db.get_language(ctx.author.id, ctx.guild.id)
+        lang = await db.get_language(ctx.author.id, ctx.guild.id)
         messages = localization.languages.get(lang, {}).get("moderation", {})
         ban_msg = messages.get("ban", {})
 
@@ -151,7 +273,7 @@ class Moderation(commands.Cog):
                 )
                 return
             await member.ban(reason=reason)
-            db.add_infraction(
+            await db.add_infraction(
                 ctx.guild.id, member.id, "ban", reason, delta, ctx.author.id
             )
             await ctx.send(
@@ -177,13 +299,13 @@ class Moderation(commands.Cog):
                     "failure", "[lang error] Failed to ban user {user}."
                 ).format(user=member.mention)
             )
-            print(f"Error banning user: {e}")
+            log.error("Error banning user: %s", e)
 
     @commands.command(name="kick")
     @commands.has_permissions(kick_members=True)
     async def kick(self, ctx, member: discord.Member, *, reason=None):
         """kicks a user"""
-        lang = db.get_language(ctx.author.id, ctx.guild.id)
+        lang = await db.get_language(ctx.author.id, ctx.guild.id)
         messages = localization.languages.get(lang, {}).get("moderation", {})
         kick_msg = messages.get("kick", {})
 
@@ -206,7 +328,7 @@ class Moderation(commands.Cog):
                     ).format(user=member.mention)
                 )
             await member.kick(reason=reason)
-            db.add_infraction(
+            await db.add_infraction(
                 ctx.guild.id, member.id, "kick", reason, None, ctx.author.id
             )
             await ctx.send(
@@ -227,13 +349,13 @@ class Moderation(commands.Cog):
                     "failure", "[lang error] Failed to kick user {user}."
                 ).format(user=member.mention)
             )
-            print(f"Error kicking user: {e}")
+            log.error("Error kicking user: %s", e)
 
     @commands.command(name="unban")
     @commands.has_permissions(ban_members=True)
     async def unban(self, ctx, user_id: int, *, reason=None):
         """unbans a user"""
-        lang = db.get_language(ctx.author.id, ctx.guild.id)
+        lang = await db.get_language(ctx.author.id, ctx.guild.id)
         messages = localization.languages.get(lang, {}).get("moderation", {})
         unban_msg = messages.get("unban", {})
 
@@ -250,7 +372,7 @@ class Moderation(commands.Cog):
                 return
 
             await ctx.guild.unban(user, reason=reason)
-            db.add_infraction(
+            await db.add_infraction(
                 ctx.guild.id, user.id, "unban", reason, None, ctx.author.id
             )
             await ctx.send(
@@ -273,7 +395,7 @@ class Moderation(commands.Cog):
                     "failure", "[lang error] Failed to unban user {user}."
                 ).format(user=user.mention)
             )
-            print(f"Error unbanning user: {e}")
+            log.error("Error unbanning user: %s", e)
 
     @commands.command(name="info")
     async def info(self, ctx, member: discord.Member = None):
@@ -300,7 +422,7 @@ class Moderation(commands.Cog):
             inline=False,
         )
 
-        infractions = db.get_infractions(ctx.guild.id, member.id)
+        infractions = await db.get_infractions(ctx.guild.id, member.id)
 
         if infractions:
             infraction_list = "\n".join(
@@ -312,7 +434,7 @@ class Moderation(commands.Cog):
                 name="Infractions", value="No infractions found.", inline=False
             )
 
-        notes = db.get_notes(member.id)
+        notes = await db.get_notes(member.id)
         if notes:
             note_list = "\n".join(
                 [f"{note[0]} (by <@{note[1]}> on {note[2]})" for note in notes]
@@ -327,7 +449,7 @@ class Moderation(commands.Cog):
     @commands.has_permissions(moderate_members=True)
     async def timeout(self, ctx, member: discord.Member, duration: str, *, reason=None):
         """times out a user"""
-        lang = db.get_language(ctx.author.id, ctx.guild.id)
+        lang = await db.get_language(ctx.author.id, ctx.guild.id)
         messages = localization.languages.get(lang, {}).get("moderation", {})
         timeout_msg = messages.get("timeout", {})
 
@@ -396,7 +518,129 @@ class Moderation(commands.Cog):
                     "failure", "[lang error] Failed to timeout user {user}."
                 ).format(user=member.mention)
             )
-            print(f"Error timing out user: {e}")
+            log.error("Error timing out user: %s", e)
+
+    async def _mass(self, ctx, kind, args, action, duration=None):
+        lang = await db.get_language(ctx.author.id, ctx.guild.id)
+
+        try:
+            user_ids, reason = parse_targets(ctx.guild, args.split())
+        except ValueError:
+            await ctx.send(
+                mass_text(
+                    lang,
+                    "invalid_duration",
+                    "[lang error] Invalid duration format. Use '1h', '1d', or '1m'.",
+                )
+            )
+            return
+        if not reason:
+            reason = mass_text(lang, "no_reason", "[lang error] No reason provided.")
+
+        user_ids = [user_id for user_id in user_ids if can_target(ctx, user_id)]
+        if not user_ids:
+            await ctx.send(mass_text(lang, "no_targets", "[lang error] No users to act on."))
+            return
+        if len(user_ids) > MASS_LIMIT:
+            await ctx.send(
+                mass_text(
+                    lang, "too_many", "[lang error] Too many users, the limit is {limit}."
+                ).format(limit=MASS_LIMIT, count=len(user_ids))
+            )
+            return
+
+        template = mass_text(
+            lang, "progress", "[lang error] {action}: {done}/{total} done, {failed} failed..."
+        )
+        status = await ctx.send(
+            template.format(action=mass_text(lang, kind, kind), done=0, total=len(user_ids), failed=0)
+        )
+        progress = MassProgress(status, template, mass_text(lang, kind, kind), len(user_ids))
+        await action(ctx.guild, user_ids, reason, progress)
+
+        # one batch for the whole action instead of a write per user
+        await db.add_infractions(
+            ctx.guild.id, progress.done, kind, reason, duration, ctx.author.id
+        )
+        summary = progress.render(
+            mass_text(
+                lang,
+                "done",
+                "[lang error] {action}: {done}/{total} done, {failed} failed. Reason: {reason}",
+            ),
+            reason=reason,
+        )
+        try:
+            await status.edit(content=summary)
+        except discord.HTTPException:
+            await ctx.send(summary)
+
+    @commands.command(name="massban")
+    @commands.has_permissions(ban_members=True)
+    async def massban(self, ctx, *, args=""):
+        """bans many users at once"""
+
+        async def ban(guild, user_ids, reason, progress):
+            for start in range(0, len(user_ids), BULK_BAN_SIZE):
+                chunk = user_ids[start : start + BULK_BAN_SIZE]
+                try:
+                    result = await guild.bulk_ban(
+                        [discord.Object(user_id) for user_id in chunk], reason=reason
+                    )
+                except discord.HTTPException as e:
+                    # bulk bans also need manage server, fall back to one request per user
+                    log.info("Bulk ban failed, banning one by one: %s", e)
+                    await run_concurrently(
+                        chunk,
+                        lambda user_id: guild.ban(discord.Object(user_id), reason=reason),
+                        progress,
+                    )
+                    continue
+                await progress.update(
+                    done=[user.id for user in result.banned], failed=len(result.failed)
+                )
+
+        await self._mass(ctx, "ban", args, ban)
+
+    @commands.command(name="masskick")
+    @commands.has_permissions(kick_members=True)
+    async def masskick(self, ctx, *, args=""):
+        """kicks many users at once"""
+
+        async def kick(guild, user_ids, reason, progress):
+            await run_concurrently(
+                user_ids,
+                lambda user_id: guild.kick(discord.Object(user_id), reason=reason),
+                progress,
+            )
+
+        await self._mass(ctx, "kick", args, kick)
+
+    @commands.command(name="masstimeout")
+    @commands.has_permissions(moderate_members=True)
+    async def masstimeout(self, ctx, duration: str, *, args=""):
+        """times out many users at once"""
+        try:
+            delta = parse_duration(duration)
+        except ValueError:
+            lang = await db.get_language(ctx.author.id, ctx.guild.id)
+            await ctx.send(
+                mass_text(
+                    lang,
+                    "invalid_duration",
+                    "[lang error] Invalid duration format. Use '1h', '1d', or '1m'.",
+                )
+            )
+            return
+
+        async def timeout(guild, user_ids, reason, progress):
+            async def one(user_id):
+                member = guild.get_member(user_id) or await guild.fetch_member(user_id)
+                await member.timeout(delta, reason=reason)
+
+            await run_concurrently(user_ids, one, progress)
+
+        await self._mass(ctx, "timeout", args, timeout, delta)
 
 
 async def setup(bot):
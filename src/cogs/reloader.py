@@ -0,0 +1,50 @@
+import os
+from discord.ext import commands
+import src.utils.config.aio as db
+from src.utils.reloader import FileWatcher, reload_all
+from src.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+# seconds between checks for changed locale and key files, 0 turns the watcher off
+RELOAD_INTERVAL = float(os.getenv("RELOAD_INTERVAL", "0"))
+
+
+def describe(changes):
+    parts = []
+    if changes["locales"]:
+        parts.append(f"locales: {', '.join(changes['locales'])}")
+    if changes["keys"]:
+        parts.append("config keys")
+    return "; ".join(parts) or "nothing changed"
+
+
+class Reloader(commands.Cog):
+    """reloads locales and config keys without restarting the bot"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.watcher = FileWatcher(RELOAD_INTERVAL, on_reload=lambda changes: log.info("Reloaded %s", describe(changes)))
+
+    async def cog_load(self):
+        self.watcher.start()
+
+    async def cog_unload(self):
+        await self.watcher.stop()
+
+    @commands.command(name="reload")
+    @commands.is_owner()
+    async def reload(self, ctx):
+        """reload changed locale files and config keys"""
+        try:
+            changes = reload_all()
+        except Exception as e:
+            await ctx.send(f"reload failed: {e}")
+            return
+        # the other processes of a cluster reload too
+        await db.log_change("reload")
+        await ctx.send(f"reloaded {describe(changes)}")
+
+
+async def setup(bot):
+    await bot.add_cog(Reloader(bot))
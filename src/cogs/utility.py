@@ -1,25 +1,44 @@
+import math
+import time
 import discord
 from discord.ext import commands
 from src.utils.localization import localization
-import src.utils.config.utils as db
+import src.utils.config.aio as db
+from src.utils.config.cache import cache_stats
+from src.utils.metrics import metrics, MetricsExporter, ShardMonitor
+from src.utils.config.cache import ar_index
+from src.utils.guildstats import guild_stats
+from src.utils.logger import get_logger
+
+log = get_logger(__name__)
 
 
 class Utility(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.exporter = MetricsExporter()
+        self.shards = ShardMonitor(bot)
+
+    async def cog_load(self):
+        await self.exporter.start()
+        await self.shards.start()
+
+    async def cog_unload(self):
+        await self.shards.stop()
+        await self.exporter.stop()
 
     @commands.command(name="help")
     async def help(self, ctx, *args):
         """display help information for commands"""
-        lang = db.get_user_config(ctx.author.id, "language") or "en"
-        message_type = db.get_user_config(ctx.author.id, "message_type") or "embed"
-        print(f"Getting help for: {lang}")
+        lang = await db.get_user_config(ctx.author.id, "language") or "en"
+        message_type = await db.get_user_config(ctx.author.id, "message_type") or "embed"
+        log.debug("Getting help for: %s", lang)
 
         if args and args[-1] in localization.languages:
             lang = args[-1]
             args = args[:-1]
         if ctx.guild:
-            prefix = db.get_guild_config(ctx.guild.id, "prefix") or "y;"
+            prefix = await db.get_guild_config(ctx.guild.id, "prefix") or "y;"
         else:
             prefix = "y;"
 
@@ -75,11 +94,9 @@ class Utility(commands.Cog):
                 embed.add_field(
                     name=f"{prefix}{name} {cmd_args}", value=cmd_desc, inline=False
                 )
-                print(
-                    f"Added help field for {name} with args: {cmd_args} and desc: {cmd_desc}"
-                )
+                log.debug("Added help field for %s with args: %s and desc: %s", name, cmd_args, cmd_desc)
 
-            print(f"Debug information: {lang}\n{help_data}\n{help_data.items()}")
+            log.debug("Help for %s: %s", lang, help_data)
             await ctx.send(embed=embed)
         else:
             title = help_data.get("help", {}).get("title", "Help")
@@ -96,18 +113,16 @@ class Utility(commands.Cog):
                 cmd_args = " ".join(data.get("args", []))
                 cmd_desc = data.get("description", "")
                 text_output += f"**{prefix}{name} {cmd_args}**\n{cmd_desc}\n\n"
-                print(
-                    f"Added help field for {name} with args: {cmd_args} and desc: {cmd_desc}"
-                )
+                log.debug("Added help field for %s with args: %s and desc: %s", name, cmd_args, cmd_desc)
 
-            print(f"Debug information: {help_data.items()}")
+            log.debug("Help for %s: %s", lang, help_data)
             await ctx.send(text_output.rstrip())
 
     @commands.command(name="ping")
     async def ping(self, ctx, arg=None):
         """check the bots response time"""
         langs = ", ".join(localization.languages.keys())
-        lang = db.get_user_config(ctx.author.id, "language")
+        lang = await db.get_user_config(ctx.author.id, "language")
         channel = ctx.channel
         if arg:
             if arg in langs:
@@ -115,7 +130,70 @@ class Utility(commands.Cog):
             elif ctx.message.channel_mentions:
                 channel = ctx.message.channel_mentions[0]
         response = localization.get("utility", "ping.pong", lang)
-        await channel.send(response)
+        shards = self.shards.report()
+        current = ctx.guild.shard_id if ctx.guild else 0
+        lines = [
+            localization.get(
+                "utility", "ping.shard", lang,
+                shard=shard_id, current=" *" if shard_id == current else "",
+                latency=_ms(latency), rate=_rate(rate), guilds=guilds,
+            )
+            for shard_id, latency, rate, guilds in shards
+            # one line per shard would not fit, show this shard and the totals
+            if len(shards) <= 10 or shard_id == current
+        ]
+        if len(shards) > 10:
+            latencies = [latency for _, latency, _, _ in shards if math.isfinite(latency)]
+            lines.append(localization.get(
+                "utility", "ping.total", lang,
+                shards=len(shards),
+                latency=_ms(sum(latencies) / len(latencies) if latencies else math.nan),
+                rate=_rate(sum(rate or 0 for _, _, rate, _ in shards)),
+                guilds=sum(guilds for _, _, _, guilds in shards),
+            ))
+        await channel.send("\n".join([response, *lines]))
+
+    @commands.command(name="stats")
+    @commands.is_owner()
+    async def stats(self, ctx):
+        """show hot path timings, database and cache counters"""
+        counters, timers = metrics.snapshot()
+        lines = [f"uptime: {time.time() - metrics.started:.0f}s"]
+        for (name, labels), timer in sorted(timers.items()):
+            if name == "db_call":
+                continue
+            label = ",".join(str(v) for _, v in labels)
+            lines.append(
+                f"{name}{f'[{label}]' if label else ''}: n={timer.count} avg={timer.avg * 1e3:.2f}ms "
+                f"p99<={timer.quantile(0.99) * 1e3:.1f}ms max={timer.max * 1e3:.1f}ms"
+            )
+        lines.append(f"autoresponder matches: {counters.get(('autoresponder_matches', ()), 0)}")
+
+        db_calls = sorted(
+            ((dict(labels)["helper"], timer) for (name, labels), timer in timers.items() if name == "db_call"),
+            key=lambda item: item[1].total, reverse=True,
+        )
+        queries = {dict(labels)["helper"]: value for (name, labels), value in counters.items() if name == "db_queries"}
+        lines.append(f"db: {sum(t.count for _, t in db_calls)} calls, {sum(queries.values())} statements")
+        for helper, timer in db_calls[:5]:
+            lines.append(f"  {helper}: n={timer.count} avg={timer.avg * 1e3:.2f}ms queries={queries.get(helper, 0)}")
+        for name, cache in sorted(cache_stats.items()):
+            lines.append(f"cache {name}: {cache.hits} hits, {cache.misses} misses ({cache.hit_rate:.1%}), {cache.evictions} evicted")
+        for name, values in sorted(metrics.read_gauges().items()):
+            lines.append(f"{name}: " + ", ".join(f"{field}={value}" for field, value in values.items()))
+        for name, sizes in (("guild stats", guild_stats.sizes()), ("autoresponders", ar_index.sizes())):
+            lines.append(f"{name} by shard: " + ", ".join(f"{shard}={size}" for shard, size in sorted(sizes.items())))
+
+        text = "\n".join(lines)
+        await ctx.send(f"```\n{text[:1990]}\n```")
+
+
+def _ms(seconds):
+    return f"{seconds * 1000:.0f}" if math.isfinite(seconds) else "?"
+
+
+def _rate(rate):
+    return "?" if rate is None else f"{rate:.1f}"
 
 
 async def setup(bot):
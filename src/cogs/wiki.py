@@ -1,8 +1,13 @@
+import asyncio
 import discord
 from discord.ext import commands
-import wikipediaapi
-from src.utils.config import utils as db
+from src.utils.config import aio as db
 from src.utils.localization import localization
+from src.utils.logger import get_logger
+from src.utils.wiki import wiki_cache
+from src.utils.wikiindex import wiki_index
+
+log = get_logger(__name__)
 
 TOPICS = [
     "lgbtq",
@@ -21,6 +26,12 @@ class Wiki(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
+    async def cog_load(self):
+        await wiki_cache.start()
+
+    async def cog_unload(self):
+        await db.wiki_writes.drain()
+
     @commands.Cog.listener()
     async def on_reaction_add(self, reaction, user):
         if user.bot:
@@ -33,28 +44,39 @@ class Wiki(commands.Cog):
     @commands.has_permissions(embed_links=True)
     async def wiki(self, ctx, *, query):
         user_id = ctx.author.id
-        lang = db.get_user_config(user_id, "language") or "en"
-        msg_type = db.get_user_config(user_id, "message_type") or "embed"
+        lang = await db.get_user_config(user_id, "language") or "en"
+        msg_type = await db.get_user_config(user_id, "message_type") or "embed"
         msg = localization.languages.get(lang, {}).get("wiki", {})
 
-        wiki = wikipediaapi.Wikipedia(
-            user_agent="berrylyn/0.1 (wiki/mod bot for queer-focused discord servers by @vanillyn, https://github.com/vanillyn/vanillabot.py)",
-            language=lang,
-            extract_format=wikipediaapi.ExtractFormat.WIKI,
-        )
-
-        page = wiki.page(query)
-
-        if not page.exists():
-            wiki = wikipediaapi.Wikipedia(
-            user_agent="berrylyn/0.1 (wiki/mod bot for queer-focused discord servers by @vanillyn, https://github.com/vanillyn/vanillabot.py)",
-            language="en",
-            extract_format=wikipediaapi.ExtractFormat.WIKI,
-        )
-            page = wiki.page(query)
+        # curated articles are answered locally, only a miss asks wikipedia
+        page = await wiki_index.get(lang, query)
+        try:
+            if page is None:
+                page = await wiki_cache.get(lang, query)
+        except asyncio.TimeoutError:
+            await ctx.send(
+                localization.get("wiki", "timeout", lang)
+                or "[lang error] Wikipedia took too long to answer, try again later."
+            )
+            return
+        except Exception as e:
+            log.warning("Wiki lookup for %r failed: %s", query, e)
+            await ctx.send(
+                localization.get("wiki", "error", lang)
+                or "[lang error] Could not reach Wikipedia, try again later."
+            )
+            return
 
-        if not page.exists():
-            await ctx.send(msg.get("not_found").format(query=query))
+        if page is None:
+            not_found = msg.get("not_found").format(query=query)
+            suggestions = await wiki_index.suggest(lang, query)
+            if suggestions:
+                titles = ", ".join(f"`{title}`" for title in suggestions)
+                not_found += " " + (
+                    localization.get("wiki", "suggestions", lang, suggestions=titles)
+                    or f"[lang error] Did you mean: {titles}?"
+                )
+            await ctx.send(not_found)
             return
 
         #categories = page.categories.keys()
@@ -62,15 +84,14 @@ class Wiki(commands.Cog):
         #    await ctx.send(msg.get("off_topic").format(query=query))
         #    return
 
-        summary = page.summary.split("\n")[0]
-        url = page.fullurl
+        title, summary, url = page["title"], page["summary"], page["url"]
 
         if msg_type == "embed":
-            embed = discord.Embed(title=page.title, description=summary, color=0x738ADB)
+            embed = discord.Embed(title=title, description=summary, color=0x738ADB)
             embed.set_footer(text=url)
             await ctx.send(embed=embed)
         else:
-            msg = f"**{page.title}**\n{summary}\n<{url}>"
+            msg = f"**{title}**\n{summary}\n<{url}>"
             await ctx.send(msg)
 
 
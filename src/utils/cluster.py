@@ -0,0 +1,112 @@
+import asyncio
+import os
+import time
+import src.utils.config.aio as db
+from src.utils.config import utils
+from src.utils.config.autoresponders import AR_DB
+from src.utils.config.cache import ar_index
+from src.utils.config.config import CONF_DB
+from src.utils.reloader import reload_all
+from src.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+# seconds between checks for changes made by the other processes
+CLUSTER_POLL_INTERVAL = float(os.getenv("CLUSTER_POLL_INTERVAL", "0.5"))
+# seconds logged changes are kept, far longer than a process falls behind
+CHANGE_RETENTION = 3600
+# seconds between prunes of the change log
+PRUNE_INTERVAL = 600
+
+
+def _reload(key):
+    log.info("Reloaded after another process did: %s", reload_all())
+
+
+# what to do with each kind of change, given the key it was logged with
+HANDLERS = {
+    "guild_settings": lambda key: utils.guild_settings.invalidate(int(key)),
+    "user_settings": lambda key: utils.user_settings.invalidate(int(key)),
+    "autoresponders": lambda key: ar_index.invalidate(int(key)),
+    "reload": _reload,
+}
+
+
+class ChangeFeed:
+    """applies the cache invalidations other processes of a cluster log.
+
+    every write helper that changes a cached row also logs (kind, key) to
+    its database's changes table. this checks PRAGMA data_version, which
+    only moves when another connection commits, and reads new rows only
+    then, so an idle cluster costs one pragma per database per poll.
+    """
+
+    def __init__(self, paths=(CONF_DB, AR_DB), handlers=HANDLERS, interval=CLUSTER_POLL_INTERVAL):
+        self.paths = paths
+        self.handlers = handlers
+        self.interval = interval
+        self.applied = 0
+        # path -> (data_version, id of the last change read), only touched on the database thread
+        self._positions = {}
+        self._task = None
+
+    async def start(self):
+        """start following the change log from its current end"""
+        if self._task is None:
+            await db.worker.submit(self._start)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def poll(self):
+        """apply every change logged by another process since the last poll"""
+        for _, origin, kind, key in await db.worker.submit(self._read):
+            if origin == utils.CHANGE_ORIGIN:
+                continue
+            handler = self.handlers.get(kind)
+            if handler is None:
+                continue
+            try:
+                handler(key)
+            except Exception as e:
+                log.warning("Failed to apply %s change for %s: %s", kind, key, e)
+            self.applied += 1
+
+    def _start(self):
+        for path in self.paths:
+            self._positions[path] = (utils.get_data_version(path), utils.get_last_change(path))
+
+    def _read(self):
+        changes = []
+        for path, (version, last) in self._positions.items():
+            # read the version first, a commit landing in between is seen next time
+            current = utils.get_data_version(path)
+            if current == version:
+                continue
+            rows = utils.get_changes(path, last)
+            self._positions[path] = (current, rows[-1][0] if rows else last)
+            changes.extend(rows)
+        return changes
+
+    def _prune(self):
+        for path in self.paths:
+            utils.prune_changes(path, time.time() - CHANGE_RETENTION)
+
+    async def _run(self):
+        pruned = time.monotonic()
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.poll()
+                if time.monotonic() - pruned > PRUNE_INTERVAL:
+                    pruned = time.monotonic()
+                    await db.worker.submit(self._prune)
+            except Exception as e:
+                log.warning("Failed to read the cluster change log: %s", e)
@@ -1,8 +1,10 @@
-import json 
+import json
+import os
 from src.utils.config.autoresponders import init_autoresponders
 from src.utils.config.config import init_config
 from src.utils.config.embeds import init_embeds
 from src.utils.config.infractions import init_infractions
+from src.utils.config.wiki import init_wiki
 
 
 def init():
@@ -11,6 +13,27 @@ def init():
     init_autoresponders()
     init_embeds()
     init_infractions()
+    init_wiki()
 
-with open("src/utils/config/keys.json", "r") as f:
-    allowed_keys = json.load(f)
\ No newline at end of file
+KEYS_FILE = "src/utils/config/keys.json"
+
+
+def _read_keys():
+    with open(KEYS_FILE, "r") as f:
+        return os.stat(f.fileno()).st_mtime_ns, json.load(f)
+
+
+def reload_allowed_keys():
+    """re-read keys.json if it changed. returns whether it did.
+
+    the new dict replaces allowed_keys in one step, so read it as
+    src.utils.config.allowed_keys rather than importing the name.
+    """
+    global allowed_keys, _keys_mtime
+    if os.stat(KEYS_FILE).st_mtime_ns == _keys_mtime:
+        return False
+    _keys_mtime, allowed_keys = _read_keys()
+    return True
+
+
+_keys_mtime, allowed_keys = _read_keys()
\ No newline at end of file
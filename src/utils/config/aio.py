@@ -0,0 +1,353 @@
+# async versions of every helper in utils.py.
+# queries run on one dedicated database thread so the event loop never
+# waits on sqlite. calls queued while the thread is busy are run back to
+# back and committed together, so a burst of writes costs one fsync.
+import asyncio
+import atexit
+import datetime as dt
+import functools
+import queue
+import sqlite3
+import threading
+import time
+from src.utils.config import utils
+from src.utils.config import pool
+from src.utils.config.cache import ar_index
+from src.utils.metrics import metrics
+from src.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+class DatabaseWorker:
+    """runs database calls on a single background thread"""
+
+    def __init__(self, max_batch=64):
+        self.max_batch = max_batch
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="database", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """finish every queued call and stop the thread"""
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join()
+
+    def submit(self, func, *args, **kwargs):
+        """queue func on the database thread and return a future for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if self._thread is None:
+            self.start()
+        self._queue.put((loop, future, func, args, kwargs))
+        return future
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            jobs = [job]
+            while len(jobs) < self.max_batch:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    self._queue.put(None)
+                    break
+                jobs.append(job)
+
+            # every call runs as a job of the batch, so one that raises only
+            # undoes its own writes and the rest of the batch is still saved
+            results = []
+            try:
+                with pool.batch() as failed:
+                    for loop, future, func, args, kwargs in jobs:
+                        statements, start = pool.statements(), time.perf_counter()
+                        try:
+                            with pool.job() as paths:
+                                result = func(*args, **kwargs)
+                            results.append((loop, future, result, None, paths))
+                        except Exception as e:
+                            results.append((loop, future, None, e, ()))
+                        metrics.timer("db_call", helper=func.__name__).observe(time.perf_counter() - start)
+                        metrics.counter("db_queries", helper=func.__name__).inc(pool.statements() - statements)
+                # a call whose database failed to commit lost its writes
+                results = [
+                    (loop, future, result, error or next((failed[p] for p in paths if p in failed), None))
+                    for loop, future, result, error, paths in results
+                ]
+            except Exception as e:
+                results = [(loop, future, None, e) for loop, future, *_ in jobs]
+
+            for loop, future, result, error in results:
+                try:
+                    loop.call_soon_threadsafe(_resolve, future, result, error)
+                except RuntimeError:
+                    # the loop was closed while the call was queued
+                    pass
+
+
+def _resolve(future, result, error):
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+worker = DatabaseWorker()
+
+
+def _async(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await worker.submit(func, *args, **kwargs)
+    return wrapper
+
+
+# guild and user config management. cached rows are read on the loop
+# and only a cache miss goes to the database thread.
+async def get_guild_settings(guild_id):
+    """get the whole config row for a guild as a dict, {} if it has none. do not mutate it"""
+    settings = utils.guild_settings.get(utils.settings_key(guild_id))
+    if settings is None:
+        settings = await worker.submit(utils.load_guild_settings, guild_id)
+    return settings
+
+
+async def get_user_settings(user_id):
+    """get the whole config row for a user as a dict, {} if they have none. do not mutate it"""
+    settings = utils.user_settings.get(utils.settings_key(user_id))
+    if settings is None:
+        settings = await worker.submit(utils.load_user_settings, user_id)
+    return settings
+
+
+async def get_guild_config(guild_id, key):
+    """get a configuration value for a guild"""
+    utils.check_key("guild", key)
+    return (await get_guild_settings(guild_id)).get(key)
+
+
+async def get_user_config(user_id, key):
+    """get a configuration value for a user"""
+    utils.check_key("user", key)
+    return (await get_user_settings(user_id)).get(key)
+
+
+async def get_language(user_id, guild_id):
+    """get the language for a user, and if not, the guild"""
+    user = await get_user_settings(user_id)
+    if user:
+        return user.get("language")
+    guild = await get_guild_settings(guild_id)
+    return guild.get("language") if guild else 'en'
+
+
+set_guild_config = _async(utils.set_guild_config)
+set_user_config = _async(utils.set_user_config)
+
+# every WriteBehind, written out at exit by _shutdown
+write_queues = []
+
+# errors caused by the row itself, as opposed to the database
+ROW_ERRORS = (sqlite3.IntegrityError, sqlite3.InterfaceError, sqlite3.ProgrammingError)
+
+
+class WriteBehind:
+    """collects rows on the loop and inserts them in bulk on the database thread.
+
+    rows are written after delay seconds, or at once when max_rows are
+    waiting, so a burst of moderation actions becomes one executemany and
+    one commit. readers call flush() before they query: the database thread
+    runs calls in order on one connection, so the query sees every row.
+    """
+
+    def __init__(self, name, insert, delay=0.005, max_rows=100):
+        self.name = name
+        self.insert = insert
+        self.delay = delay
+        self.max_rows = max_rows
+        self.pending = []
+        self._timer = None
+        self._writes = set()
+        write_queues.append(self)
+
+    def add(self, row):
+        self.extend((row,))
+
+    def extend(self, rows):
+        self.pending.extend(rows)
+        if len(self.pending) >= self.max_rows:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.delay, self.flush)
+
+    def flush(self):
+        """hand every waiting row to the database thread without waiting for it"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self.pending:
+            return
+        rows, self.pending = self.pending, []
+        write = worker.submit(self._insert, rows)
+        self._writes.add(write)
+        write.add_done_callback(lambda future: self._written(future, rows))
+
+    async def drain(self):
+        """flush and wait until every row is committed"""
+        self.flush()
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+
+    def flush_sync(self):
+        """write waiting rows from the calling thread, for interpreter shutdown"""
+        if self.pending:
+            rows, self.pending = self.pending, []
+            try:
+                self._insert(rows)
+            except Exception as e:
+                log.error("Failed to write %d %s: %s", len(rows), self.name, e)
+
+    def _insert(self, rows):
+        # one bad row fails the executemany and its savepoint undoes the rest,
+        # so retry row by row and drop only the rows that fail again
+        try:
+            with pool.job():
+                self.insert(rows)
+            return
+        except ROW_ERRORS as e:
+            if len(rows) == 1:
+                raise
+            log.warning("Failed to write %d %s at once, retrying one by one: %s", len(rows), self.name, e)
+        dropped = 0
+        for row in rows:
+            try:
+                with pool.job():
+                    self.insert((row,))
+            except ROW_ERRORS as e:
+                dropped += 1
+                log.error("Dropped a row of %s: %s", self.name, e)
+        if dropped:
+            log.error("Wrote %d of %d %s", len(rows) - dropped, len(rows), self.name)
+
+    def _written(self, future, rows):
+        self._writes.discard(future)
+        if not future.cancelled() and future.exception() is not None:
+            log.error("Failed to write %d %s: %s", len(rows), self.name, future.exception())
+
+
+def _shutdown():
+    # finish the queued calls first, then write what never reached the queue.
+    # logging is stopped after this, so rows dropped here are still logged
+    worker.stop()
+    for writes in write_queues:
+        writes.flush_sync()
+
+
+atexit.register(_shutdown)
+
+infraction_writes = WriteBehind("infractions", utils.add_infractions)
+note_writes = WriteBehind("notes", utils.add_notes)
+wiki_writes = WriteBehind("wiki articles", utils.add_wiki_articles)
+
+
+# infractions management. writes are queued and batched, see WriteBehind
+def _duration(duration):
+    # sqlite cannot store a timedelta, and one bad row would fail its whole batch
+    return None if duration is None else str(duration)
+
+
+async def add_infraction(guild_id, user_id, type, reason, duration, issued_by):
+    infraction_writes.add((guild_id, user_id, type, reason, _duration(duration), issued_by, dt.datetime.now()))
+
+
+async def add_infractions(guild_id, user_ids, type, reason, duration, issued_by):
+    """record the same infraction for many users, e.g. after a mass ban"""
+    created_at, duration = dt.datetime.now(), _duration(duration)
+    infraction_writes.extend((guild_id, user_id, type, reason, duration, issued_by, created_at) for user_id in user_ids)
+
+
+async def get_infractions(guild_id, user_id):
+    infraction_writes.flush()
+    return await worker.submit(utils.get_infractions, guild_id, user_id)
+
+
+async def add_note(user_id, note, added_by):
+    # same format as sqlite's datetime('now'), which add_note used
+    timestamp = dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    note_writes.add((user_id, note, added_by, timestamp))
+
+
+async def get_notes(user_id):
+    note_writes.flush()
+    return await worker.submit(utils.get_notes, user_id)
+
+# embed management
+create_embed = _async(utils.create_embed)
+update_embed = _async(utils.update_embed)
+delete_embed = _async(utils.delete_embed)
+get_embed = _async(utils.get_embed)
+get_all_embeds = _async(utils.get_all_embeds)
+
+# autoresponder management
+create_autoresponder = _async(utils.create_autoresponder)
+update_autoresponder = _async(utils.update_autoresponder)
+delete_autoresponder = _async(utils.delete_autoresponder)
+autoresponder_exists = _async(utils.autoresponder_exists)
+get_autoresponder = _async(utils.get_autoresponder)
+get_all_autoresponders = _async(utils.get_all_autoresponders)
+get_guild_triggers = _async(utils.get_guild_triggers)
+
+
+async def get_guild_autoresponders(guild_id):
+    """Get the in-memory autoresponder index for a guild, loading it on first use"""
+    guild = ar_index.get(guild_id)
+    if guild is None:
+        guild = await worker.submit(utils.load_guild_autoresponders, guild_id)
+    return guild
+
+
+# scheduled message deletes
+add_scheduled_delete = _async(utils.add_scheduled_delete)
+remove_scheduled_deletes = _async(utils.remove_scheduled_deletes)
+get_scheduled_deletes = _async(utils.get_scheduled_deletes)
+
+# autoresponder replies spilled out of memory
+add_ar_replies = _async(utils.add_ar_replies)
+get_ar_reply = _async(utils.get_ar_reply)
+delete_ar_reply = _async(utils.delete_ar_reply)
+prune_ar_replies = _async(utils.prune_ar_replies)
+
+# cached wikipedia lookups. writes are queued and batched, see WriteBehind
+async def add_wiki_article(language, query, title, summary, url, fetched_at):
+    wiki_writes.add((language, query, title, summary, url, fetched_at))
+
+
+async def get_wiki_article(language, query):
+    wiki_writes.flush()
+    return await worker.submit(utils.get_wiki_article, language, query)
+
+
+prune_wiki_articles = _async(utils.prune_wiki_articles)
+
+# offline wiki article index
+replace_wiki_index = _async(utils.replace_wiki_index)
+get_indexed_article = _async(utils.get_indexed_article)
+get_indexed_prefix = _async(utils.get_indexed_prefix)
+get_trigram_matches = _async(utils.get_trigram_matches)
+
+# cluster change log, read by src/utils/cluster.py on the database thread
+log_change = _async(utils.log_change)
@@ -1,4 +1,5 @@
-import sqlite3
+from src.utils.config.pool import connect
+from src.utils.config.migrations import migrate, add_column, rebuild_table, create_change_log, digits_only, warn_text_ids
 import dotenv
 import os
 
@@ -8,7 +9,7 @@ AR_DB = f"{db_path}/autoresponders.db"
 
 def init_autoresponders():
     """initializes the autoresponders database"""
-    with sqlite3.connect(AR_DB) as conn:
+    with connect(AR_DB) as conn:
         c = conn.cursor()
         c.execute("""
             CREATE TABLE IF NOT EXISTS autoresponders (
@@ -26,4 +27,79 @@ def init_autoresponders():
                 PRIMARY KEY (guild_id, name, language)
             )
         """)
-        conn.commit()
\ No newline at end of file
+        conn.commit()
+    migrate(AR_DB, AR_MIGRATIONS)
+
+
+def _integer_guild_ids(conn):
+    # guild_id was TEXT here but INTEGER everywhere else
+    rebuild_table(conn, "autoresponders", """
+        CREATE TABLE autoresponders (
+            guild_id INTEGER,
+            name TEXT,
+            trigger TEXT,
+            response TEXT,
+            language TEXT DEFAULT 'en',
+            creator_id INTEGER,
+            editors TEXT DEFAULT '',
+            contributors TEXT DEFAULT '',
+            editor_role INTEGER,
+            edit_permissions TEXT DEFAULT 'edit,delete,add_language',
+            arguments TEXT DEFAULT 'none',
+            PRIMARY KEY (guild_id, name, language)
+        )
+    """, f"""
+        SELECT CASE WHEN {digits_only("guild_id")} THEN CAST(guild_id AS INTEGER) ELSE guild_id END,
+               name, trigger, response, language, creator_id,
+               editors, contributors, editor_role, edit_permissions, arguments
+        FROM autoresponders
+    """)
+    warn_text_ids(conn, "autoresponders")
+
+
+def _trigger_index(conn):
+    # covers get_guild_triggers without touching the table
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_autoresponders_triggers ON autoresponders (guild_id, name, trigger)")
+
+
+def _scheduled_deletes(conn):
+    # {delete_response:N} deletions that have not happened yet, so they survive a restart
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS scheduled_deletes (
+            message_id INTEGER PRIMARY KEY,
+            channel_id INTEGER,
+            delete_at REAL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_scheduled_deletes_due ON scheduled_deletes (delete_at)")
+
+
+def _ar_replies(conn):
+    # autoresponder replies pushed out of memory, so reactions on older replies still work
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ar_replies (
+            message_id INTEGER PRIMARY KEY,
+            name TEXT,
+            creator_id INTEGER,
+            trigger TEXT,
+            created_at REAL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_ar_replies_created ON ar_replies (created_at)")
+
+
+def _scheduled_delete_guilds(conn):
+    # cluster processes only load the deletes of the guilds on their shards
+    add_column(conn, "scheduled_deletes", "guild_id", "INTEGER")
+
+
+# schema upgrades, applied in order by migrate(). never edit or reorder a
+# released entry, append a new one instead.
+AR_MIGRATIONS = [
+    _integer_guild_ids,
+    _trigger_index,
+    _scheduled_deletes,
+    _ar_replies,
+    create_change_log,
+    _scheduled_delete_guilds,
+]
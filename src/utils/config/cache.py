@@ -0,0 +1,241 @@
+import threading
+import time
+from collections import OrderedDict
+from src.utils.matcher import TriggerMatcher
+from src.utils.directives import parse_response
+from src.utils.sharding import shard_for
+
+# every cache registers its counters here so they can be reported in one place
+cache_stats = {}
+
+
+class CacheStats:
+    """hit/miss counters for an in-memory cache"""
+
+    def __init__(self, name):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        cache_stats[name] = self
+
+    def hit(self):
+        self.hits += 1
+
+    def miss(self):
+        self.misses += 1
+
+    def evict(self):
+        self.evictions += 1
+
+    def expire(self):
+        self.expirations += 1
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def __repr__(self):
+        return f"<CacheStats {self.name} hits={self.hits} misses={self.misses} hit_rate={self.hit_rate:.2%}>"
+
+
+class LRUCache:
+    """bounded least-recently-used cache whose entries expire after ttl seconds.
+
+    on_evict(key, value) is called, outside the lock, for every entry pushed
+    out by the size cap or found expired.
+    """
+
+    def __init__(self, name, maxsize=1024, ttl=300, on_evict=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = CacheStats(name)
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        expired = None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._data.move_to_end(key)
+                    self.stats.hit()
+                    return entry[1]
+                del self._data[key]
+                expired = entry
+        if expired is not None:
+            self.stats.expire()
+            if self.on_evict is not None:
+                self.on_evict(key, expired[1])
+        self.stats.miss()
+        return default
+
+    def set(self, key, value):
+        evicted = []
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                old_key, (_, old_value) = self._data.popitem(last=False)
+                evicted.append((old_key, old_value))
+        for old_key, old_value in evicted:
+            self.stats.evict()
+            if self.on_evict is not None:
+                self.on_evict(old_key, old_value)
+
+    def pop(self, key, default=None):
+        """remove an entry and return its value, expired or not"""
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def items(self):
+        """a snapshot of every (key, value) pair, including expired ones"""
+        with self._lock:
+            return [(key, entry[1]) for key, entry in self._data.items()]
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class GuildAutoresponders:
+    """every autoresponder row of one guild, plus its compiled trigger matcher.
+
+    each row carries its parsed response under "parsed", so directives are
+    parsed when a row is loaded or saved instead of on every message.
+    """
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        for row in self.rows:
+            row["parsed"] = parse_response(row["response"] or "")
+        self._rebuild()
+
+    def _rebuild(self):
+        self.by_key = {(row["name"], row["language"]): row for row in self.rows}
+        triggers, seen = [], set()
+        for row in self.rows:
+            key = (row["name"], row["trigger"])
+            if key not in seen:
+                seen.add(key)
+                triggers.append({"name": row["name"], "trigger": row["trigger"]})
+        # swapped as one pair so a reader on another thread never sees them mismatched
+        self.compiled = (triggers, TriggerMatcher(t["trigger"] for t in triggers))
+
+    @property
+    def triggers(self):
+        return self.compiled[0]
+
+    def get(self, name, language):
+        """get the row for an autoresponder in a specific language"""
+        return self.by_key.get((name, language))
+
+    def match(self, content):
+        """yield every trigger found in content, first match first"""
+        triggers, matcher = self.compiled
+        for index in matcher.matches(content):
+            yield triggers[index]
+
+    def add(self, row):
+        row["parsed"] = parse_response(row["response"] or "")
+        self.rows.append(row)
+        self._rebuild()
+
+    def update(self, name, language, fields):
+        row = self.by_key.get((name, language))
+        if row is None:
+            return
+        row.update(fields)
+        if "response" in fields:
+            row["parsed"] = parse_response(row["response"] or "")
+        if "trigger" in fields:
+            self._rebuild()
+
+    def remove(self, name):
+        self.rows = [row for row in self.rows if row["name"] != name]
+        self._rebuild()
+
+
+class AutoresponderIndex:
+    """in-process autoresponder index keyed by guild.
+
+    guilds are loaded lazily on first use and kept current by the write
+    helpers in utils.py, so the message path never touches the database.
+    they are partitioned by shard, like the gateway delivers them.
+    """
+
+    def __init__(self):
+        self.shards = {}
+        self.stats = CacheStats("autoresponders")
+
+    def _find(self, guild_id):
+        guilds = self.shards.get(shard_for(guild_id))
+        return None if guilds is None else guilds.get(int(guild_id))
+
+    def get(self, guild_id):
+        guild = self._find(guild_id)
+        if guild is None:
+            self.stats.miss()
+        else:
+            self.stats.hit()
+        return guild
+
+    def load(self, guild_id, rows):
+        return self.put(guild_id, GuildAutoresponders(rows))
+
+    def put(self, guild_id, guild):
+        self.shards.setdefault(shard_for(guild_id), {})[int(guild_id)] = guild
+        return guild
+
+    def created(self, guild_id, row):
+        guild = self._find(guild_id)
+        if guild is not None:
+            guild.add(row)
+
+    def updated(self, guild_id, name, language, fields):
+        guild = self._find(guild_id)
+        if guild is not None:
+            guild.update(name, language, fields)
+
+    def deleted(self, guild_id, name):
+        guild = self._find(guild_id)
+        if guild is not None:
+            guild.remove(name)
+
+    def invalidate(self, guild_id=None):
+        if guild_id is None:
+            self.shards.clear()
+        else:
+            self.shards.get(shard_for(guild_id), {}).pop(int(guild_id), None)
+
+    def invalidate_shard(self, shard_id):
+        self.shards.pop(shard_id, None)
+
+    def sizes(self):
+        """{shard id: guilds loaded}"""
+        return {shard_id: len(guilds) for shard_id, guilds in self.shards.items()}
+
+
+ar_index = AutoresponderIndex()
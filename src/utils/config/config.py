@@ -1,4 +1,5 @@
-import sqlite3
+from src.utils.config.pool import connect
+from src.utils.config.migrations import migrate, add_column, create_change_log
 import dotenv
 import os 
 
@@ -8,7 +9,7 @@ CONF_DB = f"{db_path}/config.db"
 
 def init_config():
     """makes the configuration database"""
-    with sqlite3.connect(CONF_DB) as conn:
+    with connect(CONF_DB) as conn:
         c = conn.cursor()
         c.execute("""
             CREATE TABLE IF NOT EXISTS guild (
@@ -30,29 +31,23 @@ def init_config():
                 message_type TEXT DEFAULT 'embed'
             )
         """)
-        # new server config columns, will be added if they dont exist in the existing db
-        try:
-            c.execute("ALTER TABLE guild ADD COLUMN autoresponder_edit_role INTEGER")
-        except sqlite3.OperationalError:
-            pass
-        try:
-            c.execute("ALTER TABLE guild ADD COLUMN autoresponder_edit_permission TEXT DEFAULT 'send_messages'")
-        except sqlite3.OperationalError:
-            pass
-        try:
-            c.execute("ALTER TABLE guild ADD COLUMN embed_edit_role INTEGER")
-        except sqlite3.OperationalError:
-            pass
-        try:
-            c.execute("ALTER TABLE guild ADD COLUMN embed_edit_permission TEXT DEFAULT 'manage_server'")
-        except sqlite3.OperationalError:
-            pass
-        try:
-            c.execute("ALTER TABLE guild ADD COLUMN server_config_role INTEGER")
-        except sqlite3.OperationalError:
-            pass
-        try:
-            c.execute("ALTER TABLE guild ADD COLUMN staff_role INTEGER")
-        except sqlite3.OperationalError:
-            pass
-        conn.commit()
\ No newline at end of file
+        conn.commit()
+    migrate(CONF_DB, CONFIG_MIGRATIONS)
+
+
+def _guild_settings_columns(conn):
+    # server config columns added after the guild table was first released
+    add_column(conn, "guild", "autoresponder_edit_role", "INTEGER")
+    add_column(conn, "guild", "autoresponder_edit_permission", "TEXT DEFAULT 'send_messages'")
+    add_column(conn, "guild", "embed_edit_role", "INTEGER")
+    add_column(conn, "guild", "embed_edit_permission", "TEXT DEFAULT 'manage_server'")
+    add_column(conn, "guild", "server_config_role", "INTEGER")
+    add_column(conn, "guild", "staff_role", "INTEGER")
+
+
+# schema upgrades, applied in order by migrate(). never edit or reorder a
+# released entry, append a new one instead.
+CONFIG_MIGRATIONS = [
+    _guild_settings_columns,
+    create_change_log,
+]
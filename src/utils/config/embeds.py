@@ -1,4 +1,5 @@
-import sqlite3
+from src.utils.config.pool import connect
+from src.utils.config.migrations import migrate, digits_only, warn_text_ids
 import dotenv
 import os
 
@@ -9,7 +10,7 @@ EMBED_DB = f"{db_path}/embeds.db"
 
 def init_embeds():
     """Initializes the embeds database"""
-    with sqlite3.connect(EMBED_DB) as conn:
+    with connect(EMBED_DB) as conn:
         c = conn.cursor()
         c.execute("""
             CREATE TABLE IF NOT EXISTS embeds (
@@ -25,4 +26,21 @@ def init_embeds():
                 PRIMARY KEY (guild_id, name, language)
             )
         """)
-        conn.commit()
\ No newline at end of file
+        conn.commit()
+    migrate(EMBED_DB, EMBED_MIGRATIONS)
+
+
+def _integer_guild_ids(conn):
+    # rows written with a non-numeric guild_id string kept it as TEXT
+    conn.execute(f"""
+        UPDATE embeds SET guild_id = CAST(guild_id AS INTEGER)
+        WHERE typeof(guild_id) = 'text' AND {digits_only("guild_id")}
+    """)
+    warn_text_ids(conn, "embeds")
+
+
+# schema upgrades, applied in order by migrate(). never edit or reorder a
+# released entry, append a new one instead.
+EMBED_MIGRATIONS = [
+    _integer_guild_ids,
+]
@@ -1,4 +1,5 @@
-import sqlite3
+from src.utils.config.pool import connect
+from src.utils.config.migrations import migrate, rebuild_table
 import dotenv
 import os
 
@@ -8,7 +9,7 @@ MOD_DB = f"{db_path}/infractions.db"
 
 def init_infractions():
     """initializes the infractions database"""
-    with sqlite3.connect(MOD_DB) as conn:
+    with connect(MOD_DB) as conn:
         c = conn.cursor()
         c.execute("""
             CREATE TABLE IF NOT EXISTS infractions (
@@ -31,4 +32,42 @@ def init_infractions():
                 PRIMARY KEY (user_id, timestamp)
             )
         """)
-        conn.commit()
\ No newline at end of file
+        conn.commit()
+    migrate(MOD_DB, MOD_MIGRATIONS)
+
+
+def _infraction_index(conn):
+    # covers get_infractions, including its ORDER BY, without touching the table
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_infractions_lookup
+        ON infractions (guild_id, user_id, created_at DESC, type, reason, duration, issued_by)
+    """)
+
+
+def _note_ids(conn):
+    # notes were keyed by (user_id, timestamp), so two notes on the same user
+    # within a second collided. give them their own id and index the lookup.
+    rebuild_table(conn, "notes", """
+        CREATE TABLE notes (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER,
+            note TEXT,
+            added_by INTEGER,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """, """
+        (user_id, note, added_by, timestamp)
+        SELECT user_id, note, added_by, timestamp FROM notes
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_notes_lookup
+        ON notes (user_id, timestamp DESC, note, added_by)
+    """)
+
+
+# schema upgrades, applied in order by migrate(). never edit or reorder a
+# released entry, append a new one instead.
+MOD_MIGRATIONS = [
+    _infraction_index,
+    _note_ids,
+]
@@ -0,0 +1,78 @@
+from src.utils.config.pool import connect
+from src.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+def migrate(path, migrations):
+    """bring a database's schema up to date.
+
+    migrations[i] upgrades a database at PRAGMA user_version i to i + 1.
+    each step runs in its own transaction together with the version bump,
+    so an interrupted upgrade resumes from the last finished step.
+    """
+    with connect(path) as conn:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for target, migration in enumerate(migrations[version:], start=version + 1):
+            conn.execute("BEGIN")
+            try:
+                migration(conn)
+                conn.execute(f"PRAGMA user_version = {target}")
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        return max(version, len(migrations))
+
+
+def columns(conn, table):
+    """get the column names of a table"""
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def add_column(conn, table, column, definition):
+    """add a column unless the table already has it"""
+    if column not in columns(conn, table):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def digits_only(column):
+    """sql that is true when a text column holds a plain number.
+
+    CAST turns anything else into 0 or a prefix of it, which can collide
+    with another row's key, so only these are converted.
+    """
+    return f"({column} != '' AND {column} NOT GLOB '*[^0-9]*')"
+
+
+def warn_text_ids(conn, table, column="guild_id"):
+    """log the rows whose id was left as text because it is not a number"""
+    count = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE typeof({column}) = 'text'").fetchone()[0]
+    if count:
+        log.warning("%d rows of %s have a non-numeric %s, left as they are", count, table, column)
+
+
+def rebuild_table(conn, table, create_sql, select_sql):
+    """replace a table with a new definition, copying its rows through select_sql.
+
+    sqlite cannot change a column's type in place, so the table is recreated
+    under a temporary name, filled, and renamed over the old one.
+    """
+    conn.execute(create_sql.replace(f"CREATE TABLE {table}", f"CREATE TABLE {table}_new", 1))
+    conn.execute(f"INSERT INTO {table}_new {select_sql}")
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+
+
+def create_change_log(conn):
+    """the changes table cluster processes tail to keep their caches coherent, see src/utils/cluster.py"""
+    # AUTOINCREMENT so ids never go backwards, even after every row was pruned
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS changes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            origin TEXT,
+            kind TEXT,
+            key TEXT,
+            created_at REAL
+        )
+    """)
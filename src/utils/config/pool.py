@@ -0,0 +1,191 @@
+import atexit
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# one long-lived connection per database file, shared by every helper
+MMAP_SIZE = 64 * 1024 * 1024
+CACHED_STATEMENTS = 256
+
+_connections = {}
+_locks = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def _open(path):
+    conn = sqlite3.connect(path, check_same_thread=False, cached_statements=CACHED_STATEMENTS)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.set_trace_callback(_count_statement)
+    return conn
+
+
+# transaction bookkeeping, not counted as statements
+_CONTROL = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE")
+
+
+def _count_statement(statement):
+    if not statement.startswith(_CONTROL):
+        _local.statements = getattr(_local, "statements", 0) + 1
+
+
+def statements():
+    """how many sql statements this thread has run so far, transaction control aside"""
+    return getattr(_local, "statements", 0)
+
+
+def get_connection(path):
+    """get the shared connection for a database, opening it on first use"""
+    conn = _connections.get(path)
+    if conn is None:
+        with _lock:
+            conn = _connections.get(path)
+            if conn is None:
+                conn = _open(path)
+                _locks[path] = threading.RLock()
+                _connections[path] = conn
+    return conn
+
+
+@contextmanager
+def connect(path):
+    """borrow the shared connection for a database.
+
+    commits when the block finishes and rolls back if it raises, like
+    `with sqlite3.connect(path) as conn` but without reopening the file.
+    inside batch() the commit is deferred to the end of the batch, and
+    inside job() the writes are made under a savepoint of that job.
+    """
+    conn = get_connection(path)
+    batched = getattr(_local, "batch", None)
+    with _locks[path]:
+        if batched is not None:
+            batched.paths.add(path)
+            jobs = getattr(_local, "jobs", None)
+            if jobs and path not in jobs[-1].paths:
+                # the outer transaction keeps RELEASE from committing
+                if not conn.in_transaction:
+                    conn.execute("BEGIN")
+                conn.execute("SAVEPOINT job")
+                jobs[-1].paths.append(path)
+            yield conn
+            return
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+
+
+class _Scope:
+    def __init__(self):
+        self.paths = []
+        self.callbacks = []
+
+
+class _Batch:
+    def __init__(self):
+        self.paths = set()
+        self.callbacks = []
+        # path -> error of every database whose commit failed
+        self.failed = {}
+
+
+def after_commit(path, callback):
+    """call callback once the writes made so far on path are committed.
+
+    for cache updates that mirror a write: inside a batch they wait for its
+    commit and are dropped if the job or the commit fails. outside one the
+    write is already committed, so call this after the connect() block.
+    """
+    jobs = getattr(_local, "jobs", None)
+    batched = getattr(_local, "batch", None)
+    if jobs:
+        jobs[-1].callbacks.append((path, callback))
+    elif batched is not None:
+        batched.callbacks.append((path, callback))
+    else:
+        callback()
+
+
+@contextmanager
+def job():
+    """run one call inside a batch: if it raises, only its own writes are undone.
+
+    jobs nest, every one gets its own savepoint on each database it touches.
+    yields the list of those databases.
+    """
+    scope = _Scope()
+    jobs = _local.__dict__.setdefault("jobs", [])
+    jobs.append(scope)
+    try:
+        yield scope.paths
+    except BaseException:
+        for path in scope.paths:
+            with _locks[path]:
+                conn = _connections[path]
+                conn.execute("ROLLBACK TO job")
+                conn.execute("RELEASE job")
+        raise
+    else:
+        for path in scope.paths:
+            with _locks[path]:
+                _connections[path].execute("RELEASE job")
+        if len(jobs) > 1:
+            jobs[-2].callbacks.extend(scope.callbacks)
+        elif getattr(_local, "batch", None) is not None:
+            _local.batch.callbacks.extend(scope.callbacks)
+        else:
+            for _, callback in scope.callbacks:
+                callback()
+    finally:
+        jobs.pop()
+
+
+@contextmanager
+def batch():
+    """group every write made on this thread in the block into one commit per database.
+
+    yields a dict that, after the block, holds the error of every database
+    whose commit failed. those are rolled back, the others stay committed.
+    after_commit callbacks run for the committed databases only.
+    """
+    _local.batch = batched = _Batch()
+    try:
+        yield batched.failed
+    except BaseException:
+        for path in batched.paths:
+            with _locks[path]:
+                _connections[path].rollback()
+        raise
+    finally:
+        _local.batch = None
+    for path in batched.paths:
+        with _locks[path]:
+            conn = _connections[path]
+            try:
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                batched.failed[path] = e
+    for path, callback in batched.callbacks:
+        if path not in batched.failed:
+            callback()
+
+
+def close_all():
+    """close every shared connection"""
+    with _lock:
+        for path, conn in _connections.items():
+            with _locks[path]:
+                conn.close()
+        _connections.clear()
+        _locks.clear()
+
+
+atexit.register(close_all)
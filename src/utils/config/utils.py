@@ -1,101 +1,150 @@
-import sqlite3
+from src.utils.config.pool import connect, after_commit
 import datetime as dt
 import json
-from src.utils.config import allowed_keys
+import os
+import time
+from src.utils import config
 from src.utils.config.autoresponders import AR_DB
 from src.utils.config.embeds import EMBED_DB
 from src.utils.config.infractions import MOD_DB
 from src.utils.config.config import CONF_DB
+from src.utils.config.wiki import WIKI_DB
+from src.utils.config.cache import ar_index, GuildAutoresponders, LRUCache
+
+# guild and user config cache. whole rows are cached, so every setting of a
+# guild or user costs one dict lookup once loaded. writes invalidate the row.
+# the cache is only touched once the database commits, see pool.after_commit
+guild_settings = LRUCache("guild_settings", maxsize=4096, ttl=300)
+user_settings = LRUCache("user_settings", maxsize=16384, ttl=300)
+
+# set by cluster.py for each bot process, changes to cached rows are only
+# logged for the other processes when it is
+CLUSTER_ID = os.getenv("CLUSTER_ID")
+CHANGE_ORIGIN = f"{CLUSTER_ID}:{os.getpid()}"
+
+
+def settings_key(id):
+    return int(id) if id is not None else None
+
+
+def check_key(scope, key):
+    """raise if key is not a configurable setting for scope ('guild' or 'user')"""
+    allowed_keys = config.allowed_keys
+    if key not in allowed_keys.get(scope, []):
+        raise ValueError(f"Invalid key: {key}. Allowed keys are: {allowed_keys[scope]}")
+
+
+def _fetch_row(table, id_column, id):
+    with connect(CONF_DB) as conn:
+        c = conn.cursor()
+        c.execute(f"SELECT * FROM {table} WHERE {id_column} = ?", (id,))
+        row = c.fetchone()
+        return dict(zip((col[0] for col in c.description), row)) if row else {}
+
+
+def load_guild_settings(guild_id):
+    """read a guild's config row into the cache"""
+    settings = _fetch_row("guild", "guild_id", guild_id)
+    after_commit(CONF_DB, lambda: guild_settings.set(settings_key(guild_id), settings))
+    return settings
+
+
+def load_user_settings(user_id):
+    """read a user's config row into the cache"""
+    settings = _fetch_row("user", "user_id", user_id)
+    after_commit(CONF_DB, lambda: user_settings.set(settings_key(user_id), settings))
+    return settings
+
+
+def get_guild_settings(guild_id):
+    """get the whole config row for a guild as a dict, {} if it has none. do not mutate it"""
+    settings = guild_settings.get(settings_key(guild_id))
+    if settings is None:
+        settings = load_guild_settings(guild_id)
+    return settings
+
+
+def get_user_settings(user_id):
+    """get the whole config row for a user as a dict, {} if they have none. do not mutate it"""
+    settings = user_settings.get(settings_key(user_id))
+    if settings is None:
+        settings = load_user_settings(user_id)
+    return settings
+
 
 # guild and user config management
 def set_guild_config(guild_id, key, value):
     """set a configuration value for a guild"""
-    
-    if key not in allowed_keys.get("guild", []):
-        raise ValueError(f"Invalid key: {key}. Allowed keys are: {allowed_keys['guild']}")
-    
+    check_key("guild", key)
+
     if not isinstance(guild_id, int):
         raise ValueError("guild_id must be an integer")
     
-    with sqlite3.connect(CONF_DB) as conn:
+    with connect(CONF_DB) as conn:
         conn.cursor().execute(f"""
             INSERT INTO guild (guild_id, {key})
             VALUES (?, ?)
             ON CONFLICT(guild_id) DO UPDATE SET {key} = excluded.{key}
         """, (guild_id, value))
-        conn.commit()
+        _log_change(conn, "guild_settings", guild_id)
+    after_commit(CONF_DB, lambda: guild_settings.invalidate(settings_key(guild_id)))
 
 
 def get_guild_config(guild_id, key):
     """get a configuration value for a guild"""
-    if key not in allowed_keys.get("guild", []):
-        raise ValueError(f"Invalid key: {key}. Allowed keys are: {allowed_keys['guild']}")
-    
-    with sqlite3.connect(CONF_DB) as conn:
-        c = conn.cursor()
-        c.execute(
-            f"SELECT {key} FROM guild WHERE guild_id = ?",
-            (guild_id,)
-        )
-        row = c.fetchone()
-        return row[0] if row else None
+    check_key("guild", key)
+    return get_guild_settings(guild_id).get(key)
 
 
 def set_user_config(user_id, key, value):
     """set a configuration value for a user"""
-    if key not in allowed_keys.get("user", []):
-        raise ValueError(f"Invalid key: {key}. Allowed keys are: {allowed_keys['user']}")
-    
+    check_key("user", key)
+
     if not isinstance(user_id, int):
         raise ValueError("user_id must be an integer")
     
-    with sqlite3.connect(CONF_DB) as conn:
+    with connect(CONF_DB) as conn:
         conn.cursor().execute(f"""
             INSERT INTO user (user_id, {key})
             VALUES (?, ?)
             ON CONFLICT(user_id) DO UPDATE SET {key} = excluded.{key}
         """, (user_id, value))
-        conn.commit()
+        _log_change(conn, "user_settings", user_id)
+    after_commit(CONF_DB, lambda: user_settings.invalidate(settings_key(user_id)))
 
 def get_user_config(user_id, key):
     """get a configuration value for a user"""
-    if key not in allowed_keys.get("user", []):
-        raise ValueError(f"Invalid key: {key}. Allowed keys are: {allowed_keys['user']}")
-    
-    with sqlite3.connect(CONF_DB) as conn:
-        c = conn.cursor()
-        c.execute(
-            f"SELECT {key} FROM user WHERE user_id = ?",
-            (user_id,)
-        )
-        row = c.fetchone()
-        return row[0] if row else None
+    check_key("user", key)
+    return get_user_settings(user_id).get(key)
     
 def get_language(user_id, guild_id):
     """get the language for a user, and if not, the guild"""
-    with sqlite3.connect(CONF_DB) as conn:
-        c = conn.cursor()
-        c.execute("SELECT language FROM user WHERE user_id = ?", (user_id,))
-        row = c.fetchone()
-        if row:
-            return row[0]
-        c.execute("SELECT language FROM guild WHERE guild_id = ?", (guild_id,))
-        row = c.fetchone()
-        return row[0] if row else 'en'
+    user = get_user_settings(user_id)
+    if user:
+        return user.get("language")
+    guild = get_guild_settings(guild_id)
+    return guild.get("language") if guild else 'en'
 
 # infractions management
 def add_infraction(guild_id, user_id, type, reason, duration, issued_by):
-    with sqlite3.connect(MOD_DB) as conn:
+    with connect(MOD_DB) as conn:
         timestamp = dt.datetime.now()
         c = conn.cursor()
         c.execute("""
             INSERT INTO infractions (guild_id, user_id, type, reason, duration, issued_by, created_at)
             VALUES (?, ?, ?, ?, ?, ?, ?)
         """, (guild_id, user_id, type, reason, duration, issued_by, timestamp))
-        conn.commit()
+
+def add_infractions(rows):
+    """Insert many (guild_id, user_id, type, reason, duration, issued_by, created_at) rows at once"""
+    with connect(MOD_DB) as conn:
+        conn.executemany("""
+            INSERT INTO infractions (guild_id, user_id, type, reason, duration, issued_by, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, rows)
 
 def get_infractions(guild_id, user_id):
-    with sqlite3.connect(MOD_DB) as conn:
+    with connect(MOD_DB) as conn:
         c = conn.cursor()
         c.execute("""
             SELECT type, reason, created_at, duration, issued_by FROM infractions
@@ -105,16 +154,23 @@ def get_infractions(guild_id, user_id):
         return c.fetchall()
     
 def add_note(user_id, note, added_by):
-    with sqlite3.connect(MOD_DB) as conn:
+    with connect(MOD_DB) as conn:
         c = conn.cursor()
         c.execute("""
             INSERT INTO notes (user_id, note, added_by, timestamp)
             VALUES (?, ?, ?, datetime('now'))
         """, (user_id, note, added_by))
-        conn.commit()
         
+def add_notes(rows):
+    """Insert many (user_id, note, added_by, timestamp) rows at once"""
+    with connect(MOD_DB) as conn:
+        conn.executemany("""
+            INSERT INTO notes (user_id, note, added_by, timestamp)
+            VALUES (?, ?, ?, ?)
+        """, rows)
+
 def get_notes(user_id):
-    with sqlite3.connect(MOD_DB) as conn:
+    with connect(MOD_DB) as conn:
         c = conn.cursor()
         c.execute("""
             SELECT note, added_by, timestamp FROM notes
@@ -127,17 +183,16 @@ def get_notes(user_id):
 
 def create_embed(guild_id, name, embed_config, language, creator_id, editors='', contributors='', editor_role=None, edit_permissions='edit,delete,add_language'):
     """Create a new embed"""
-    with sqlite3.connect(EMBED_DB) as conn:
+    with connect(EMBED_DB) as conn:
         c = conn.cursor()
         c.execute("""
             INSERT INTO embeds (guild_id, name, embed, language, creator_id, editors, contributors, editor_role, edit_permissions)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (guild_id, name, json.dumps(embed_config), language, creator_id, editors, contributors, editor_role, edit_permissions))
-        conn.commit()
 
 def update_embed(guild_id, name, language, embed_config=None, **kwargs):
     """Update an existing embed"""
-    with sqlite3.connect(EMBED_DB) as conn:
+    with connect(EMBED_DB) as conn:
         c = conn.cursor()
         fields = []
         values = []
@@ -154,21 +209,19 @@ def update_embed(guild_id, name, language, embed_config=None, **kwargs):
             WHERE guild_id=? AND name=? AND language=?
         """, values)
         updated = c.rowcount > 0
-        conn.commit()
         return updated
 
 def delete_embed(guild_id, name):
     """Delete an embed (all languages)"""
-    with sqlite3.connect(EMBED_DB) as conn:
+    with connect(EMBED_DB) as conn:
         c = conn.cursor()
         c.execute("DELETE FROM embeds WHERE guild_id=? AND name=?", (guild_id, name))
         deleted = c.rowcount > 0
-        conn.commit()
         return deleted
 
 def get_embed(guild_id, name, language):
     """Get an embed for a specific language"""
-    with sqlite3.connect(EMBED_DB) as conn:
+    with connect(EMBED_DB) as conn:
         c = conn.cursor()
         c.execute("""
             SELECT guild_id, name, embed, language, creator_id, editors, contributors, editor_role, edit_permissions
@@ -191,7 +244,7 @@ def get_embed(guild_id, name, language):
 
 def get_all_embeds(guild_id):
     """Get all embeds for a guild"""
-    with sqlite3.connect(EMBED_DB) as conn:
+    with connect(EMBED_DB) as conn:
         c = conn.cursor()
         c.execute("""
             SELECT guild_id, name, embed, language, creator_id, editors, contributors, editor_role, edit_permissions
@@ -214,17 +267,22 @@ def get_all_embeds(guild_id):
 
 def create_autoresponder(guild_id, name, trigger, response, creator_id, language, editors='', contributors='', editor_role=None, edit_permissions='edit,delete,add_language', arguments='none'):
     """Create a new autoresponder"""
-    with sqlite3.connect(AR_DB) as conn:
+    with connect(AR_DB) as conn:
         c = conn.cursor()
         c.execute("""
             INSERT INTO autoresponders (guild_id, name, trigger, response, language, creator_id, editors, contributors, editor_role, edit_permissions, arguments)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (guild_id, name, trigger, response, language, creator_id, editors, contributors, editor_role, edit_permissions, arguments))
-        conn.commit()
+        _log_change(conn, "autoresponders", guild_id)
+    after_commit(AR_DB, lambda: ar_index.created(guild_id, {
+        'guild_id': guild_id, 'name': name, 'trigger': trigger, 'response': response,
+        'language': language, 'creator_id': creator_id, 'editors': editors, 'contributors': contributors,
+        'editor_role': editor_role, 'edit_permissions': edit_permissions, 'arguments': arguments
+    }))
 
 def update_autoresponder(guild_id, name, language, **kwargs):
     """Update an existing autoresponder"""
-    with sqlite3.connect(AR_DB) as conn:
+    with connect(AR_DB) as conn:
         c = conn.cursor()
         fields = ', '.join(f"{key}=?" for key in kwargs)
         values = list(kwargs.values()) + [guild_id, name, language]
@@ -233,28 +291,34 @@ def update_autoresponder(guild_id, name, language, **kwargs):
             WHERE guild_id=? AND name=? AND language=?
         """, values)
         updated = c.rowcount > 0
-        conn.commit()
-        return updated
+        if updated:
+            _log_change(conn, "autoresponders", guild_id)
+    if updated:
+        after_commit(AR_DB, lambda: ar_index.updated(guild_id, name, language, kwargs))
+    return updated
 
 def delete_autoresponder(guild_id, name):
     """Delete an autoresponder (all languages)"""
-    with sqlite3.connect(AR_DB) as conn:
+    with connect(AR_DB) as conn:
         c = conn.cursor()
         c.execute("DELETE FROM autoresponders WHERE guild_id=? AND name=?", (guild_id, name))
         deleted = c.rowcount > 0
-        conn.commit()
-        return deleted
+        if deleted:
+            _log_change(conn, "autoresponders", guild_id)
+    if deleted:
+        after_commit(AR_DB, lambda: ar_index.deleted(guild_id, name))
+    return deleted
 
 def autoresponder_exists(guild_id, name):
     """Check if an autoresponder exists"""
-    with sqlite3.connect(AR_DB) as conn:
+    with connect(AR_DB) as conn:
         c = conn.cursor()
         c.execute("SELECT 1 FROM autoresponders WHERE guild_id=? AND name=?", (guild_id, name))
         return c.fetchone() is not None
 
 def get_autoresponder(guild_id, name, language):
     """Get an autoresponder for a specific language"""
-    with sqlite3.connect(AR_DB) as conn:
+    with connect(AR_DB) as conn:
         c = conn.cursor()
         c.execute("""
             SELECT guild_id, name, trigger, response, language, creator_id, editors, contributors, editor_role, edit_permissions, arguments
@@ -271,7 +335,7 @@ def get_autoresponder(guild_id, name, language):
 
 def get_all_autoresponders(guild_id):
     """Get all autoresponders for a guild"""
-    with sqlite3.connect(AR_DB) as conn:
+    with connect(AR_DB) as conn:
         c = conn.cursor()
         c.execute("""
             SELECT guild_id, name, trigger, response, language, creator_id, editors, contributors, editor_role, edit_permissions, arguments
@@ -286,11 +350,188 @@ def get_all_autoresponders(guild_id):
 
 def get_guild_triggers(guild_id):
     """Get all triggers for a guild"""
-    with sqlite3.connect(AR_DB) as conn:
+    with connect(AR_DB) as conn:
         c = conn.cursor()
         c.execute("""
             SELECT DISTINCT name, trigger
             FROM autoresponders WHERE guild_id=?
         """, (guild_id,))
         rows = c.fetchall()
-        return [{'name': row[0], 'trigger': row[1]} for row in rows]
\ No newline at end of file
+        return [{'name': row[0], 'trigger': row[1]} for row in rows]
+
+def load_guild_autoresponders(guild_id):
+    """Load a guild's autoresponders into the in-memory index"""
+    guild = GuildAutoresponders(get_all_autoresponders(guild_id))
+    after_commit(AR_DB, lambda: ar_index.put(guild_id, guild))
+    return guild
+
+def get_guild_autoresponders(guild_id):
+    """Get the in-memory autoresponder index for a guild, loading it on first use"""
+    guild = ar_index.get(guild_id)
+    if guild is None:
+        guild = load_guild_autoresponders(guild_id)
+    return guild
+
+# scheduled message deletes
+def add_scheduled_delete(channel_id, message_id, delete_at, guild_id=None):
+    """Remember a message to delete at delete_at (unix time)"""
+    with connect(AR_DB) as conn:
+        conn.execute("""
+            INSERT OR REPLACE INTO scheduled_deletes (message_id, channel_id, delete_at, guild_id)
+            VALUES (?, ?, ?, ?)
+        """, (message_id, channel_id, delete_at, guild_id))
+
+def remove_scheduled_deletes(message_ids):
+    """Forget scheduled deletes that were carried out or are no longer needed"""
+    with connect(AR_DB) as conn:
+        conn.executemany("DELETE FROM scheduled_deletes WHERE message_id=?", ((id,) for id in message_ids))
+
+def get_scheduled_deletes(shard_count=1, shard_ids=None):
+    """Get pending deletes as (delete_at, message_id, channel_id), soonest first.
+
+    with shard_ids, only those of guilds on these shards. rows without a guild count as shard 0.
+    """
+    with connect(AR_DB) as conn:
+        c = conn.cursor()
+        if shard_ids is None:
+            c.execute("SELECT delete_at, message_id, channel_id FROM scheduled_deletes ORDER BY delete_at")
+        else:
+            # the shard as sharding.shard_for computes it
+            c.execute(f"""
+                SELECT delete_at, message_id, channel_id FROM scheduled_deletes
+                WHERE (COALESCE(guild_id, 0) >> 22) % ? IN ({",".join("?" * len(shard_ids))})
+                ORDER BY delete_at
+            """, (shard_count, *shard_ids))
+        return c.fetchall()
+
+# autoresponder replies spilled out of memory
+def add_ar_replies(replies):
+    """Store (message_id, name, creator_id, trigger, created_at) rows"""
+    with connect(AR_DB) as conn:
+        conn.executemany("""
+            INSERT OR REPLACE INTO ar_replies (message_id, name, creator_id, trigger, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, replies)
+
+def get_ar_reply(message_id):
+    """Get a stored reply as (name, creator_id, trigger, created_at), or None"""
+    with connect(AR_DB) as conn:
+        c = conn.cursor()
+        c.execute("SELECT name, creator_id, trigger, created_at FROM ar_replies WHERE message_id=?", (message_id,))
+        return c.fetchone()
+
+def delete_ar_reply(message_id):
+    with connect(AR_DB) as conn:
+        conn.execute("DELETE FROM ar_replies WHERE message_id=?", (message_id,))
+
+def prune_ar_replies(before):
+    """Forget stored replies created before the given unix time"""
+    with connect(AR_DB) as conn:
+        return conn.execute("DELETE FROM ar_replies WHERE created_at < ?", (before,)).rowcount
+
+# cached wikipedia lookups
+def add_wiki_articles(rows):
+    """Store (language, query, title, summary, url, fetched_at) rows, title None for a miss"""
+    with connect(WIKI_DB) as conn:
+        conn.executemany("""
+            INSERT OR REPLACE INTO wiki_articles (language, query, title, summary, url, fetched_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
+
+def get_wiki_article(language, query):
+    """Get a cached lookup as (title, summary, url, fetched_at), or None"""
+    with connect(WIKI_DB) as conn:
+        c = conn.cursor()
+        c.execute("""
+            SELECT title, summary, url, fetched_at FROM wiki_articles
+            WHERE language=? AND query=?
+        """, (language, query))
+        return c.fetchone()
+
+def prune_wiki_articles(before):
+    """Forget cached lookups fetched before the given unix time"""
+    with connect(WIKI_DB) as conn:
+        return conn.execute("DELETE FROM wiki_articles WHERE fetched_at < ?", (before,)).rowcount
+
+# offline wiki article index
+def replace_wiki_index(language, articles, trigrams):
+    """Swap the whole index of a language for (key, title, summary, url) rows and (trigram, key) rows"""
+    with connect(WIKI_DB) as conn:
+        conn.execute("DELETE FROM wiki_index WHERE language=?", (language,))
+        conn.execute("DELETE FROM wiki_trigrams WHERE language=?", (language,))
+        conn.executemany("""
+            INSERT OR REPLACE INTO wiki_index (language, key, title, summary, url)
+            VALUES (?, ?, ?, ?, ?)
+        """, ((language, *row) for row in articles))
+        conn.executemany("""
+            INSERT OR IGNORE INTO wiki_trigrams (language, trigram, key) VALUES (?, ?, ?)
+        """, ((language, *row) for row in trigrams))
+
+def get_indexed_article(languages, key):
+    """Get (title, summary, url) of an indexed article, trying each language in order, or None"""
+    with connect(WIKI_DB) as conn:
+        c = conn.cursor()
+        for language in languages:
+            c.execute("SELECT title, summary, url FROM wiki_index WHERE language=? AND key=?", (language, key))
+            row = c.fetchone()
+            if row is not None:
+                return row
+        return None
+
+def get_indexed_prefix(language, prefix, limit):
+    """Get up to limit (key, title) rows whose key starts with prefix"""
+    with connect(WIKI_DB) as conn:
+        c = conn.cursor()
+        c.execute("""
+            SELECT key, title FROM wiki_index
+            WHERE language=? AND key >= ? AND key < ?
+            ORDER BY key LIMIT ?
+        """, (language, prefix, prefix + "\U0010ffff", limit))
+        return c.fetchall()
+
+def get_trigram_matches(language, trigrams, limit):
+    """Get (key, title, shared trigrams) for the keys sharing the most trigrams"""
+    with connect(WIKI_DB) as conn:
+        c = conn.cursor()
+        c.execute(f"""
+            SELECT t.key, i.title, COUNT(*) AS shared FROM wiki_trigrams t
+            JOIN wiki_index i ON i.language = t.language AND i.key = t.key
+            WHERE t.language=? AND t.trigram IN ({",".join("?" * len(trigrams))})
+            GROUP BY t.key ORDER BY shared DESC, t.key LIMIT ?
+        """, (language, *trigrams, limit))
+        return c.fetchall()
+
+# cluster change log. a change is logged in the same transaction as the
+# write it describes, so no other process can see it before the new row
+def _log_change(conn, kind, key):
+    if CLUSTER_ID is not None:
+        conn.execute("""
+            INSERT INTO changes (origin, kind, key, created_at) VALUES (?, ?, ?, ?)
+        """, (CHANGE_ORIGIN, kind, str(key), time.time()))
+
+def log_change(kind, key="", path=CONF_DB):
+    """Record a change that has no row of its own, like a reload"""
+    with connect(path) as conn:
+        _log_change(conn, kind, key)
+
+def get_changes(path, after):
+    """Get (id, origin, kind, key) of every change logged after the given id, oldest first"""
+    with connect(path) as conn:
+        c = conn.cursor()
+        c.execute("SELECT id, origin, kind, key FROM changes WHERE id > ? ORDER BY id", (after,))
+        return c.fetchall()
+
+def get_last_change(path):
+    """Get the id of the newest logged change, 0 if there is none"""
+    with connect(path) as conn:
+        return conn.execute("SELECT COALESCE(MAX(id), 0) FROM changes").fetchone()[0]
+
+def get_data_version(path):
+    """Get a number that changes whenever another connection commits to the database"""
+    with connect(path) as conn:
+        return conn.execute("PRAGMA data_version").fetchone()[0]
+
+def prune_changes(path, before):
+    """Forget changes logged before the given unix time"""
+    with connect(path) as conn:
+        return conn.execute("DELETE FROM changes WHERE created_at < ?", (before,)).rowcount
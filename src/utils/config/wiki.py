@@ -0,0 +1,59 @@
+from src.utils.config.pool import connect
+from src.utils.config.migrations import migrate
+import dotenv
+import os
+
+dotenv.load_dotenv()
+db_path = os.getenv("DB_PATH", "db")
+WIKI_DB = f"{db_path}/wiki.db"
+
+def init_wiki():
+    """initializes the wiki cache database"""
+    with connect(WIKI_DB) as conn:
+        c = conn.cursor()
+        # one row per (language, normalized query). title is NULL when
+        # neither wikipedia had the article, so misses are cached too.
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS wiki_articles (
+                language TEXT,
+                query TEXT,
+                title TEXT,
+                summary TEXT,
+                url TEXT,
+                fetched_at REAL,
+                PRIMARY KEY (language, query)
+            ) WITHOUT ROWID
+        """)
+        conn.commit()
+    migrate(WIKI_DB, WIKI_MIGRATIONS)
+
+
+def _article_index(conn):
+    # the offline article index, see src/utils/wikiindex.py. the primary key
+    # b-tree doubles as a title trie: a prefix is a range scan on key.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS wiki_index (
+            language TEXT,
+            key TEXT,
+            title TEXT,
+            summary TEXT,
+            url TEXT,
+            PRIMARY KEY (language, key)
+        ) WITHOUT ROWID
+    """)
+    # trigram -> key inverted index for typo-tolerant matching
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS wiki_trigrams (
+            language TEXT,
+            trigram TEXT,
+            key TEXT,
+            PRIMARY KEY (language, trigram, key)
+        ) WITHOUT ROWID
+    """)
+
+
+# schema upgrades, applied in order by migrate(). never edit or reorder a
+# released entry, append a new one instead.
+WIKI_MIGRATIONS = [
+    _article_index,
+]
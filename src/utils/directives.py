@@ -0,0 +1,130 @@
+import re
+from functools import lru_cache
+from src.utils.template import compile_template
+
+PATTERNS = {
+    "interaction": re.compile(r"\{interaction:([^:]*):([^:]*)(?::([^}]*))?\}"),
+    "action": re.compile(r"\{action:(\{[^}]*\}|[^:]*):([^}]*)\}"),
+    "dm": re.compile(r"\{dm(?::([^}]*))?\}"),
+    "delete": re.compile(r"\{delete\}"),
+    "delete_response": re.compile(r"\{delete_response(?::(\d+))?\}"),
+    "if": re.compile(r"\{if:([^:]*):([^:]*)(?::([^}]*))?\}"),
+    "role": re.compile(r"\{role(?::([^:]*))?:([^}]*)\}"),
+    "embed": re.compile(r"\{embed:([^}]*)\}"),
+    "react": re.compile(r"\{react:(.*?)\}"),
+}
+
+
+def _error(message):
+    return {"error": message}
+
+
+def parse_response(text):
+    """split the directives out of an autoresponder response.
+
+    returns a dict with the remaining text compiled as a template and every
+    directive found in it, or {"error": ...} if a directive is malformed.
+    the result is shared between messages and must not be mutated.
+    """
+    reactions, interactions, actions, conditions, roles_to_modify = [], [], {}, [], []
+    should_delete = False
+    delete_response_delay = None
+    dm_target = None
+    embed_name = None
+
+    try:
+        for emoji in PATTERNS["react"].findall(text):
+            reactions.append(emoji)
+        text = PATTERNS["react"].sub("", text)
+
+        for match in PATTERNS["interaction"].finditer(text):
+            x, y, z = match.groups()
+            if not x or not y:
+                return _error("Error: {interaction} requires type and value.")
+            if x not in ["reaction", "button"]:
+                return _error("Error: {interaction} type must be 'reaction' or 'button'.")
+            nametag = z if z else y
+            interactions.append({"type": x, "value": y, "nametag": nametag})
+        text = PATTERNS["interaction"].sub("", text)
+
+        for match in PATTERNS["action"].finditer(text):
+            x, y = match.groups()
+            if not x or not y:
+                return _error("Error: {action} requires action and nametag.")
+            actions[y] = x
+        text = PATTERNS["action"].sub("", text)
+
+        dm_match = PATTERNS["dm"].search(text)
+        if dm_match:
+            target = dm_match.group(1) or "user"
+            if target not in ["user", "mention"]:
+                return _error("Error: {dm} target must be 'user' or 'mention'.")
+            dm_target = target
+        text = PATTERNS["dm"].sub("", text)
+
+        if PATTERNS["delete"].search(text):
+            should_delete = True
+        text = PATTERNS["delete"].sub("", text)
+
+        delete_response_match = PATTERNS["delete_response"].search(text)
+        if delete_response_match:
+            delay = delete_response_match.group(1)
+            try:
+                delete_response_delay = int(delay) if delay else 10
+            except ValueError:
+                return _error("Error: Invalid delay for {delete_response}.")
+        text = PATTERNS["delete_response"].sub("", text)
+
+        for match in PATTERNS["if"].finditer(text):
+            x, y, z = match.groups()
+            if not x or not y:
+                return _error("Error: {if} requires type and value.")
+            if x not in ["user", "channel", "role"]:
+                return _error("Error: {if} type must be 'user', 'channel', or 'role'.")
+            action = z if z else "allow"
+            if action not in ["allow", "ignore"]:
+                return _error("Error: {if} action must be 'allow' or 'ignore'.")
+            conditions.append({"type": x, "template": compile_template(y), "action": action})
+        text = PATTERNS["if"].sub("", text)
+
+        for match in PATTERNS["role"].finditer(text):
+            x, y = match.groups()
+            if not y:
+                return _error("Error: {role} requires a role.")
+            action = x if x else "add"
+            if action not in ["add", "remove"]:
+                return _error("Error: {role} action must be 'add' or 'remove'.")
+            roles_to_modify.append({"action": action, "role": y})
+        text = PATTERNS["role"].sub("", text)
+
+        embed_match = PATTERNS["embed"].search(text)
+        if embed_match:
+            embed_name = embed_match.group(1)
+        text = PATTERNS["embed"].sub("", text)
+    except Exception as e:
+        return _error(f"Error: Failed to parse placeholders: {e}")
+
+    if interactions and not actions:
+        return _error("Error: {interaction} requires {action}.")
+
+    template = compile_template(text)
+    return {
+        "error": None,
+        "template": template,
+        "names": template.names.union(*(c["template"].names for c in conditions)),
+        "reactions": reactions,
+        "interactions": interactions,
+        "actions": actions,
+        "dm_target": dm_target,
+        "delete": should_delete,
+        "delete_after": delete_response_delay,
+        "conditions": conditions,
+        "roles": roles_to_modify,
+        "embed_name": embed_name,
+    }
+
+
+@lru_cache(maxsize=1024)
+def parse_cached(text):
+    """parse_response for text that is not stored with an autoresponder row"""
+    return parse_response(text)
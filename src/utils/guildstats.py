@@ -0,0 +1,92 @@
+from src.utils.sharding import shard_for
+
+
+class GuildStats:
+    """member and role counters for one guild"""
+
+    __slots__ = ("humans", "bots", "roles")
+
+    def __init__(self, humans=0, bots=0, roles=0):
+        self.humans = humans
+        self.bots = bots
+        self.roles = roles
+
+    def __repr__(self):
+        return f"<GuildStats humans={self.humans} bots={self.bots} roles={self.roles}>"
+
+
+class GuildStatsTracker:
+    """per-guild counters kept up to date from gateway events.
+
+    each guild is counted once when it is seeded and after that only
+    adjusted by member and role events, so reading a count is O(1).
+    guilds are partitioned by shard, so a shard that starts a new session
+    can be recounted without touching the others.
+    """
+
+    def __init__(self):
+        self.shards = {}
+
+    def _find(self, guild_id):
+        guilds = self.shards.get(shard_for(guild_id))
+        return None if guilds is None else guilds.get(guild_id)
+
+    def seed(self, guild):
+        """count a guild's members and roles from the cache"""
+        bots = sum(1 for m in guild.members if m.bot)
+        stats = GuildStats(
+            humans=len(guild.members) - bots,
+            bots=bots,
+            # every guild has @everyone, which is not counted
+            roles=max(len(guild.roles) - 1, 0),
+        )
+        self.shards.setdefault(shard_for(guild.id), {})[guild.id] = stats
+        return stats
+
+    def get(self, guild):
+        """get the counters for a guild, seeding them if it has not been seen yet"""
+        stats = self._find(guild.id)
+        if stats is None:
+            stats = self.seed(guild)
+        return stats
+
+    def forget(self, guild_id):
+        self.shards.get(shard_for(guild_id), {}).pop(guild_id, None)
+
+    def forget_shard(self, shard_id):
+        self.shards.pop(shard_id, None)
+
+    def sizes(self):
+        """{shard id: guilds counted}"""
+        return {shard_id: len(guilds) for shard_id, guilds in self.shards.items()}
+
+    def member_joined(self, member):
+        stats = self._find(member.guild.id)
+        if stats is None:
+            return
+        if member.bot:
+            stats.bots += 1
+        else:
+            stats.humans += 1
+
+    def member_left(self, member):
+        stats = self._find(member.guild.id)
+        if stats is None:
+            return
+        if member.bot:
+            stats.bots = max(stats.bots - 1, 0)
+        else:
+            stats.humans = max(stats.humans - 1, 0)
+
+    def role_created(self, role):
+        stats = self._find(role.guild.id)
+        if stats is not None:
+            stats.roles += 1
+
+    def role_deleted(self, role):
+        stats = self._find(role.guild.id)
+        if stats is not None:
+            stats.roles = max(stats.roles - 1, 0)
+
+
+guild_stats = GuildStatsTracker()
@@ -1,54 +1,192 @@
 import os
 import json
-from collections import defaultdict
+from collections.abc import Mapping
+
+LOCALES_DIR = "locales"
+
+
+def flatten(data, prefix=""):
+    """map every dotted key path in a nested dict to its value, intermediate dicts included"""
+    flat = {}
+    for key, value in data.items():
+        path = f"{prefix}{key}"
+        if "." in key:
+            # a literal "a.b" key, only used when there is no nested a -> b
+            flat.setdefault(path, value)
+        else:
+            flat[path] = value
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{path}."))
+    return flat
+
+
+def compile_entry(value):
+    """pair a catalog value with whether it has to go through str.format"""
+    # strings without braces format to themselves, so skip format for them
+    return (value, isinstance(value, str) and ("{" in value or "}" in value))
+
+
+def load_language(path, previous=None):
+    """parse every json file of one language, returning ({file: stamp}, {section: data}).
+
+    with previous, the result of an earlier call, only the files whose mtime
+    or size changed are parsed again.
+    """
+    stamps = {}
+    for file in sorted(os.listdir(path)):
+        if file.endswith(".json"):
+            st = os.stat(os.path.join(path, file))
+            stamps[file] = (st.st_mtime_ns, st.st_size)
+    if previous is not None and previous[0] == stamps:
+        return previous
+
+    old_stamps, old_sections = previous or ({}, {})
+    sections = {}
+    for file, stamp in stamps.items():
+        section = file[:-5]
+        if old_stamps.get(file) == stamp and section in old_sections:
+            sections[section] = old_sections[section]
+            continue
+        with open(os.path.join(path, file), encoding="utf-8") as f:
+            sections[section] = json.load(f)
+    return stamps, sections
+
+
+class LanguageCatalog(Mapping):
+    """the parsed locale files of every language, each loaded on first access"""
+
+    def __init__(self, locales_dir=LOCALES_DIR):
+        self.locales_dir = locales_dir
+        self.names = frozenset()
+        # lang -> ({file: (mtime_ns, size)}, {section: data})
+        self._loaded = {}
+
+    def _scan(self):
+        return frozenset(
+            lang for lang in os.listdir(self.locales_dir)
+            if os.path.isdir(os.path.join(self.locales_dir, lang))
+        )
+
+    def discover(self):
+        """find the language directories and forget anything loaded before"""
+        self.names = self._scan()
+        self._loaded = {}
+
+    def refresh(self):
+        """re-read only the locale files that changed on disk since they were loaded.
+
+        the new state is built aside and swapped in at the end, so readers see
+        either the old catalog or the new one. returns the languages that changed.
+        """
+        names = self._scan()
+        changed = set(names ^ self.names)
+        loaded = {}
+        for lang, previous in self._loaded.items():
+            if lang not in names:
+                continue
+            path = os.path.join(self.locales_dir, lang)
+            current = load_language(path, previous)
+            if current is not previous:
+                changed.add(lang)
+            loaded[lang] = current
+        self.names, self._loaded = names, loaded
+        return changed
+
+    def loaded(self):
+        """the languages parsed so far"""
+        return list(self._loaded)
+
+    def __getitem__(self, lang):
+        entry = self._loaded.get(lang)
+        if entry is None:
+            if lang not in self.names:
+                raise KeyError(lang)
+            entry = self._loaded[lang] = load_language(os.path.join(self.locales_dir, lang))
+        return entry[1]
+
+    def __contains__(self, lang):
+        return lang in self.names
+
+    def __iter__(self):
+        return iter(sorted(self.names))
+
+    def __len__(self):
+        return len(self.names)
+
 
 class Localization:
-    def __init__(self, default_lang="en"):
+    def __init__(self, default_lang="en", locales_dir=LOCALES_DIR):
         self.default_lang = default_lang
-        self.languages = defaultdict(dict)
+        self.languages = LanguageCatalog(locales_dir)
+        # lang -> (own, resolved), each {section: {dotted key: (value, needs format)}}.
+        # resolved has the default language filled in for missing keys
+        self.tables = {}
         self.load_languages()
 
     def load_languages(self):
-        """Load all language files"""
-        locales_dir = "locales"
-        for lang in os.listdir(locales_dir):
-            lang_path = os.path.join(locales_dir, lang)
-            if os.path.isdir(lang_path):
-                for file in os.listdir(lang_path):
-                    if file.endswith(".json"):
-                        key = file[:-5]
-                        with open(os.path.join(lang_path, file), encoding="utf-8") as f:
-                            self.languages[lang][key] = json.load(f)
+        """Load all language files. only the default language is parsed now, the rest on first use"""
+        self.languages.discover()
+        self.tables = {}
+        self._tables(self.default_lang)
+
+    def reload(self):
+        """pick up changed locale files without a restart. returns the languages that changed.
+
+        only the changed files are parsed again and only the tables built from
+        them are dropped. the new tables dict replaces the old one in one step.
+        """
+        changed = self.languages.refresh()
+        if self.default_lang in changed:
+            # every language falls back to the default one
+            tables = {}
+        else:
+            tables = {lang: t for lang, t in self.tables.items() if lang not in changed}
+        self.tables = tables
+        self._tables(self.default_lang)
+        return changed
+
+    def _tables(self, lang):
+        tables = self.tables.get(lang)
+        if tables is not None:
+            return tables
+        if lang not in self.languages:
+            # not stored, so unknown language codes cannot grow the table
+            if lang == self.default_lang:
+                return ({}, {})
+            return ({}, self._tables(self.default_lang)[1])
+
+        own = {
+            section: {key: compile_entry(value) for key, value in flatten(data).items() if value is not None}
+            for section, data in self.languages[lang].items() if isinstance(data, dict)
+        }
+        if lang == self.default_lang:
+            resolved = own
+        else:
+            default = self._tables(self.default_lang)[0]
+            resolved = {section: {**entries, **own.get(section, {})} for section, entries in default.items()}
+            for section, entries in own.items():
+                resolved.setdefault(section, entries)
+        tables = self.tables[lang] = (own, resolved)
+        return tables
 
     def get(self, section, key, lang=None, fallback=True, **kwargs):
         """get a localized string"""
         lang = lang or self.default_lang
-        keys = key.split('.')
-
-        current = self.languages.get(lang, {}).get(section, {})
-        
-        for k in keys:
-            if isinstance(current, dict):
-                current = current.get(k)
-            else:
-                current = None
-                break
-
-        if current is None and fallback and lang != self.default_lang:
-            current = self.languages.get(self.default_lang, {}).get(section, {})
-            for k in keys:
-                if isinstance(current, dict):
-                    current = current.get(k)
-                else:
-                    current = None
-                    break
-                
-        if isinstance(current, str):
+        tables = self.tables.get(lang) or self._tables(lang)
+        entries = tables[1 if fallback else 0].get(section)
+        if entries is None:
+            return None
+        entry = entries.get(key)
+        if entry is None:
+            return None
+
+        value, needs_format = entry
+        if needs_format:
             try:
-                return current.format(**kwargs)
+                return value.format(**kwargs)
             except KeyError:
-                return current
-        return current
+                return value
+        return value
 
 localization = Localization()
-supported_languages = ['en', 'es', 'fr', 'de', 'it', 'pt', 'ru', 'ja', 'ko', 'zh']
\ No newline at end of file
+supported_languages = ['en', 'es', 'fr', 'de', 'it', 'pt', 'ru', 'ja', 'ko', 'zh']
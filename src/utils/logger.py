@@ -0,0 +1,85 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+# every module logs under this logger, see get_logger
+ROOT = "bot"
+FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+LEVELS = {"DEVELOPMENT": logging.DEBUG}
+
+_listener = None
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """hands records to the listener thread without formatting them first.
+
+    the stock handler merges msg and args on the calling thread so the record
+    can be pickled. our queue never leaves the process, so formatting is left
+    to the listener and the event loop only pays for an enqueue.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def get_logger(name):
+    """get the logger for a module, e.g. get_logger(__name__).
+
+    pass arguments instead of formatting the message yourself, like
+    log.debug("sent %s", thing), so disabled levels cost nothing.
+    """
+    if name.startswith("src."):
+        name = name[4:]
+    return logging.getLogger(f"{ROOT}.{name}")
+
+
+def setup_logging(name, env="DEVELOPMENT", level=None):
+    """send the bot's and discord.py's logs to {name}.log and stdout from a background thread.
+
+    the level is LOG_LEVEL if set, DEBUG in development and INFO otherwise.
+    call it once, before the bot runs, and pass log_handler=None to bot.run.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    level = level or os.getenv("LOG_LEVEL") or LEVELS.get(env, logging.INFO)
+    if isinstance(level, str):
+        # setLevel only knows upper case names, LOG_LEVEL=debug should work too
+        names = logging.getLevelNamesMapping()
+        if level.upper() not in names:
+            raise ValueError(f"Unknown log level {level!r}, use one of {', '.join(names)}")
+        level = names[level.upper()]
+
+    formatter = logging.Formatter(FORMAT)
+    handlers = [logging.FileHandler(f"{name}.log", encoding="utf-8"), logging.StreamHandler(sys.stdout)]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    records = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    handler = _QueueHandler(records)
+    for logger_name in (ROOT, "discord"):
+        logger = logging.getLogger(logger_name)
+        logger.addHandler(handler)
+        logger.setLevel(level)
+        logger.propagate = False
+    # discord.py's http debug output is a firehose, keep it at info
+    logging.getLogger("discord.http").setLevel(max(logging.getLogger("discord").level, logging.INFO))
+
+
+def stop_logging():
+    """write out every queued record and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+# registered on import, so it runs after the exit hooks of every module that
+# logs: atexit calls hooks in reverse order and those modules import this one
+atexit.register(stop_logging)
@@ -0,0 +1,62 @@
+from collections import deque
+
+
+class TriggerMatcher:
+    """aho-corasick automaton over a list of autoresponder triggers.
+
+    triggers are matched case-insensitively as substrings, exactly like
+    `trigger.lower() in content.lower()`, but every trigger is found in a
+    single pass over the message instead of one scan per trigger.
+    """
+
+    def __init__(self, triggers):
+        self.triggers = tuple(triggers)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self._always = []
+
+        for index, trigger in enumerate(self.triggers):
+            trigger = (trigger or "").lower()
+            if not trigger:
+                # "" in content is always true
+                self._always.append(index)
+                continue
+            state = 0
+            for char in trigger:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(index)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def __len__(self):
+        return len(self.triggers)
+
+    def matches(self, content):
+        """return the indexes of every trigger found in content, in trigger order"""
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set(self._always)
+        state = 0
+        for char in content.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found.update(out[state])
+        return sorted(found)
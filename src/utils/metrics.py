@@ -0,0 +1,330 @@
+import asyncio
+import functools
+import inspect
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from src.utils.config.cache import cache_stats
+from src.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+# upper bounds, in seconds, of the latency histogram buckets
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+# serve /metrics on this local port, 0 turns it off
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+# print a summary line this often, in seconds, 0 turns it off
+METRICS_LOG_INTERVAL = float(os.getenv("METRICS_LOG_INTERVAL", "0"))
+# seconds between samples of every shard's latency and event rate
+SHARD_SAMPLE_INTERVAL = float(os.getenv("SHARD_SAMPLE_INTERVAL", "30"))
+
+
+class Span:
+    """one timing in progress, see Timer.time"""
+
+    __slots__ = ("timer", "start")
+
+    def __init__(self, timer):
+        self.timer = timer
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.observe(time.perf_counter() - self.start)
+
+
+class Timer:
+    """count, total, max and a bucketed histogram of observed durations"""
+
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # one slot per bucket plus one for everything slower
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+
+    def time(self):
+        """time a block, awaits inside it included. spans can overlap"""
+        return Span(self)
+
+    def copy(self):
+        copy = Timer()
+        copy.count, copy.total, copy.max, copy.buckets = self.count, self.total, self.max, list(self.buckets)
+        return copy
+
+    @property
+    def avg(self):
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q):
+        """estimate a quantile as the upper bound of the bucket it falls in"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class Metrics:
+    """process-wide counters and timers, keyed by name and labels.
+
+    look a metric up once and keep the handle, updating it is then a few
+    attribute writes. a handle should only be updated from one thread, the
+    event loop or the database thread, so no lock is taken on the hot path.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.timers = {}
+        # name -> function returning {field: number}, read when metrics are shown
+        self.gauges = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def _get(self, table, factory, name, labels):
+        key = (name, tuple(sorted(labels.items())))
+        metric = table.get(key)
+        if metric is None:
+            with self._lock:
+                metric = table.setdefault(key, factory())
+        return metric
+
+    def counter(self, name, **labels):
+        return self._get(self.counters, Counter, name, labels)
+
+    def timer(self, name, **labels):
+        return self._get(self.timers, Timer, name, labels)
+
+    def gauge(self, name, read):
+        """report read()'s {field: number} under name, replacing an earlier gauge of that name"""
+        self.gauges[name] = read
+
+    def read_gauges(self):
+        """{name: {field: number}} of every gauge, skipping any that fail to read"""
+        values = {}
+        for name, read in list(self.gauges.items()):
+            try:
+                values[name] = read()
+            except Exception as e:
+                log.warning("Failed to read gauge %s: %s", name, e)
+        return values
+
+    def timed(self, name, **labels):
+        """decorator timing every call of a function or coroutine function"""
+        timer = self.timer(name, **labels)
+
+        def decorator(func):
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def wrapper(*args, **kwargs):
+                    with Span(timer):
+                        return await func(*args, **kwargs)
+            else:
+                @functools.wraps(func)
+                def wrapper(*args, **kwargs):
+                    with Span(timer):
+                        return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """({key: value} of every counter, {key: Timer copy} of every timer)"""
+        with self._lock:
+            counters = list(self.counters.items())
+            timers = list(self.timers.items())
+        return (
+            {key: counter.value for key, counter in counters},
+            {key: timer.copy() for key, timer in timers},
+        )
+
+    def render_prometheus(self):
+        """every metric and cache counter in the prometheus text format"""
+        counters, timers = self.snapshot()
+        lines = [f"bot_uptime_seconds {time.time() - self.started:.0f}"]
+        for (name, labels), value in sorted(counters.items()):
+            lines.append(f"bot_{name}_total{_labels(labels)} {value}")
+        for (name, labels), timer in sorted(timers.items()):
+            seen = 0
+            for bound, count in zip(BUCKETS, timer.buckets):
+                seen += count
+                lines.append(f"bot_{name}_seconds_bucket{_labels(labels + (('le', bound),))} {seen}")
+            lines.append(f"bot_{name}_seconds_bucket{_labels(labels + (('le', '+Inf'),))} {timer.count}")
+            lines.append(f"bot_{name}_seconds_sum{_labels(labels)} {timer.total:.6f}")
+            lines.append(f"bot_{name}_seconds_count{_labels(labels)} {timer.count}")
+        for name, stats in sorted(cache_stats.items()):
+            for field, value in stats.as_dict().items():
+                lines.append(f"bot_cache_{field}{_labels((('cache', name),))} {value}")
+        for name, values in sorted(self.read_gauges().items()):
+            for field, value in values.items():
+                lines.append(f"bot_{name}_{field} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """one line with the headline numbers, for the periodic log"""
+        counters, timers = self.snapshot()
+        parts = [f"uptime {time.time() - self.started:.0f}s"]
+        for (name, labels), timer in sorted(timers.items()):
+            if name in ("on_message", "pl", "discord_send"):
+                label = ",".join(str(v) for _, v in labels)
+                parts.append(f"{name}{f'[{label}]' if label else ''} n={timer.count} avg={timer.avg * 1e3:.2f}ms p99<={timer.quantile(0.99) * 1e3:.1f}ms")
+        queries = sum(v for (name, _), v in counters.items() if name == "db_queries")
+        parts.append(f"db_queries={queries}")
+        return " | ".join(parts)
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+metrics = Metrics()
+
+
+class MetricsExporter:
+    """serves /metrics over plain http on localhost and prints a periodic summary"""
+
+    def __init__(self, port=METRICS_PORT, log_interval=METRICS_LOG_INTERVAL):
+        self.port = port
+        self.log_interval = log_interval
+        self._server = None
+        self._task = None
+
+    async def start(self):
+        if self.port and self._server is None:
+            self._server = await asyncio.start_server(self._handle, "127.0.0.1", self.port)
+        if self.log_interval and self._task is None:
+            self._task = asyncio.create_task(self._log())
+
+    async def stop(self):
+        server, self._server = self._server, None
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readline(), timeout=5)
+            path = request.split()[1] if len(request.split()) > 1 else b"/"
+            if path == b"/metrics":
+                status, body = "200 OK", metrics.render_prometheus().encode()
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.0 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _log(self):
+        while True:
+            await asyncio.sleep(self.log_interval)
+            log.info("metrics: %s", metrics.summary())
+
+
+def _sequence(shard):
+    # ShardInfo exposes the latency but not the gateway sequence number
+    ws = getattr(getattr(shard, "_parent", None), "ws", None)
+    return getattr(ws, "sequence", None)
+
+
+class ShardMonitor:
+    """latency and gateway event rate of every shard in this process.
+
+    the rate comes from each shard's gateway sequence number, which goes up
+    by one per event, so nothing is counted on the event path. samples feed
+    the gateway_events counter and gateway_latency timer per shard.
+    """
+
+    def __init__(self, bot, interval=SHARD_SAMPLE_INTERVAL):
+        self.bot = bot
+        self.interval = interval
+        self.rates = {}
+        self._samples = {}
+        self._task = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def sample(self, min_interval=0.0):
+        """update the rates of shards last sampled at least min_interval seconds ago"""
+        now = time.monotonic()
+        for shard_id, shard in self.bot.shards.items():
+            sequence = _sequence(shard)
+            last = self._samples.get(shard_id)
+            if last is not None and now - last[0] < min_interval:
+                continue
+            self._samples[shard_id] = (now, sequence)
+            if sequence is None or last is None or last[1] is None:
+                continue
+            # a new session starts counting from zero again
+            events = sequence - last[1] if sequence >= last[1] else sequence
+            self.rates[shard_id] = events / (now - last[0])
+            metrics.counter("gateway_events", shard=shard_id).inc(events)
+            if math.isfinite(shard.latency):
+                metrics.timer("gateway_latency", shard=shard_id).observe(shard.latency)
+
+    def report(self):
+        """[(shard id, latency in seconds, events per second or None, guilds)] for every shard"""
+        self.sample(min_interval=1.0)
+        guilds = {}
+        for guild in self.bot.guilds:
+            guilds[guild.shard_id] = guilds.get(guild.shard_id, 0) + 1
+        return [
+            (shard_id, shard.latency, self.rates.get(shard_id), guilds.get(shard_id, 0))
+            for shard_id, shard in sorted(self.bot.shards.items())
+        ]
+
+    async def _run(self):
+        self.sample()
+        while True:
+            await asyncio.sleep(self.interval)
+            self.sample()
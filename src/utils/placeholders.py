@@ -1,8 +1,14 @@
-import re
+import inspect
 import discord
-import json
 import datetime
-from src.utils.config import utils as db
+from src.utils.config import aio as db
+from src.utils.guildstats import guild_stats
+from src.utils.template import render_nested, nested_names
+from src.utils.directives import PATTERNS, parse_cached
+from src.utils.metrics import metrics
+from src.utils.logger import get_logger
+
+log = get_logger(__name__)
 
 def ordinal(n: int):
     if 11 <= (n % 100) <= 13:
@@ -11,165 +17,103 @@ def ordinal(n: int):
         suffix = {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
     return f"{n}{suffix}"
 
-async def pl(message: discord.Message, text: str):
-    reactions, interactions, actions, conditions, roles_to_modify = [], [], {}, [], []
-    should_delete = False
-    delete_response_delay = None
-    dm_target = None
-    embed_name = None
-
-    patterns = {
-        "interaction": r"\{interaction:([^:]*):([^:]*)(?::([^}]*))?\}",
-        "action": r"\{action:(\{[^}]*\}|[^:]*):([^}]*)\}",
-        "dm": r"\{dm(?::([^}]*))?\}",
-        "delete": r"\{delete\}",
-        "delete_response": r"\{delete_response(?::(\d+))?\}",
-        "if": r"\{if:([^:]*):([^:]*)(?::([^}]*))?\}",
-        "role": r"\{role(?::([^:]*))?:([^}]*)\}",
-        "embed": r"\{embed:([^}]*)\}",
-        "react": r"\{react:(.*?)\}",
-    }
-
-    try:
-        for emoji in re.findall(patterns["react"], text):
-            reactions.append(emoji)
-        text = re.sub(patterns["react"], "", text)
+def _dt(value, style="F"):
+    return discord.utils.format_dt(value, style)
 
-        for match in re.finditer(patterns["interaction"], text):
-            x, y, z = match.groups()
-            if not x or not y:
-                return "Error: {interaction} requires type and value.", []
-            if x not in ["reaction", "button"]:
-                return "Error: {interaction} type must be 'reaction' or 'button'.", []
-            nametag = z if z else y
-            interactions.append({"type": x, "value": y, "nametag": nametag})
-        text = re.sub(patterns["interaction"], "", text)
+def _mention(message):
+    return message.mentions[0] if message.mentions else None
 
-        for match in re.finditer(patterns["action"], text):
-            x, y = match.groups()
-            if not x or not y:
-                return "Error: {action} requires action and nametag.", []
-            actions[y] = x
-        text = re.sub(patterns["action"], "", text)
+async def _server_prefix(message):
+    return await db.get_guild_config(message.guild.id, "prefix") or "y;"
 
-        dm_match = re.search(patterns["dm"], text)
-        if dm_match:
-            target = dm_match.group(1) or "user"
-            if target not in ["user", "mention"]:
-                return "Error: {dm} target must be 'user' or 'mention'.", []
-            dm_target = target
-        text = re.sub(patterns["dm"], "", text)
+async def _user_infractions(message):
+    return len(await db.get_infractions(message.guild.id, message.author.id))
 
-        if re.search(patterns["delete"], text):
-            should_delete = True
-        text = re.sub(patterns["delete"], "", text)
-
-        delete_response_match = re.search(patterns["delete_response"], text)
-        if delete_response_match:
-            delay = delete_response_match.group(1)
-            try:
-                delete_response_delay = int(delay) if delay else 10
-            except ValueError:
-                return "Error: Invalid delay for {delete_response}.", []
-        text = re.sub(patterns["delete_response"], "", text)
+# placeholder providers. each takes the triggering message and is only called
+# when a template actually uses its placeholder. providers may be coroutines.
+PLACEHOLDERS = {
+    "user": lambda m: m.author.mention,
+    "user_name": lambda m: m.author.name,
+    "user_id": lambda m: m.author.id,
+    "user_join_date": lambda m: _dt(m.author.joined_at),
+    "user_creation_date": lambda m: _dt(m.author.created_at),
+    "user_top_role": lambda m: m.author.top_role.name,
+    "user_avatar": lambda m: m.author.avatar.url if m.author.avatar else "",
+    "user_banner": lambda m: m.author.banner.url if m.author.banner else "",
+    "mention_name": lambda m: _mention(m).name if m.mentions else "[user]",
+    "mention_id": lambda m: _mention(m).id if m.mentions else "[0000]",
+    "mention_join_date": lambda m: _dt(_mention(m).joined_at) if m.mentions else "[00-00-0000]",
+    "mention_avatar": lambda m: _mention(m).avatar.url if m.mentions and _mention(m).avatar else "[user avatar]",
+    "channel": lambda m: m.channel.mention,
+    "channel_name": lambda m: m.channel.name,
+    "server_name": lambda m: m.guild.name,
+    "server_id": lambda m: m.guild.id,
+    "server_creation_date": lambda m: _dt(m.guild.created_at),
+    "server_roles": lambda m: guild_stats.get(m.guild).roles,
+    "server_channels": lambda m: len(m.guild.channels),
+    "server_level": lambda m: m.guild.premium_tier,
+    "server_boosts": lambda m: m.guild.premium_subscription_count or 0,
+    "server_prefix": _server_prefix,
+    "server_icon": lambda m: m.guild.icon.url if m.guild.icon else "",
+    "member_count_ordinal": lambda m: ordinal(m.guild.member_count),
+    "member_count": lambda m: m.guild.member_count,
+    "member_count_ex_bots": lambda m: guild_stats.get(m.guild).humans,
+    "member_count_ex_bots_ordinal": lambda m: ordinal(guild_stats.get(m.guild).humans),
+    "time": lambda m: _dt(m.created_at),
+    "date": lambda m: _dt(m.created_at, "d"),
+}
 
-        for match in re.finditer(patterns["if"], text):
-            x, y, z = match.groups()
-            if not x or not y:
-                return "Error: {if} requires type and value.", []
-            if x not in ["user", "channel", "role"]:
-                return "Error: {if} type must be 'user', 'channel', or 'role'.", []
-            action = z if z else "allow"
-            if action not in ["allow", "ignore"]:
-                return "Error: {if} action must be 'allow' or 'ignore'.", []
-            conditions.append({"type": x, "value": y, "action": action})
-        text = re.sub(patterns["if"], "", text)
+# only rendered for members with manage_guild, everyone else sees [staff only]
+STAFF_PLACEHOLDERS = {
+    "user_infractions": _user_infractions,
+    "message_id": lambda m: m.id,
+    "message": lambda m: m.content,
+    "message_reactions": lambda m: ", ".join([f"{r.emoji} ({r.count})" for r in m.reactions]),
+    "message_created": lambda m: _dt(m.created_at),
+    "channel_last_message": lambda m: _dt(m.channel.last_message.created_at) if getattr(m.channel, "last_message", None) else "[no message]",
+}
 
-        for match in re.finditer(patterns["role"], text):
-            x, y = match.groups()
-            if not y:
-                return "Error: {role} requires a role.", []
-            action = x if x else "add"
-            if action not in ["add", "remove"]:
-                return "Error: {role} action must be 'add' or 'remove'.", []
-            roles_to_modify.append({"action": action, "role": y})
-        text = re.sub(patterns["role"], "", text)
+async def resolve_placeholders(message: discord.Message, names):
+    """evaluate the providers for the placeholders in names, skipping unknown ones"""
+    values = {}
+    for name in names:
+        provider = PLACEHOLDERS.get(name)
+        if provider is None:
+            provider = STAFF_PLACEHOLDERS.get(name)
+            if provider is None:
+                continue
+            if not message.author.guild_permissions.manage_guild:
+                values[name] = "[staff only]"
+                continue
+        value = provider(message)
+        if inspect.isawaitable(value):
+            value = await value
+        values[name] = str(value)
+    return values
 
-        embed_match = re.search(patterns["embed"], text)
-        if embed_match:
-            embed_name = embed_match.group(1)
-        text = re.sub(patterns["embed"], "", text)
-    except Exception as e:
-        return f"Error: Failed to parse placeholders: {e}", []
+@metrics.timed("pl")
+async def pl(message: discord.Message, text: str, parsed=None):
+    """render an autoresponder response for a message.
 
-    if interactions and not actions:
-        return "Error: {interaction} requires {action}.", []
+    parsed is the stored parse_response() result for text, if the caller has one.
+    """
+    if parsed is None:
+        parsed = parse_cached(text)
+    if parsed["error"]:
+        return parsed["error"], []
 
-    prefix = db.get_guild_config(message.guild.id, "prefix") or "y;"
-    author, channel, guild, mention, dt = message.author, message.channel, message.guild, message.mentions, discord.utils.format_dt
+    reactions = list(parsed["reactions"])
+    interactions, actions, conditions = parsed["interactions"], parsed["actions"], parsed["conditions"]
+    should_delete, delete_response_delay = parsed["delete"], parsed["delete_after"]
+    dm_target, embed_name = parsed["dm_target"], parsed["embed_name"]
 
-    placeholders = {
-        "{user}": author.mention,
-        "{user_name}": author.name,
-        "{user_id}": str(author.id),
-        "{user_join_date}": dt(author.joined_at, "F"),
-        "{user_creation_date}": dt(author.created_at, "F"),
-        "{user_top_role}": author.top_role.name,
-        "{user_avatar}": author.avatar.url if author.avatar else "",
-        "{user_banner}": author.banner.url if author.banner else "",
-        "{mention_name}": mention[0].name if mention else "[user]",
-        "{mention_id}": str(mention[0].id) if mention else "[0000]",
-        "{mention_join_date}": dt(mention[0].joined_at, "F") if mention else "[00-00-0000]",
-        "{mention_avatar}": mention[0].avatar.url if mention and mention[0].avatar else "[user avatar]",
-        "{channel}": channel.mention,
-        "{channel_name}": channel.name,
-        "{server_name}": guild.name,
-        "{server_id}": str(guild.id),
-        "{server_creation_date}": dt(guild.created_at, "F"),
-        "{server_roles}": str(sum(1 for r in guild.roles if r.name != "@everyone")),
-        "{server_channels}": str(len(guild.channels)),
-        "{server_level}": str(guild.premium_tier),
-        "{server_boosts}": str(guild.premium_subscription_count or 0),
-        "{server_prefix}": prefix,
-        "{server_icon}": guild.icon.url if guild.icon else "",
-        "{member_count_ordinal}": ordinal(guild.member_count),
-        "{member_count}": str(guild.member_count),
-        "{member_count_ex_bots}": str(sum(1 for m in guild.members if not m.bot)),
-        "{member_count_ex_bots_ordinal}": ordinal(sum(1 for m in guild.members if not m.bot)),
-        "{time}": dt(message.created_at, "F"),
-        "{date}": dt(message.created_at, "d"),
-    }
+    author, channel, guild, mention = message.author, message.channel, message.guild, message.mentions
 
-    staff_placeholders = {
-        "{user_infractions}": str(len(db.get_infractions(message.guild.id, message.author.id))),
-        "{message_id}": str(message.id),
-        "{message}": message.content,
-        "{message_reactions}": ", ".join([f"{r.emoji} ({r.count})" for r in message.reactions]),
-        "{message_created}": dt(message.created_at, "F"),
-        "{channel_last_message}": dt(message.channel.last_message.created_at, "F") if getattr(message.channel, "last_message", None) else "[no message]"
-    }
-
-    for key, val in placeholders.items():
-        text = text.replace(key, str(val))
-        for condition in conditions:
-            if condition["type"] in ["user", "channel", "role"]:
-                condition["value"] = condition["value"].replace(key, str(val))
-
-    if message.author.guild_permissions.manage_guild:
-        for key, val in staff_placeholders.items():
-            text = text.replace(key, str(val))
-            for condition in conditions:
-                if condition["type"] in ["user", "channel", "role"]:
-                    condition["value"] = condition["value"].replace(key, str(val))
-    else:
-        for key in staff_placeholders.keys():
-            text = text.replace(key, "[staff only]")
-            for condition in conditions:
-                if condition["type"] in ["user", "channel", "role"]:
-                    condition["value"] = condition["value"].replace(key, "[staff only]")
+    values = await resolve_placeholders(message, parsed["names"])
+    text = parsed["template"].render(values)
 
     for condition in conditions:
-        c_type, c_value, c_action = condition["type"], condition["value"], condition["action"]
+        c_type, c_value, c_action = condition["type"], condition["template"].render(values), condition["action"]
         if c_type == "user":
             target = mention[0] if mention and c_value == mention[0].name else author
             if target.name == c_value and c_action == "ignore":
@@ -187,19 +131,11 @@ async def pl(message: discord.Message, text: str):
 
     if embed_name:
         try:
-            embed_config_data = db.get_embed(message.guild.id, embed_name, db.get_language(message.author.id, message.guild.id)).get("embed")
+            embed_config_data = (await db.get_embed(message.guild.id, embed_name, await db.get_language(message.author.id, message.guild.id))).get("embed")
             if embed_config_data:
-                embed_config_text = json.dumps(embed_config_data)
-                print(f"Original embed config: {embed_config_data}")
-                for key, val in placeholders.items():
-                    embed_config_text = embed_config_text.replace(key, str(val))
-                if message.author.guild_permissions.manage_guild:
-                    for key, val in staff_placeholders.items():
-                        embed_config_text = embed_config_text.replace(key, str(val))
-                else:
-                    for key in staff_placeholders.keys():
-                        embed_config_text = embed_config_text.replace(key, "[staff only]")
-                embed_config_data = json.loads(embed_config_text)
+                log.debug("Original embed config: %s", embed_config_data)
+                values.update(await resolve_placeholders(message, nested_names(embed_config_data) - values.keys()))
+                embed_config_data = render_nested(embed_config_data, values)
                 embed = discord.Embed()
                 if embed_config_data.get("title"):
                     embed.title = embed_config_data["title"][:256]
@@ -239,7 +175,7 @@ async def pl(message: discord.Message, text: str):
                         value=field["value"][:1024],
                         inline=field.get("inline", False)
                     )
-                print(f"Processed embed config: {embed}\nEmbed data: {embed.to_dict()}")
+                log.debug("Processed embed config: %s", embed_config_data)
                 response["embed"] = embed
             else:
                 return f"Error: Embed '{embed_name}' not found.", []
@@ -272,7 +208,7 @@ async def pl(message: discord.Message, text: str):
             return
         if action.startswith("{role"):
             try:
-                match = re.match(r"\{role(?::([^:]*))?:([^}]*)\}", action)
+                match = PATTERNS["role"].match(action)
                 if not match:
                     await interaction.response.send_message(f"Error: Malformed role action '{action}'.", ephemeral=True)
                     return
@@ -301,7 +237,7 @@ async def pl(message: discord.Message, text: str):
                 await interaction.response.send_message("Error: Bot lacks permission to add reactions.", ephemeral=True)
         elif action.startswith("{dm"):
             try:
-                dm_action, content = re.match(r"\{dm(?::([^}]*))?\}", action).groups()
+                content = PATTERNS["dm"].match(action).group(1)
                 content = content or "Action triggered!"
                 await interaction.user.send(content)
                 await interaction.response.send_message("DM sent.", ephemeral=True)
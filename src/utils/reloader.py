@@ -0,0 +1,55 @@
+import asyncio
+import src.utils.config as config
+from src.utils.localization import localization
+from src.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+def reload_all():
+    """reload every hot-reloadable file that changed on disk.
+
+    returns {"locales": [changed languages], "keys": whether keys.json changed}.
+    """
+    return {
+        "locales": sorted(localization.reload()),
+        "keys": config.reload_allowed_keys(),
+    }
+
+
+class FileWatcher:
+    """polls the reloadable files every interval seconds and reloads what changed.
+
+    polling only stats the files that are already loaded, so it is cheap
+    enough to run often, and it needs no platform specific file events.
+    """
+
+    def __init__(self, interval, on_reload=None):
+        self.interval = interval
+        self.on_reload = on_reload
+        self._task = None
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                changes = reload_all()
+            except Exception as e:
+                # a half-written json file fails to parse, the next poll retries it
+                log.warning("Failed to reload files: %s", e)
+                continue
+            if (changes["locales"] or changes["keys"]) and self.on_reload is not None:
+                self.on_reload(changes)
@@ -0,0 +1,138 @@
+import asyncio
+import sys
+import time
+import src.utils.config.aio as db
+from src.utils.config.cache import LRUCache
+from src.utils.metrics import metrics
+from src.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+class ARReply:
+    """what the reaction handlers need to know about a sent autoresponder reply"""
+
+    __slots__ = ("name", "creator_id", "trigger", "created_at")
+
+    def __init__(self, name, creator_id, trigger, created_at=None):
+        self.name = name
+        self.creator_id = creator_id
+        self.trigger = trigger
+        self.created_at = time.time() if created_at is None else created_at
+
+    def __repr__(self):
+        return f"<ARReply name={self.name!r} creator_id={self.creator_id}>"
+
+    def size(self):
+        """approximate memory used by the record and its strings, in bytes"""
+        return sys.getsizeof(self) + sys.getsizeof(self.name) + sys.getsizeof(self.trigger)
+
+
+class ReplyStore:
+    """autoresponder replies by message id, bounded in size and age.
+
+    the newest replies are kept in memory. replies pushed out by the size cap
+    or the ttl are written to the database in batches when spill is on, and
+    are kept there for retention seconds so reactions on them keep working.
+    """
+
+    def __init__(self, maxsize=5000, ttl=3600, spill=True, retention=7 * 86400):
+        self.spill = spill
+        self.retention = retention
+        self.spilled = 0
+        self.spill_hits = 0
+        self._pending = {}
+        self._flushing = False
+        self.cache = LRUCache("ar_replies", maxsize=maxsize, ttl=ttl, on_evict=self._evicted)
+        # hits, misses and evictions are reported with the other caches
+        metrics.gauge("ar_replies", self.stats)
+
+    async def start(self):
+        """drop stored replies older than the retention period"""
+        if self.spill:
+            await db.prune_ar_replies(time.time() - self.retention)
+
+    async def stop(self):
+        """write every reply still in memory, so they outlive a restart"""
+        if not self.spill:
+            return
+        for message_id, reply in self.cache.items():
+            self._pending[message_id] = reply
+        await self._flush()
+
+    def add(self, message_id, name, creator_id, trigger):
+        self.cache.set(message_id, ARReply(name, creator_id, trigger))
+
+    async def get(self, message_id, stored=True):
+        """get the reply sent as message_id, or None.
+
+        stored=False only looks in memory, for callers that already know the
+        message is not an old autoresponder reply.
+        """
+        reply = self.cache.get(message_id)
+        if reply is not None:
+            return reply
+        reply = self._pending.get(message_id)
+        if reply is not None or not (self.spill and stored):
+            return reply
+        row = await db.get_ar_reply(message_id)
+        if row is None or row[3] < time.time() - self.retention:
+            return None
+        self.spill_hits += 1
+        return ARReply(*row)
+
+    async def discard(self, message_id):
+        """forget a reply, e.g. after its message was deleted"""
+        found = self.cache.pop(message_id) or self._pending.pop(message_id, None)
+        if found is None and self.spill:
+            await db.delete_ar_reply(message_id)
+
+    def memory_usage(self):
+        """approximate bytes held by the in-memory part of the store"""
+        # each entry is an int key and an (expiry, reply) tuple
+        entry = sys.getsizeof(2**62) + sys.getsizeof((0.0, None)) + sys.getsizeof(0.0)
+        return sum(entry + reply.size() for _, reply in self.cache.items())
+
+    def stats(self):
+        return {
+            "size": len(self.cache),
+            "maxsize": self.cache.maxsize,
+            "memory_bytes": self.memory_usage(),
+            "spilled": self.spilled,
+            "pending_spill": len(self._pending),
+            "spill_hits": self.spill_hits,
+        }
+
+    def _evicted(self, message_id, reply):
+        if not self.spill:
+            return
+        self._pending[message_id] = reply
+        if self._flushing:
+            return
+        try:
+            asyncio.get_running_loop().create_task(self._flush())
+        except RuntimeError:
+            # no loop yet, the next eviction or stop() writes it
+            return
+        self._flushing = True
+
+    async def _flush(self):
+        self._flushing = True
+        try:
+            while self._pending:
+                batch = dict(self._pending)
+                try:
+                    await db.add_ar_replies([
+                        (message_id, r.name, r.creator_id, r.trigger, r.created_at)
+                        for message_id, r in batch.items()
+                    ])
+                except Exception as e:
+                    log.warning("Failed to store %d autoresponder replies: %s", len(batch), e)
+                    break
+                self.spilled += len(batch)
+                for message_id in batch:
+                    # a reply evicted again while we were writing stays queued
+                    if self._pending.get(message_id) is batch[message_id]:
+                        del self._pending[message_id]
+        finally:
+            self._flushing = False
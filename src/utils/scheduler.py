@@ -0,0 +1,120 @@
+import asyncio
+import heapq
+import time
+import discord
+import src.utils.config.aio as db
+from src.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+# seconds before a crashed scheduler task is started again
+RESTART_DELAY = 5
+
+
+class DeleteScheduler:
+    """deletes messages at a later time from one background task.
+
+    pending deletes are kept in a heap ordered by due time, so scheduling is
+    O(log n) and nothing sleeps per message. every delete is also written to
+    the database and reloaded by start(), so a restart does not lose them.
+    a process running some of the shards only reloads the deletes of guilds
+    on those shards, so cluster processes never repeat each other's.
+    """
+
+    def __init__(self, bot, concurrency=8, max_batch=100):
+        self.bot = bot
+        self.max_batch = max_batch
+        self._heap = []
+        self._wake = asyncio.Event()
+        self._limit = asyncio.Semaphore(concurrency)
+        self._task = None
+
+    def __len__(self):
+        return len(self._heap)
+
+    async def start(self):
+        """load the deletes left over from the last run and start the task"""
+        if self._task is not None:
+            return
+        deletes = await db.get_scheduled_deletes(self.bot.shard_count or 1, self.bot.shard_ids)
+        for delete_at, message_id, channel_id in deletes:
+            heapq.heappush(self._heap, (delete_at, message_id, channel_id))
+        self._spawn()
+
+    def _spawn(self):
+        self._task = asyncio.create_task(self._run())
+        self._task.add_done_callback(self._crashed)
+
+    def _crashed(self, task):
+        # the task only ends on its own if something escaped _run, start it over
+        if task.cancelled() or task is not self._task:
+            return
+        log.error("Delete scheduler crashed, restarting in %ss", RESTART_DELAY, exc_info=task.exception())
+        asyncio.get_running_loop().call_later(RESTART_DELAY, self._restart, task)
+
+    def _restart(self, task):
+        # unless stop() or start() came first
+        if self._task is task:
+            self._spawn()
+
+    async def stop(self):
+        """stop the task. pending deletes stay in the database for the next start"""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def schedule(self, channel_id, message_id, delay, guild_id=None):
+        """delete a message after delay seconds"""
+        delete_at = time.time() + delay
+        try:
+            await db.add_scheduled_delete(channel_id, message_id, delete_at, guild_id)
+        except Exception as e:
+            # still deleted on time, it just does not survive a restart
+            log.warning("Failed to store the delete of message %s in channel %s: %s", message_id, channel_id, e)
+        heapq.heappush(self._heap, (delete_at, message_id, channel_id))
+        # only the soonest delete decides how long the task sleeps
+        if self._heap[0][1] == message_id:
+            self._wake.set()
+
+    async def _run(self):
+        while True:
+            if not self._heap:
+                await self._wake.wait()
+                self._wake.clear()
+                continue
+
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                continue
+
+            now = time.time()
+            due = []
+            while self._heap and self._heap[0][0] <= now and len(due) < self.max_batch:
+                due.append(heapq.heappop(self._heap))
+            await asyncio.gather(*(self._delete(channel_id, message_id) for _, message_id, channel_id in due))
+            try:
+                await db.remove_scheduled_deletes([message_id for _, message_id, _ in due])
+            except Exception as e:
+                log.warning("Failed to clear scheduled deletes: %s", e)
+
+    async def _delete(self, channel_id, message_id):
+        async with self._limit:
+            try:
+                await self.bot.http.delete_message(channel_id, message_id)
+            except (discord.NotFound, discord.Forbidden):
+                # already gone, or we can no longer see the channel
+                pass
+            except discord.HTTPException as e:
+                log.warning("Failed to delete message %s in channel %s: %s", message_id, channel_id, e)
+            except Exception as e:
+                # network errors once discord.py gives up retrying
+                log.warning("Failed to delete message %s in channel %s: %r", message_id, channel_id, e)
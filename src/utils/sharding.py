@@ -0,0 +1,87 @@
+import asyncio
+import os
+import time
+import discord
+from discord.ext import commands
+from src.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+# total shards across every process, unset lets discord recommend a count
+SHARD_COUNT = os.getenv("SHARD_COUNT")
+# shards this process runs, e.g. "0,1" or "4-7", unset runs all of them
+SHARD_IDS = os.getenv("SHARD_IDS")
+# discord allows one identify per this many seconds in each concurrency bucket
+IDENTIFY_INTERVAL = 5.0
+
+# set by ShardedBot once the count is known, read through shard_for
+shard_count = 1
+
+
+def shard_for(guild_id):
+    """the shard a guild's events arrive on, as discord assigns them"""
+    return (int(guild_id) >> 22) % shard_count
+
+
+def parse_shard_ids(text):
+    """'0,2,4-7' as [0, 2, 4, 5, 6, 7]"""
+    ids = []
+    for part in text.split(","):
+        first, _, last = part.strip().partition("-")
+        ids.extend(range(int(first), int(last or first) + 1))
+    return sorted(set(ids))
+
+
+def shard_options():
+    """AutoShardedBot keyword arguments from SHARD_COUNT and SHARD_IDS"""
+    options = {}
+    if SHARD_COUNT:
+        options["shard_count"] = int(SHARD_COUNT)
+    if SHARD_IDS:
+        if not SHARD_COUNT:
+            raise ValueError("SHARD_IDS needs SHARD_COUNT to be set as well")
+        options["shard_ids"] = parse_shard_ids(SHARD_IDS)
+    return options
+
+
+class ShardedBot(commands.AutoShardedBot):
+    """AutoShardedBot that identifies shards as fast as discord allows.
+
+    discord lets shards identify in max_concurrency buckets (shard id modulo
+    max_concurrency), one per bucket every 5 seconds. the library waits 5
+    seconds before every identify instead, so a bot with a higher
+    max_concurrency starts that many times faster here.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_concurrency = 1
+        self._identify_locks = {}
+        self._identified = {}
+
+    async def launch_shards(self):
+        try:
+            limits = await self.fetch_session_start_limits()
+        except discord.HTTPException as e:
+            log.warning("Could not fetch session start limits, identifying one shard at a time: %s", e)
+        else:
+            self.max_concurrency = limits.max_concurrency
+            log.info(
+                "%s of %s session starts left, max_concurrency %s",
+                limits.remaining, limits.total, limits.max_concurrency,
+            )
+        await super().launch_shards()
+
+    async def before_identify_hook(self, shard_id, *, initial=False):
+        global shard_count
+        # the count is settled by now, and no guild has arrived on this shard yet
+        shard_count = self.shard_count or 1
+        bucket = (shard_id or 0) % self.max_concurrency
+        lock = self._identify_locks.setdefault(bucket, asyncio.Lock())
+        async with lock:
+            last = self._identified.get(bucket)
+            if last is not None:
+                wait = last + IDENTIFY_INTERVAL - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            self._identified[bucket] = time.monotonic()
@@ -0,0 +1,66 @@
+import re
+from functools import lru_cache
+
+_PLACEHOLDER = re.compile(r"\{([a-z_]+)\}")
+
+
+class Template:
+    """a response parsed once into literal text and {placeholder} slots.
+
+    rendering fills the slots in a single pass, so its cost depends on the
+    size of the template and not on how many placeholders the bot knows.
+    """
+
+    __slots__ = ("parts", "slots", "names")
+
+    def __init__(self, text):
+        parts, slots = [], []
+        pos = 0
+        for match in _PLACEHOLDER.finditer(text):
+            parts.append(text[pos:match.start()])
+            slots.append((len(parts), match.group(1)))
+            parts.append(match.group(0))
+            pos = match.end()
+        parts.append(text[pos:])
+        self.parts = parts
+        self.slots = slots
+        self.names = frozenset(name for _, name in slots)
+
+    def render(self, values):
+        """substitute values into the template, leaving unknown placeholders as written"""
+        if not self.slots:
+            return self.parts[0]
+        parts = self.parts.copy()
+        for index, name in self.slots:
+            value = values.get(name)
+            if value is not None:
+                parts[index] = value
+        return "".join(parts)
+
+
+@lru_cache(maxsize=4096)
+def compile_template(text):
+    """parse text into a Template, reusing the compiled form for repeated text"""
+    return Template(text)
+
+
+def render_nested(data, values):
+    """render every string inside a json-like structure of dicts and lists"""
+    if isinstance(data, str):
+        return compile_template(data).render(values)
+    if isinstance(data, dict):
+        return {key: render_nested(val, values) for key, val in data.items()}
+    if isinstance(data, list):
+        return [render_nested(val, values) for val in data]
+    return data
+
+
+def nested_names(data):
+    """collect the placeholder names used anywhere in a json-like structure"""
+    if isinstance(data, str):
+        return compile_template(data).names
+    if isinstance(data, dict):
+        return frozenset().union(*(nested_names(val) for val in data.values()))
+    if isinstance(data, list):
+        return frozenset().union(*(nested_names(val) for val in data))
+    return frozenset()
@@ -0,0 +1,190 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import wikipediaapi
+import src.utils.config.aio as db
+from src.utils.config.cache import LRUCache
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+
+log = get_logger(__name__)
+
+USER_AGENT = "berrylyn/0.1 (wiki/mod bot for queer-focused discord servers by @vanillyn, https://github.com/vanillyn/vanillabot.py)"
+# seconds a lookup may take before the command gives up on it
+WIKI_TIMEOUT = float(os.getenv("WIKI_TIMEOUT", "8"))
+# lookups running at once, each one holds a thread and a connection
+WIKI_WORKERS = int(os.getenv("WIKI_WORKERS", "4"))
+# seconds a cached article is served as is
+WIKI_TTL = float(os.getenv("WIKI_TTL", str(24 * 3600)))
+# seconds after that it is still served, but refreshed in the background
+WIKI_STALE = float(os.getenv("WIKI_STALE", str(7 * 24 * 3600)))
+# seconds a "not found" is remembered
+WIKI_MISS_TTL = float(os.getenv("WIKI_MISS_TTL", "3600"))
+
+
+class WikiService:
+    """wikipedia lookups off the event loop.
+
+    keeps one client per language, so its keep-alive connections are reused
+    between lookups, and runs the blocking requests on a small thread pool.
+    """
+
+    def __init__(self, workers=WIKI_WORKERS, timeout=WIKI_TIMEOUT, **client_options):
+        self.timeout = timeout
+        # extra wikipediaapi.Wikipedia arguments, e.g. an httpx transport
+        self.client_options = client_options
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="wiki")
+        self._fetch_timer = metrics.timer("wiki_fetch")
+        self._timeouts = metrics.counter("wiki_errors", kind="timeout")
+        self._errors = metrics.counter("wiki_errors", kind="http")
+
+    def client(self, lang):
+        client = self._clients.get(lang)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(lang)
+                if client is None:
+                    client = self._clients[lang] = wikipediaapi.Wikipedia(
+                        user_agent=USER_AGENT,
+                        language=lang,
+                        extract_format=wikipediaapi.ExtractFormat.WIKI,
+                        timeout=self.timeout,
+                        **self.client_options,
+                    )
+        return client
+
+    def _fetch(self, lang, query):
+        # runs on the pool, every page attribute below may be a request
+        page = self.client(lang).page(query)
+        if not page.exists():
+            return None
+        return {"title": page.title, "summary": page.summary.split("\n")[0], "url": page.fullurl}
+
+    async def fetch(self, lang, query):
+        """{title, summary, url} of the article in one language, None if there is none.
+
+        raises asyncio.TimeoutError after self.timeout seconds.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            with self._fetch_timer.time():
+                return await asyncio.wait_for(
+                    loop.run_in_executor(self._executor, self._fetch, lang, query), self.timeout
+                )
+        except asyncio.TimeoutError:
+            self._timeouts.inc()
+            raise
+        except Exception:
+            self._errors.inc()
+            raise
+
+    async def lookup(self, lang, query):
+        """the article in lang, or in english if lang has none.
+
+        both languages are requested at once, so a miss costs one round trip.
+        errors are only raised when neither language found the article.
+        """
+        if lang == "en":
+            return await self.fetch("en", query)
+        results = await asyncio.gather(self.fetch(lang, query), self.fetch("en", query), return_exceptions=True)
+        for result in results:
+            if isinstance(result, dict):
+                return result
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return None
+
+
+def normalize(query):
+    """the query as wikipedia reads it: spaces and underscores collapsed, first letter capitalized"""
+    query = " ".join(query.replace("_", " ").split())
+    return query[:1].upper() + query[1:]
+
+
+class WikiCache:
+    """lookup results by (language, query), in memory and in the database.
+
+    an article is served as is for ttl seconds. until it is stale seconds old
+    it is still served, and one background lookup refreshes it. "not found"
+    is remembered for miss_ttl seconds. concurrent lookups of the same key
+    share one request.
+    """
+
+    def __init__(self, service, maxsize=2048, ttl=WIKI_TTL, stale=WIKI_STALE, miss_ttl=WIKI_MISS_TTL):
+        self.service = service
+        self.ttl = ttl
+        self.stale = max(stale, ttl)
+        self.miss_ttl = miss_ttl
+        # values are (fetched_at, article or None), fetched_at in unix time
+        self.memory = LRUCache("wiki", maxsize=maxsize, ttl=self.stale)
+        self._inflight = {}
+        self._stored_hits = metrics.counter("wiki_cache", result="stored")
+        self._stale_hits = metrics.counter("wiki_cache", result="stale")
+        self._shared = metrics.counter("wiki_cache", result="shared")
+
+    async def start(self):
+        """drop stored lookups too old to be served"""
+        await db.prune_wiki_articles(time.time() - self.stale)
+
+    async def get(self, lang, query):
+        """like WikiService.lookup, answered from the cache when possible"""
+        key = (lang, normalize(query))
+        entry = self.memory.get(key)
+        if entry is None:
+            row = await db.get_wiki_article(*key)
+            if row is not None:
+                title, summary, url, fetched_at = row
+                article = None if title is None else {"title": title, "summary": summary, "url": url}
+                entry = (fetched_at, article)
+                self.memory.set(key, entry)
+                self._stored_hits.inc()
+
+        if entry is not None:
+            fetched_at, article = entry
+            age = time.time() - fetched_at
+            if age < (self.ttl if article is not None else self.miss_ttl):
+                return article
+            if article is not None and age < self.stale:
+                self._stale_hits.inc()
+                self._load(key)
+                return article
+        return await asyncio.shield(self._load(key))
+
+    def invalidate(self, lang, query):
+        self.memory.invalidate((lang, normalize(query)))
+
+    def _load(self, key):
+        # one lookup per key at a time, everyone else waits on the same task
+        task = self._inflight.get(key)
+        if task is not None:
+            self._shared.inc()
+            return task
+        task = self._inflight[key] = asyncio.create_task(self._fetch(key))
+        task.add_done_callback(lambda task: self._done(key, task))
+        return task
+
+    async def _fetch(self, key):
+        article = await self.service.lookup(*key)
+        fetched_at = time.time()
+        self.memory.set(key, (fetched_at, article))
+        if article is None:
+            await db.add_wiki_article(*key, None, None, None, fetched_at)
+        else:
+            await db.add_wiki_article(*key, article["title"], article["summary"], article["url"], fetched_at)
+        return article
+
+    def _done(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # a background refresh has nobody awaiting it, so report its error here
+        if not task.cancelled() and task.exception() is not None:
+            log.debug("Wiki lookup for %s failed: %s", key, task.exception())
+
+
+wiki = WikiService()
+wiki_cache = WikiCache(wiki)
@@ -0,0 +1,140 @@
+import argparse
+import asyncio
+import json
+import src.utils.config.aio as db
+from src.utils.wiki import normalize
+
+# a fuzzy suggestion must share at least this much of its trigrams with the query
+MIN_SIMILARITY = 0.3
+
+
+def index_key(title):
+    """how titles and queries are compared in the index: normalized and case-folded"""
+    return normalize(title).casefold()
+
+
+def trigrams(key):
+    # padded so the start and end of a key count, like postgres' pg_trgm
+    padded = f"  {key} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def read_articles(path):
+    """the articles in an exported JSON file.
+
+    the file holds a list of objects with a title, summary and url, and
+    optionally a language and a list of aliases.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        articles = json.load(f)
+    if isinstance(articles, dict):
+        articles = articles.get("articles", [])
+    return articles
+
+
+def build_rows(articles):
+    """(index rows, trigram rows) for the articles of one language.
+
+    every alias gets its own row pointing at the same article, so they are
+    found by exact, prefix and fuzzy lookups alike.
+    """
+    rows, grams = {}, set()
+    for article in articles:
+        for name in [article["title"], *article.get("aliases", [])]:
+            key = index_key(name)
+            if not key:
+                continue
+            rows[key] = (key, article["title"], article.get("summary", ""), article.get("url", ""))
+            grams.update((gram, key) for gram in trigrams(key))
+    return list(rows.values()), sorted(grams)
+
+
+class WikiIndex:
+    """answers wiki lookups from the local article index, no request involved.
+
+    the index lives in the wiki database, which sqlite maps into memory, so
+    there is nothing to load at startup. build it with
+    python -m src.utils.wikiindex build articles.json
+    """
+
+    async def get(self, lang, query):
+        """{title, summary, url} of the indexed article in lang or english, or None"""
+        languages = (lang,) if lang == "en" else (lang, "en")
+        row = await db.get_indexed_article(languages, index_key(query))
+        if row is None:
+            return None
+        title, summary, url = row
+        return {"title": title, "summary": summary, "url": url}
+
+    async def suggest(self, lang, query, limit=5):
+        """titles close to query: prefix matches first, then the most similar by trigrams"""
+        key = index_key(query)
+        if not key:
+            return []
+        grams = trigrams(key)
+        titles, scored = [], []
+        for language in (lang,) if lang == "en" else (lang, "en"):
+            titles.extend(title for _, title in await db.get_indexed_prefix(language, key, limit))
+            for other, title, shared in await db.get_trigram_matches(language, sorted(grams), limit * 4):
+                score = shared / (len(grams) + len(trigrams(other)) - shared)
+                if score >= MIN_SIMILARITY:
+                    scored.append((score, title))
+        scored.sort(key=lambda item: -item[0])
+        seen = set()
+        suggestions = []
+        for title in titles + [title for _, title in scored]:
+            if title not in seen:
+                seen.add(title)
+                suggestions.append(title)
+        return suggestions[:limit]
+
+
+wiki_index = WikiIndex()
+
+
+async def build(path, language):
+    by_language = {}
+    for article in read_articles(path):
+        by_language.setdefault(article.get("language", language), []).append(article)
+    for lang, articles in by_language.items():
+        rows, grams = build_rows(articles)
+        await db.replace_wiki_index(lang, rows, grams)
+        print(f"{lang}: indexed {len(articles)} articles as {len(rows)} titles and {len(grams)} trigrams")
+
+
+async def export(path, language, topics):
+    from src.utils.wiki import wiki
+
+    articles = []
+    for topic in topics:
+        article = await wiki.fetch(language, topic)
+        if article is None:
+            print(f"{topic}: not found")
+            continue
+        aliases = [topic] if index_key(topic) != index_key(article["title"]) else []
+        articles.append({**article, "language": language, "aliases": aliases})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(articles, f, ensure_ascii=False, indent=4)
+    print(f"wrote {len(articles)} articles to {path}")
+
+
+def main():
+    from src.utils import config
+    from src.cogs.wiki import TOPICS
+
+    parser = argparse.ArgumentParser(description="build the offline wiki article index")
+    parser.add_argument("action", choices=["build", "export"], help="build the index from a file, or export topics from wikipedia to one")
+    parser.add_argument("file", help="JSON list of {title, summary, url, language?, aliases?}")
+    parser.add_argument("--language", default="en", help="language of articles that do not name one")
+    parser.add_argument("topics", nargs="*", help="articles to export, the cog's TOPICS by default")
+    args = parser.parse_args()
+
+    config.init()
+    if args.action == "build":
+        asyncio.run(build(args.file, args.language))
+    else:
+        asyncio.run(export(args.file, args.language, args.topics or TOPICS))
+
+
+if __name__ == "__main__":
+    main()